@@ -7,20 +7,50 @@ https://github.com/n2aws/hacs-eg4-integration
 
 from __future__ import annotations
 
-from datetime import timedelta
 from typing import TYPE_CHECKING
 
-from homeassistant.const import Platform
-from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.components import zeroconf
+from homeassistant.const import (
+    CONF_HOST,
+    CONF_PASSWORD,
+    CONF_PORT,
+    CONF_USERNAME,
+    Platform,
+)
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers.aiohttp_client import async_create_clientsession
 from homeassistant.loader import async_get_loaded_integration
 
 from .api import EG4ApiClient
-from .const import DOMAIN, LOGGER
-from .coordinator import EG4DataUpdateCoordinator
+from .cloud import EG4CloudClient
+from .const import (
+    CONF_BAUDRATE,
+    CONF_GRIDBOSS_LAST_KNOWN_IP,
+    CONF_LAST_KNOWN_IP,
+    CONF_PUSH,
+    CONF_SYSTEM_ID,
+    CONF_UNIT_ID,
+    DEFAULT_BAUDRATE,
+    DEFAULT_GRIDBOSS_UNIT_ID,
+    DOMAIN,
+    LOGGER,
+)
+from .coordinator import CoordinatorOptions, EG4DataUpdateCoordinator
 from .data import EG4Data
+from .discovery import EG4Discovery, zeroconf_resolver
+from .models import GRIDBOSS_MAP, async_get_register_map
+from .polling import DEFAULT_UNIT_ID
+from .push import PushListener
+from .sensor import ENTITY_DESCRIPTIONS
+from .services import async_setup_services
+from .statistics import StatisticsImporter
+from .system import async_get_system
 
 if TYPE_CHECKING:
+    from collections.abc import Callable
+
     from homeassistant.core import HomeAssistant
+    from homeassistant.helpers.typing import ConfigType
 
     from .data import IntegrationBlueprintConfigEntry
 
@@ -30,6 +60,20 @@ PLATFORMS: list[Platform] = [
     Platform.SWITCH,
 ]
 
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
+
+# Serial number keys and where the last working address of each is kept.
+_LAST_KNOWN_IP_KEYS = {
+    "inverter_serial_number": CONF_LAST_KNOWN_IP,
+    "gridboss_serial_number": CONF_GRIDBOSS_LAST_KNOWN_IP,
+}
+
+
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:  # noqa: ARG001
+    """Register the services, which serve every entry."""
+    async_setup_services(hass)
+    return True
+
 
 # https://developers.home-assistant.io/docs/config_entries_index/#setting-up-an-entry
 async def async_setup_entry(
@@ -37,22 +81,124 @@ async def async_setup_entry(
     entry: IntegrationBlueprintConfigEntry,
 ) -> bool:
     """Set up this integration using UI."""
+    discovery = EG4Discovery(
+        zeroconf_resolver(await zeroconf.async_get_async_instance(hass))
+    )
+
+    def _host_saver(key: str) -> Callable[[str], None]:
+        def _async_save_host(host: str) -> None:
+            """Remember the dongle address so a restart skips discovery."""
+            if entry.data.get(key) != host:
+                hass.config_entries.async_update_entry(
+                    entry, data={**entry.data, key: host}
+                )
+
+        return _async_save_host
+
+    for serial_key, host_key in _LAST_KNOWN_IP_KEYS.items():
+        if (serial := entry.data.get(serial_key)) and (
+            host := entry.data.get(host_key)
+        ):
+            discovery.seed(serial, host)
+
+    # One Modbus session is shared for the life of the entry, and by every
+    # entry on the same RS485 bus.
+    if serial_port := entry.data.get("serial_port"):
+        client = _acquire_serial_client(
+            hass, serial_port, entry.data.get(CONF_BAUDRATE, DEFAULT_BAUDRATE)
+        )
+    else:
+        client = EG4ApiClient(
+            host=entry.data.get(CONF_HOST),
+            port=entry.data.get(CONF_PORT),
+            serial_number=entry.data.get("inverter_serial_number"),
+            discovery=discovery,
+            on_discovered=_host_saver(CONF_LAST_KNOWN_IP),
+        )
+    gridboss_client = None
+    if not client.serial_port and (
+        gridboss_serial := entry.data.get("gridboss_serial_number")
+    ):
+        # A GridBoss on TCP has its own dongle, polled alongside the inverter.
+        # On RS485 it shares the inverter's bus under its own unit ID.
+        gridboss_client = EG4ApiClient(
+            serial_number=gridboss_serial,
+            discovery=discovery,
+            on_discovered=_host_saver(CONF_GRIDBOSS_LAST_KNOWN_IP),
+        )
+    cloud_client = None
+    if entry.data.get(CONF_USERNAME) and entry.data.get(CONF_PASSWORD):
+        # The cloud stands in while the local link is down. Its own session
+        # keeps this account's cookie apart from other entries', and is
+        # closed with the entry.
+        session = async_create_clientsession(hass, auto_cleanup=False)
+        entry.async_on_unload(session.close)
+        cloud_client = EG4CloudClient(
+            entry.data[CONF_USERNAME], entry.data[CONF_PASSWORD], session
+        )
+    # Maps are parsed once per process and shared by every entry of a model;
+    # a model nobody has configured is never parsed.
+    register_map = await async_get_register_map(hass, entry.data.get("inverter_model"))
+    gridboss_register_map = None
+    if entry.data.get("gridboss_serial_number"):
+        gridboss_register_map = await async_get_register_map(hass, GRIDBOSS_MAP)
     coordinator = EG4DataUpdateCoordinator(
         hass=hass,
-        logger=LOGGER,
-        name=DOMAIN,
-        update_interval=timedelta(hours=1),
+        api_client=client,
+        polling_interval=entry.data.get("polling_interval", 10),
+        config_entry=entry,
+        options=CoordinatorOptions(
+            gridboss_client=gridboss_client,
+            gridboss_unit_id=entry.data.get(
+                "gridboss_unit_id", DEFAULT_GRIDBOSS_UNIT_ID
+            ),
+            unit_id=entry.data.get(CONF_UNIT_ID, DEFAULT_UNIT_ID),
+            cloud_client=cloud_client,
+            statistics=StatisticsImporter(hass, entry.entry_id, ENTITY_DESCRIPTIONS),
+            register_map=register_map,
+            gridboss_register_map=gridboss_register_map,
+        ),
     )
     entry.runtime_data = EG4Data(
-        client=EG4ApiClient(
-            session=async_get_clientsession(hass),
-        ),
+        client=client,
         integration=async_get_loaded_integration(hass, entry.domain),
         coordinator=coordinator,
+        settings=_settings(entry),
     )
 
     # https://developers.home-assistant.io/docs/integration_fetching_data#coordinated-single-api-poll-for-data-for-all-entities
-    await coordinator.async_config_entry_first_refresh()
+    if await coordinator.async_restore_snapshot():
+        # Entities start from the last run's values, marked stale, and setup
+        # does not wait for the device to answer.
+        entry.async_create_background_task(
+            hass, coordinator.async_refresh(), "eg4_integration first refresh"
+        )
+    else:
+        try:
+            await coordinator.async_config_entry_first_refresh()
+        except Exception:
+            if client.serial_port:
+                await _release_serial_client(hass, client)
+            raise
+
+    if entry.data.get(CONF_PUSH) and not client.serial_port:
+        # Pushed frames update the entities as they arrive; polling only
+        # runs when the stream goes quiet for a whole interval.
+        push = PushListener(
+            lambda: client.host,
+            register_map,
+            coordinator.async_push,
+            serial=entry.data.get("inverter_serial_number"),
+        )
+        push.start(
+            lambda listen: entry.async_create_background_task(
+                hass, listen, "eg4_integration push listener"
+            )
+        )
+        entry.async_on_unload(push.stop)
+        entry.runtime_data.push = push
+
+    await _async_join_system(hass, entry)
 
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
     entry.async_on_unload(entry.add_update_listener(async_reload_entry))
@@ -60,12 +206,63 @@ async def async_setup_entry(
     return True
 
 
+async def _async_join_system(
+    hass: HomeAssistant, entry: IntegrationBlueprintConfigEntry
+) -> None:
+    """Sum the entry's values into the totals of its system, if it has one."""
+    # Paralleled inverters are given the same system ID.
+    if system_id := entry.options.get(CONF_SYSTEM_ID):
+        system = await async_get_system(hass, system_id)
+        system.async_add_member(entry.entry_id, entry.runtime_data.coordinator)
+        entry.runtime_data.system = system
+
+
 async def async_unload_entry(
     hass: HomeAssistant,
     entry: IntegrationBlueprintConfigEntry,
 ) -> bool:
     """Handle removal of an entry."""
-    return await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
+    if unload_ok := await hass.config_entries.async_unload_platforms(entry, PLATFORMS):
+        if (system := entry.runtime_data.system) is not None:
+            system.async_remove_member(entry.entry_id)
+        client = entry.runtime_data.client
+        if client.serial_port:
+            await _release_serial_client(hass, client)
+        else:
+            await entry.runtime_data.coordinator.async_close()
+    return unload_ok
+
+
+def _acquire_serial_client(
+    hass: HomeAssistant, serial_port: str, baudrate: int
+) -> EG4ApiClient:
+    """Return the client for ``serial_port``, shared by the entries on that bus."""
+    buses = hass.data.setdefault(DOMAIN, {}).setdefault("serial_buses", {})
+    if serial_port not in buses:
+        buses[serial_port] = [
+            EG4ApiClient(serial_port=serial_port, baudrate=baudrate),
+            0,
+        ]
+    bus = buses[serial_port]
+    if bus[0].baudrate != baudrate:
+        LOGGER.warning(
+            "%s is already open at %s baud, ignoring %s",
+            serial_port,
+            bus[0].baudrate,
+            baudrate,
+        )
+    bus[1] += 1
+    return bus[0]
+
+
+async def _release_serial_client(hass: HomeAssistant, client: EG4ApiClient) -> None:
+    """Close a shared serial client once no entry uses it."""
+    buses = hass.data[DOMAIN]["serial_buses"]
+    bus = buses[client.serial_port]
+    bus[1] -= 1
+    if not bus[1]:
+        del buses[client.serial_port]
+        await client.close()
 
 
 async def async_reload_entry(
@@ -73,4 +270,17 @@ async def async_reload_entry(
     entry: IntegrationBlueprintConfigEntry,
 ) -> None:
     """Reload config entry."""
+    # Saving a discovered address updates the entry too; that needs no reload.
+    if _settings(entry) == entry.runtime_data.settings:
+        return
     await hass.config_entries.async_reload(entry.entry_id)
+
+
+def _settings(entry: IntegrationBlueprintConfigEntry) -> dict:
+    """Return the user-controlled part of the entry."""
+    data = {
+        key: value
+        for key, value in entry.data.items()
+        if key not in _LAST_KNOWN_IP_KEYS.values()
+    }
+    return {"data": data, "options": dict(entry.options)}
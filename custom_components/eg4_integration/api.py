@@ -1,14 +1,39 @@
-"""Sample API Client."""
+"""Modbus API client for EG4 hardware."""
 
 from __future__ import annotations
 
-import socket
-from typing import Any
+import asyncio
+import random
+import time
+from typing import TYPE_CHECKING, Any
 
-import aiohttp
-import async_timeout
-from pymodbus.client.async_tcp import AsyncModbusTcpClient
-from pymodbus.client.async_serial import AsyncModbusSerialClient
+from pymodbus import FramerType
+from pymodbus.client import AsyncModbusSerialClient, AsyncModbusTcpClient
+from pymodbus.exceptions import ModbusException, ModbusIOException
+
+from .bus import BusTiming
+from .discovery import EG4Discovery
+from .metrics import LinkStats
+from .planner import DEFAULT_MAX_REGISTERS
+from .registers import RegisterType
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable, Sequence
+
+DEFAULT_PORT = 502
+REDISCOVER_MIN_AGE = 60.0
+RECONNECT_DELAY = 1.0
+RECONNECT_MAX_DELAY = 300.0
+# Times pymodbus resends a request that got no answer.
+REQUEST_RETRIES = 3
+
+# Bytes each transport adds around a PDU: the MBAP header on TCP, the unit
+# ID and CRC on RTU. An exception response PDU is two bytes.
+_FRAME_OVERHEAD = {
+    "TCP": 7,
+    "RTU": 3,
+}
+_EXCEPTION_SIZE = 2
 
 
 class EG4ApiClientError(Exception):
@@ -23,145 +48,268 @@ class EG4ApiClientAuthenticationError(EG4ApiClientError):
     """Exception to indicate an authentication error."""
 
 
-def _verify_response_or_raise(response: aiohttp.ClientResponse) -> None:
-    """Verify that the response is valid."""
-    if response.status in (401, 403):
-        msg = "Invalid credentials"
-        raise EG4ApiClientAuthenticationError(msg)
-    response.raise_for_status()
-
-
-class EG4ApiClient:
-    """API Client for EG4 Integration."""
-
-    def __init__(
-        self,
-        session: aiohttp.ClientSession,
-    ) -> None:
-        """Sample API Client."""
-        self._session = session
-
-    async def async_get_data(self) -> Any:
-        """Get data from the API."""
-        return await self._api_wrapper(
-            method="get",
-            url="https://jsonplaceholder.typicode.com/posts/1",
-        )
-
-    async def async_set_title(self, value: str) -> Any:
-        """Get data from the API."""
-        return await self._api_wrapper(
-            method="patch",
-            url="https://jsonplaceholder.typicode.com/posts/1",
-            data={"title": value},
-            headers={"Content-type": "application/json; charset=UTF-8"},
-        )
-
-    async def _api_wrapper(
-        self,
-        method: str,
-        url: str,
-        data: dict | None = None,
-        headers: dict | None = None,
-    ) -> Any:
-        """Get information from the API."""
-        try:
-            async with async_timeout.timeout(10):
-                response = await self._session.request(
-                    method=method,
-                    url=url,
-                    headers=headers,
-                    json=data,
-                )
-                _verify_response_or_raise(response)
-                return await response.json()
-
-        except TimeoutError as exception:
-            msg = f"Timeout error fetching information - {exception}"
-            raise EG4ApiClientCommunicationError(
-                msg,
-            ) from exception
-        except (aiohttp.ClientError, socket.gaierror) as exception:
-            msg = f"Error fetching information - {exception}"
-            raise EG4ApiClientCommunicationError(
-                msg,
-            ) from exception
-        except Exception as exception:  # pylint: disable=broad-except
-            msg = f"Something really wrong happened! - {exception}"
-            raise EG4ApiClientError(
-                msg,
-            ) from exception
-
-
 class EG4ApiClient:
     """API client for EG4 hardware."""
 
     def __init__(
         self,
-        host: str = None,
-        port: int = None,
-        serial_port: str = None,
+        host: str | None = None,
+        port: int | None = None,
+        serial_port: str | None = None,
         baudrate: int = 9600,
-        serial_number: str = None,
-    ):
+        serial_number: str | None = None,
+        max_read_registers: int = DEFAULT_MAX_REGISTERS,
+        discovery: EG4Discovery | None = None,
+        on_discovered: Callable[[str], None] | None = None,
+    ) -> None:
+        """Initialize the client for a TCP host, serial port or serial number."""
         self.host = host
         self.port = port
         self.serial_port = serial_port
         self.baudrate = baudrate
         self.serial_number = serial_number
+        self.max_read_registers = max_read_registers
+        self.discovery = discovery or EG4Discovery()
+        self._on_discovered = on_discovered
+        # Only addresses found by discovery are looked up again on failure.
+        self._discovered_host = not host and not serial_port
+        self._reported_host = None
         self.client = None
+        self._connect_lock = asyncio.Lock()
+        self._failures = 0
+        self._next_attempt = 0.0
+        self.stats = LinkStats()
 
-    async def auto_discover_ip(self):
+    @property
+    def connection_type(self) -> str:
+        """Return the transport used to reach the hardware."""
+        return "RTU" if self.serial_port else "TCP"
+
+    @property
+    def link_key(self) -> tuple:
+        """Return a key identifying the physical link to the hardware."""
+        if self.serial_port:
+            return ("RTU", self.serial_port)
+        if self._discovered_host:
+            return ("TCP", self.serial_number)
+        return ("TCP", self.host, self.port or DEFAULT_PORT)
+
+    @property
+    def timing(self) -> BusTiming | None:
+        """Return the frame timing of the serial bus, or None on TCP."""
+        return BusTiming(self.baudrate) if self.serial_port else None
+
+    @property
+    def silent_interval(self) -> float:
+        """Return the quiet time the link needs between transactions."""
+        return self.timing.silent_interval if self.serial_port else 0.0
+
+    @property
+    def connected(self) -> bool:
+        """Return True while the Modbus link is open."""
+        return self.client is not None and self.client.connected
+
+    async def auto_discover_ip(self, max_age: float | None = None) -> str:
         """Auto-discover the IP address using mDNS."""
-        if self.serial_number:
-            try:
-                # Use mDNS to discover devices on the network
-                mdns_query = f"EG4-{self.serial_number}.local"
-                discovered_ip = socket.gethostbyname(mdns_query)
-                self.host = discovered_ip
-                return discovered_ip
-            except socket.error as e:
-                raise ConnectionError(f"Failed to auto-discover IP: {e}")
-        raise ValueError("Serial number is required for IP auto-discovery.")
-
-    async def connect(self):
-        """Establish connection to EG4 hardware."""
+        if not self.serial_number:
+            msg = "Serial number is required for IP auto-discovery."
+            raise ValueError(msg)
+        discovered_ip = await self.discovery.async_discover(self.serial_number, max_age)
+        self.host = discovered_ip
+        return discovered_ip
+
+    def _build_client(self) -> AsyncModbusSerialClient | AsyncModbusTcpClient:
+        """Create the pymodbus client for the configured transport."""
+        # Reconnects are driven by ensure_connected, not by pymodbus.
         if self.serial_port:
-            # Serial connection logic
-            self.client = AsyncModbusSerialClient(
-                method="rtu", port=self.serial_port, baudrate=self.baudrate
+            overhead = _FRAME_OVERHEAD["RTU"]
+            return AsyncModbusSerialClient(
+                port=self.serial_port,
+                framer=FramerType.RTU,
+                baudrate=self.baudrate,
+                reconnect_delay=0,
+                retries=REQUEST_RETRIES,
+                # A silent unit must not hold a shared bus for long: wait
+                # only as long as the largest read can take at this speed.
+                timeout=self.timing.response_timeout(
+                    overhead + 5, overhead + 2 + 2 * self.max_read_registers
+                ),
             )
-        elif self.host:
-            # TCP/IP connection logic
-            self.client = AsyncModbusTcpClient(host=self.host, port=self.port)
-        elif self.serial_number:
-            # Attempt IP auto-discovery
-            await self.auto_discover_ip()
-            self.client = AsyncModbusTcpClient(host=self.host, port=self.port)
-        else:
-            raise ValueError("Either host or serial_port must be provided.")
+        return AsyncModbusTcpClient(
+            host=self.host,
+            port=self.port or DEFAULT_PORT,
+            reconnect_delay=0,
+            retries=REQUEST_RETRIES,
+        )
 
-        try:
-            await self.client.connect()
-        except ConnectionError:
-            # Retry IP auto-discovery if connection fails
-            if self.serial_number:
+    async def connect(self) -> None:
+        """Establish connection to EG4 hardware."""
+        if not self.serial_port and not self.host:
+            if not self.serial_number:
+                msg = "Either host or serial_port must be provided."
+                raise ValueError(msg)
+            # Try the last known address before paying for a lookup.
+            self.host = self.discovery.cached(self.serial_number)
+            if not self.host:
                 await self.auto_discover_ip()
-                self.client = AsyncModbusTcpClient(host=self.host, port=self.port)
-                await self.client.connect()
-            else:
-                raise
 
-    async def read_data(self, address: int, count: int):
-        """Read data from EG4 hardware."""
-        if not self.client:
-            raise ConnectionError("Client is not connected.")
+        self.client = self._build_client()
+        if await self.client.connect():
+            self._host_connected()
+            return
+
+        self.client.close()
+        self.client = None
+        msg = "Unable to connect to EG4 hardware."
+        if not self._discovered_host:
+            raise ConnectionError(msg)
+
+        # The dongle may have a new address; look it up again unless the
+        # cached answer is recent.
+        failed_host = self.host
+        if await self.auto_discover_ip(REDISCOVER_MIN_AGE) == failed_host:
+            raise ConnectionError(msg)
+        self.client = self._build_client()
+        if not await self.client.connect():
+            self.client.close()
+            self.client = None
+            raise ConnectionError(msg)
+        self._host_connected()
+
+    def _host_connected(self) -> None:
+        """Report a newly working discovered address so it can be persisted."""
+        if (
+            self._discovered_host
+            and self._on_discovered is not None
+            and self.host != self._reported_host
+        ):
+            self._reported_host = self.host
+            self._on_discovered(self.host)
+
+    async def ensure_connected(self) -> None:
+        """
+        Reuse the open link, reconnecting lazily when it has dropped.
+
+        Failed attempts back off exponentially with jitter, so an unreachable
+        device is not hammered with a new handshake on every poll.
+        """
+        if self.connected:
+            return
+        async with self._connect_lock:
+            if self.connected:
+                return
+            if self.client is not None:
+                self.client.close()
+                self.client = None
+            if time.monotonic() < self._next_attempt:
+                msg = "Waiting to reconnect to EG4 hardware."
+                raise EG4ApiClientCommunicationError(msg)
+            if self._failures:
+                self.stats.retries += 1
+            start = time.perf_counter()
+            try:
+                await self.connect()
+            except (ConnectionError, OSError) as exception:
+                self.stats.errors += 1
+                delay = min(RECONNECT_MAX_DELAY, RECONNECT_DELAY * 2**self._failures)
+                self._failures += 1
+                # Jitter only spreads out reconnects; it needs no crypto RNG.
+                self._next_attempt = time.monotonic() + random.uniform(  # noqa: S311
+                    delay / 2, delay
+                )
+                msg = f"Error connecting to EG4 hardware: {exception}"
+                raise EG4ApiClientCommunicationError(msg) from exception
+            self._failures = 0
+            self._next_attempt = 0.0
+            self.stats.connects += 1
+            self.stats.connect_time += time.perf_counter() - start
 
-        response = await self.client.read_holding_registers(address, count)
+    async def _execute(
+        self,
+        action: str,
+        request: Callable[[], Awaitable[Any]],
+        request_size: int,
+        response_size: int,
+    ) -> Any:
+        """
+        Send one Modbus request and return its response.
+
+        The sizes are those of the request and response PDUs, used for the
+        link statistics.
+        """
+        await self.ensure_connected()
+
+        stats = self.stats
+        overhead = _FRAME_OVERHEAD[self.connection_type]
+        stats.requests += 1
+        stats.bytes_sent += overhead + request_size
+        try:
+            response = await request()
+        except ModbusException as exception:
+            stats.errors += 1
+            if isinstance(exception, ModbusIOException):
+                # Every resend went unanswered.
+                stats.timeouts += 1
+                stats.retries += REQUEST_RETRIES
+                stats.bytes_sent += (overhead + request_size) * REQUEST_RETRIES
+            # Drop the link so the next request reconnects, unless only one
+            # unit on a shared bus went quiet; the port itself is fine.
+            if not (self.serial_port and isinstance(exception, ModbusIOException)):
+                await self.close()
+            msg = f"Error {action}: {exception}"
+            raise EG4ApiClientCommunicationError(msg) from exception
+        if response.isError():
+            stats.errors += 1
+            stats.bytes_received += overhead + _EXCEPTION_SIZE
+            msg = f"Error {action}: {response}"
+            raise EG4ApiClientCommunicationError(msg)
+        stats.bytes_received += overhead + response_size
+        return response
+
+    async def read_data(
+        self,
+        address: int,
+        count: int,
+        register_type: RegisterType = RegisterType.HOLDING,
+        unit_id: int = 1,
+    ) -> list[int]:
+        """Read a block of registers from EG4 hardware."""
+        if register_type is RegisterType.INPUT:
+            method = "read_input_registers"
+        else:
+            method = "read_holding_registers"
+        response = await self._execute(
+            f"reading {count} registers at {address}",
+            lambda: getattr(self.client, method)(address, count=count, slave=unit_id),
+            5,
+            2 + 2 * count,
+        )
+        self.stats.registers += count
         return response.registers
 
-    async def close(self):
+    async def write_register(self, address: int, value: int, unit_id: int = 1) -> None:
+        """Write one holding register on EG4 hardware."""
+        await self._execute(
+            f"writing register {address}",
+            lambda: self.client.write_register(address, value, slave=unit_id),
+            5,
+            5,
+        )
+
+    async def write_registers(
+        self, address: int, values: Sequence[int], unit_id: int = 1
+    ) -> None:
+        """Write a block of adjacent holding registers on EG4 hardware."""
+        values = list(values)
+        await self._execute(
+            f"writing {len(values)} registers at {address}",
+            lambda: self.client.write_registers(address, values, slave=unit_id),
+            6 + 2 * len(values),
+            5,
+        )
+
+    async def close(self) -> None:
         """Close the connection."""
         if self.client:
-            await self.client.close()
+            self.client.close()
             self.client = None
@@ -13,6 +13,9 @@ from homeassistant.components.binary_sensor import (
 from .entity import EG4Entity
 
 if TYPE_CHECKING:
+    from homeassistant.core import HomeAssistant
+    from homeassistant.helpers.entity_platform import AddEntitiesCallback
+
     from .coordinator import EG4DataUpdateCoordinator
     from .data import EG4ConfigEntry
 
@@ -35,12 +38,13 @@ async def async_setup_entry(
     entry: EG4ConfigEntry,
     async_add_entities: AddEntitiesCallback,
 ) -> None:
-    """Set up the binary_sensor platform."""
-    coordinator: EG4DataUpdateCoordinator = hass.data[DOMAIN][entry.entry_id]
+    """Set up binary sensors for the values the device exposes."""
+    coordinator = entry.runtime_data.coordinator
 
     async_add_entities(
         EG4BinarySensor(coordinator, description)
         for description in ENTITY_DESCRIPTIONS
+        if description.key in coordinator.available_keys
     )
 
 
@@ -53,7 +57,7 @@ class EG4BinarySensor(EG4Entity, BinarySensorEntity):
         description: BinarySensorEntityDescription,
     ) -> None:
         """Initialize the binary sensor."""
-        super().__init__(coordinator)
+        super().__init__(coordinator, description.key)
         self.entity_description = description
         self._attr_unique_id = f"{coordinator.config_entry.entry_id}_{description.key}"
 
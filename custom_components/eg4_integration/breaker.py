@@ -0,0 +1,97 @@
+"""Circuit breakers that stop polling devices which do not answer."""
+
+from __future__ import annotations
+
+import time
+from enum import StrEnum
+
+from .api import EG4ApiClientCommunicationError
+from .const import LOGGER
+from .sources import PROBE_INTERVAL, PROBE_MAX_INTERVAL
+
+# Consecutive failed polls before a device is left alone. One failure may be
+# a glitch, and is retried on the next cycle.
+FAILURE_THRESHOLD = 2
+
+
+class BreakerState(StrEnum):
+    """Whether a device is polled."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class EG4CircuitOpenError(EG4ApiClientCommunicationError):
+    """Exception to indicate a device was not polled because its breaker is open."""
+
+
+class CircuitBreaker:
+    """
+    Track one device's failed polls and stop polling it while it is down.
+
+    Closed, the device is polled as usual. After ``threshold`` consecutive
+    failures the breaker opens and the device is not contacted at all until
+    the open window ends. Half open, a single cheap probe read decides: on
+    success the breaker closes and the device is polled on its usual
+    cadence again, on failure it reopens for twice as long, up to
+    ``max_interval``.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        threshold: int = FAILURE_THRESHOLD,
+        interval: float = PROBE_INTERVAL,
+        max_interval: float = PROBE_MAX_INTERVAL,
+    ) -> None:
+        """Initialize a closed breaker for the device called ``name``."""
+        self.name = name
+        self.threshold = threshold
+        self.interval = interval
+        self.max_interval = max_interval
+        self.failures = 0
+        self.retry_at = 0.0
+        self.trips = 0
+
+    def state_at(self, now: float) -> BreakerState:
+        """Return the state of the breaker at monotonic time ``now``."""
+        if self.failures < self.threshold:
+            return BreakerState.CLOSED
+        if now < self.retry_at:
+            return BreakerState.OPEN
+        return BreakerState.HALF_OPEN
+
+    @property
+    def state(self) -> BreakerState:
+        """Return the state of the breaker now."""
+        return self.state_at(time.monotonic())
+
+    def record_success(self) -> None:
+        """Record a successful poll or probe, closing the breaker."""
+        if self.failures >= self.threshold:
+            LOGGER.info("%s is answering again", self.name)
+        self.failures = 0
+        self.retry_at = 0.0
+
+    def record_failure(self, now: float) -> None:
+        """Record a failed poll or probe at ``now``, opening the breaker."""
+        self.failures += 1
+        if self.failures < self.threshold:
+            return
+        if self.failures == self.threshold:
+            # Logged once per outage rather than once per cycle.
+            LOGGER.warning("%s is not answering; polling it less often", self.name)
+            self.trips += 1
+        self.retry_at = now + min(
+            self.max_interval, self.interval * 2 ** (self.failures - self.threshold)
+        )
+
+    def as_dict(self, now: float) -> dict:
+        """Return the breaker's state at ``now`` in a JSON-friendly form."""
+        return {
+            "state": self.state_at(now),
+            "failures": self.failures,
+            "trips": self.trips,
+            "retry_in": max(0.0, round(self.retry_at - now, 1)),
+        }
@@ -0,0 +1,48 @@
+"""RS485 frame timing for Modbus RTU links."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+# Start bit, eight data bits, and parity or a second stop bit, plus stop bit.
+BITS_PER_CHAR = 11
+# Above 19200 baud the Modbus serial line spec fixes the inter-frame gap.
+FIXED_SILENT_INTERVAL = 0.00175
+FIXED_INTERVAL_BAUDRATE = 19200
+# Time an inverter takes to start answering once a request has arrived.
+TURNAROUND_TIME = 0.5
+
+
+@dataclass(frozen=True, slots=True)
+class BusTiming:
+    """Frame timing on an RS485 bus at ``baudrate``."""
+
+    baudrate: int
+
+    @property
+    def char_time(self) -> float:
+        """Return the seconds needed to send one character."""
+        return BITS_PER_CHAR / self.baudrate
+
+    @property
+    def silent_interval(self) -> float:
+        """Return the quiet time required between two frames."""
+        if self.baudrate > FIXED_INTERVAL_BAUDRATE:
+            return FIXED_SILENT_INTERVAL
+        return 3.5 * self.char_time
+
+    def frame_time(self, size: int) -> float:
+        """Return the seconds a frame of ``size`` bytes occupies the bus."""
+        return size * self.char_time
+
+    def transaction_time(self, request_size: int, response_size: int) -> float:
+        """Return the bus time of one request and its response, gaps included."""
+        return (
+            self.frame_time(request_size)
+            + self.frame_time(response_size)
+            + 2 * self.silent_interval
+        )
+
+    def response_timeout(self, request_size: int, response_size: int) -> float:
+        """Return how long to wait for a response before giving up on a unit."""
+        return self.transaction_time(request_size, response_size) + TURNAROUND_TIME
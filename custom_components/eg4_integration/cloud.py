@@ -0,0 +1,255 @@
+"""EG4 cloud monitor client for EG4 Integration."""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import time
+from dataclasses import dataclass
+from http import HTTPStatus
+from typing import TYPE_CHECKING, Any
+
+import aiohttp
+
+from .api import (
+    EG4ApiClientAuthenticationError,
+    EG4ApiClientCommunicationError,
+    EG4ApiClientError,
+)
+
+if TYPE_CHECKING:
+    from collections.abc import Mapping
+
+DEFAULT_CLOUD_URL = "https://monitor.eg4electronics.com"
+LOGIN_PATH = "/WManage/api/login"
+INVERTERS_PATH = "/WManage/api/inverterOverview/list"
+CLOUD_TIMEOUT = 10.0
+# Inverters fetched per request; one page covers any real account.
+CLOUD_PAGE_SIZE = 200
+# Sustained requests per second, and the burst allowed on top.
+CLOUD_RATE = 0.5
+CLOUD_BURST = 5
+# Longest the server's rate-limit headers may hold requests back, in seconds.
+CLOUD_MAX_PAUSE = 600.0
+# Rate-limit reset values above this are Unix times rather than delays.
+EPOCH_THRESHOLD = 1_000_000_000
+
+# Fields of an inverter overview row and the data keys they feed.
+CLOUD_FIELDS = {
+    "soc": "charge_level",
+    "ppv": "inverter_performance",
+}
+
+
+class EG4CloudRateLimitError(EG4ApiClientCommunicationError):
+    """Exception to indicate the cloud asked us to slow down."""
+
+
+class TokenBucket:
+    """
+    Pace requests to ``rate`` per second with bursts of up to ``capacity``.
+
+    The server's own rate-limit headers can empty the bucket until a given
+    time, after which it refills as usual.
+    """
+
+    def __init__(self, rate: float = CLOUD_RATE, capacity: float = CLOUD_BURST) -> None:
+        """Initialize a full bucket."""
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float) -> None:
+        """Add the tokens earned since the last update."""
+        if now > self._updated:
+            self._tokens = min(
+                self.capacity, self._tokens + (now - self._updated) * self.rate
+            )
+            self._updated = now
+
+    def delay(self) -> float:
+        """Return how long the next request would have to wait."""
+        now = time.monotonic()
+        self._refill(now)
+        return max(0.0, self._updated - now) + max(0.0, 1 - self._tokens) / self.rate
+
+    async def acquire(self) -> None:
+        """Wait for a token and take it."""
+        async with self._lock:
+            if (delay := self.delay()) > 0:
+                await asyncio.sleep(delay)
+                self._refill(time.monotonic())
+            self._tokens -= 1
+
+    def pause(self, seconds: float) -> None:
+        """Hold every request back for ``seconds``, then allow one."""
+        self._tokens = 1
+        self._updated = max(self._updated, time.monotonic() + seconds)
+
+
+@dataclass(slots=True)
+class _Cached:
+    """The last full response of a conditional request."""
+
+    etag: str | None
+    last_modified: str | None
+    payload: Any
+
+
+class EG4CloudClient:
+    """
+    Client for the EG4 cloud monitor.
+
+    Logs in once and keeps the session cookie, logging in again only when
+    the server rejects it. All inverters on the account are fetched with one
+    request, conditional on the last response's validators, and concurrent
+    callers share the request in flight.
+    """
+
+    def __init__(
+        self,
+        username: str,
+        password: str,
+        session: aiohttp.ClientSession,
+        base_url: str = DEFAULT_CLOUD_URL,
+        bucket: TokenBucket | None = None,
+    ) -> None:
+        """Initialize the client."""
+        self.username = username
+        self.password = password
+        self._session = session
+        self.base_url = base_url.rstrip("/")
+        self.bucket = bucket or TokenBucket()
+        self.requests = 0
+        self.not_modified = 0
+        self._logged_in = False
+        self._login_lock = asyncio.Lock()
+        self._cache: dict[str, _Cached] = {}
+        self._inflight: asyncio.Task[dict[str, dict]] | None = None
+
+    async def async_login(self) -> None:
+        """Log in and keep the session cookie."""
+        async with self._login_lock:
+            payload = await self._request(
+                LOGIN_PATH, {"account": self.username, "password": self.password}
+            )
+            if not payload.get("success"):
+                self._logged_in = False
+                msg = payload.get("msg") or "Invalid credentials"
+                raise EG4ApiClientAuthenticationError(msg)
+            self._logged_in = True
+
+    async def async_get_inverters(self) -> dict[str, dict]:
+        """Return the data of every inverter on the account by serial number."""
+        if self._inflight is None:
+            self._inflight = asyncio.create_task(self._async_fetch_inverters())
+            self._inflight.add_done_callback(self._clear_inflight)
+        # Callers sharing the request must not cancel it for each other.
+        return await asyncio.shield(self._inflight)
+
+    def _clear_inflight(self, _task: asyncio.Task) -> None:
+        """Let the next call start a new request."""
+        self._inflight = None
+
+    async def _async_fetch_inverters(self) -> dict[str, dict]:
+        """Fetch the inverter overview, logging in first when needed."""
+        payload = await self._authenticated(
+            INVERTERS_PATH, {"page": 1, "rows": CLOUD_PAGE_SIZE}
+        )
+        return {
+            row["serialNum"]: {
+                key: row[field] for field, key in CLOUD_FIELDS.items() if field in row
+            }
+            for row in payload.get("rows", ())
+        }
+
+    async def _authenticated(self, path: str, data: Mapping[str, Any]) -> Any:
+        """Make a request that needs the session, renewing it once if rejected."""
+        if not self._logged_in:
+            await self.async_login()
+        try:
+            return await self._request(path, data, conditional=True)
+        except EG4ApiClientAuthenticationError:
+            self._logged_in = False
+        await self.async_login()
+        return await self._request(path, data, conditional=True)
+
+    async def _request(
+        self, path: str, data: Mapping[str, Any], *, conditional: bool = False
+    ) -> Any:
+        """POST ``data`` to ``path`` and return the decoded JSON response."""
+        headers = {}
+        cached = self._cache.get(path) if conditional else None
+        if cached is not None:
+            if cached.etag:
+                headers["If-None-Match"] = cached.etag
+            if cached.last_modified:
+                headers["If-Modified-Since"] = cached.last_modified
+
+        await self.bucket.acquire()
+        self.requests += 1
+        try:
+            async with (
+                asyncio.timeout(CLOUD_TIMEOUT),
+                self._session.post(
+                    f"{self.base_url}{path}",
+                    data=dict(data),
+                    headers=headers,
+                    allow_redirects=False,
+                ) as response,
+            ):
+                self._apply_rate_limit(response)
+                if response.status == HTTPStatus.NOT_MODIFIED and cached is not None:
+                    self.not_modified += 1
+                    return cached.payload
+                if response.status in (
+                    HTTPStatus.UNAUTHORIZED,
+                    HTTPStatus.FORBIDDEN,
+                ) or (response.status == HTTPStatus.FOUND and path != LOGIN_PATH):
+                    msg = "Session rejected"
+                    raise EG4ApiClientAuthenticationError(msg)
+                if response.status == HTTPStatus.TOO_MANY_REQUESTS:
+                    msg = "Rate limited by the EG4 cloud"
+                    raise EG4CloudRateLimitError(msg)
+                response.raise_for_status()
+                payload = await response.json(content_type=None)
+                if conditional and (
+                    response.headers.get("ETag")
+                    or response.headers.get("Last-Modified")
+                ):
+                    self._cache[path] = _Cached(
+                        response.headers.get("ETag"),
+                        response.headers.get("Last-Modified"),
+                        payload,
+                    )
+                return payload
+        except EG4ApiClientError:
+            raise
+        except TimeoutError as exception:
+            msg = f"Timeout talking to the EG4 cloud: {exception}"
+            raise EG4ApiClientCommunicationError(msg) from exception
+        except (aiohttp.ClientError, ValueError) as exception:
+            msg = f"Error talking to the EG4 cloud: {exception}"
+            raise EG4ApiClientCommunicationError(msg) from exception
+
+    def _apply_rate_limit(self, response: aiohttp.ClientResponse) -> None:
+        """
+        Follow the server's rate-limit headers.
+
+        ``X-RateLimit-Reset`` is a delay from some servers and the Unix time
+        of the reset from others. Either way the pause is capped, so a bad
+        header cannot stop the cloud for good.
+        """
+        headers = response.headers
+        pause = None
+        with contextlib.suppress(ValueError):
+            if response.status in (429, 503):
+                pause = float(headers.get("Retry-After", 1 / self.bucket.rate))
+            elif headers.get("X-RateLimit-Remaining") == "0":
+                pause = float(headers.get("X-RateLimit-Reset", 1 / self.bucket.rate))
+                if pause > EPOCH_THRESHOLD:
+                    pause -= time.time()
+        if pause is not None:
+            self.bucket.pause(min(max(pause, 0.0), CLOUD_MAX_PAUSE))
@@ -0,0 +1,217 @@
+"""Prioritised access to a Modbus link and batched register writes."""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import heapq
+import itertools
+from enum import IntEnum
+from typing import TYPE_CHECKING
+
+from .registers import RegisterType
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncIterator, Sequence
+
+    from .api import EG4ApiClient
+
+# A write multiple registers request carries at most 123 registers.
+MAX_WRITE_REGISTERS = 123
+
+
+class CommandPriority(IntEnum):
+    """Order in which waiting transactions get the link; lower goes first."""
+
+    WRITE = 0
+    POLL = 1
+
+
+class LinkQueue:
+    """
+    Hand out turns on one Modbus link.
+
+    At most ``capacity`` transactions run at once. Waiting transactions are
+    served by priority, so a write overtakes queued poll reads, and in
+    arrival order within a priority. Devices sharing the link queue again
+    after each block read, so they take turns round-robin.
+
+    With an ``interval``, each transaction starts at least that long after
+    the previous one ended: the silent interval of an RS485 bus.
+    """
+
+    def __init__(self, capacity: int = 1, interval: float = 0.0) -> None:
+        """Initialize an idle queue."""
+        self._capacity = capacity
+        self._interval = interval
+        self._quiet_until = 0.0
+        self._active = 0
+        self._waiters: list[tuple[int, int, asyncio.Future[None]]] = []
+        self._order = itertools.count()
+
+    @property
+    def pending(self) -> int:
+        """Return the number of transactions waiting for a turn."""
+        return sum(not future.done() for *_, future in self._waiters)
+
+    @contextlib.asynccontextmanager
+    async def slot(
+        self, priority: CommandPriority = CommandPriority.POLL
+    ) -> AsyncIterator[None]:
+        """Hold a turn on the link for the duration of the block."""
+        if self._active < self._capacity and not self.pending:
+            self._active += 1
+        else:
+            future = asyncio.get_running_loop().create_future()
+            heapq.heappush(self._waiters, (priority, next(self._order), future))
+            try:
+                await future
+            except asyncio.CancelledError:
+                # Cancelled after being handed the turn: pass it on.
+                if future.done() and not future.cancelled():
+                    self._release()
+                raise
+        loop = asyncio.get_running_loop()
+        try:
+            if self._interval and (wait := self._quiet_until - loop.time()) > 0:
+                await asyncio.sleep(wait)
+            yield
+        finally:
+            if self._interval:
+                self._quiet_until = loop.time() + self._interval
+            self._release()
+
+    async def async_gap(self) -> None:
+        """Wait out the interval between two transactions made in one turn."""
+        if self._interval:
+            await asyncio.sleep(self._interval)
+
+    def _release(self) -> None:
+        """Give the turn to the next live waiter, or free it."""
+        while self._waiters:
+            *_, future = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_result(None)
+                return
+        self._active -= 1
+
+
+class RegisterWriter:
+    """
+    Coalesce and batch holding register writes to one Modbus unit.
+
+    Writes are collected until the link is free. Later writes to a register
+    replace earlier ones that have not been sent yet, and adjacent registers
+    go out in one write multiple registers request. Every written block is
+    then read back once.
+
+    Writes of some bits of a register are merged with the register as it
+    reads just before the batch is sent, so the bits not written keep their
+    values.
+    """
+
+    def __init__(
+        self,
+        client: EG4ApiClient,
+        queue: LinkQueue,
+        unit_id: int = 1,
+        max_registers: int = MAX_WRITE_REGISTERS,
+    ) -> None:
+        """Initialize the writer."""
+        self.client = client
+        self.queue = queue
+        self.unit_id = unit_id
+        self.max_registers = min(max_registers, MAX_WRITE_REGISTERS)
+        self._pending: dict[int, int] = {}
+        # Bits to change in registers not written whole: mask and new bits.
+        self._masked: dict[int, tuple[int, int]] = {}
+        self._next_flush: asyncio.Task[dict[int, int]] | None = None
+        self._last_flush: asyncio.Task[dict[int, int]] | None = None
+
+    async def async_write(self, address: int, words: Sequence[int]) -> dict[int, int]:
+        """
+        Write ``words`` starting at ``address``.
+
+        Return the words read back after the batch holding this write, by
+        address.
+        """
+        for offset, word in enumerate(words):
+            self._pending[address + offset] = word
+            self._masked.pop(address + offset, None)
+        return await self._async_join_batch()
+
+    async def async_write_bits(
+        self, address: int, mask: int, bits: int
+    ) -> dict[int, int]:
+        """
+        Write the bits of ``mask`` at ``address`` from ``bits``, keeping the rest.
+
+        Return the words read back after the batch holding this write, by
+        address.
+        """
+        if address in self._pending:
+            word = self._pending[address]
+            self._pending[address] = (word & ~mask) | (bits & mask)
+        else:
+            pending_mask, pending_bits = self._masked.get(address, (0, 0))
+            self._masked[address] = (
+                pending_mask | mask,
+                (pending_bits & ~mask) | (bits & mask),
+            )
+        return await self._async_join_batch()
+
+    async def _async_join_batch(self) -> dict[int, int]:
+        """Wait for the next batch to be sent, starting one if needed."""
+        if self._next_flush is None:
+            self._next_flush = asyncio.create_task(self._async_flush(self._last_flush))
+            self._last_flush = self._next_flush
+        # Callers sharing a batch must not cancel it for each other.
+        return await asyncio.shield(self._next_flush)
+
+    async def _async_flush(
+        self, previous: asyncio.Task[dict[int, int]] | None
+    ) -> dict[int, int]:
+        """Send the pending writes once the link is ours."""
+        if previous is not None:
+            # Keep batches in order; the earlier batch reports its own errors.
+            with contextlib.suppress(Exception):
+                await previous
+        async with self.queue.slot(CommandPriority.WRITE):
+            self._next_flush = None
+            pending, self._pending = self._pending, {}
+            masked, self._masked = self._masked, {}
+            for index, (address, (mask, bits)) in enumerate(sorted(masked.items())):
+                if index:
+                    await self.queue.async_gap()
+                (word,) = await self.client.read_data(
+                    address, 1, RegisterType.HOLDING, self.unit_id
+                )
+                pending[address] = (word & ~mask) | bits
+            confirmed: dict[int, int] = {}
+            for index, (address, words) in enumerate(self._runs(pending)):
+                if index or masked:
+                    await self.queue.async_gap()
+                if len(words) == 1:
+                    await self.client.write_register(address, words[0], self.unit_id)
+                else:
+                    await self.client.write_registers(address, words, self.unit_id)
+                await self.queue.async_gap()
+                read_back = await self.client.read_data(
+                    address, len(words), RegisterType.HOLDING, self.unit_id
+                )
+                confirmed.update(
+                    zip(range(address, address + len(words)), read_back, strict=True)
+                )
+        return confirmed
+
+    def _runs(self, pending: dict[int, int]) -> list[tuple[int, list[int]]]:
+        """Split pending writes into runs of adjacent registers."""
+        runs: list[tuple[int, list[int]]] = []
+        for address in sorted(pending):
+            if runs:
+                start, words = runs[-1]
+                if start + len(words) == address and len(words) < self.max_registers:
+                    words.append(pending[address])
+                    continue
+            runs.append((address, [pending[address]]))
+        return runs
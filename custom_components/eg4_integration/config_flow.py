@@ -2,19 +2,25 @@
 
 from __future__ import annotations
 
+from typing import Any
+
 import voluptuous as vol
 from homeassistant import config_entries
-from homeassistant.helpers import selector
+from homeassistant.components import network, zeroconf
+from homeassistant.const import CONF_PASSWORD, CONF_USERNAME
+from homeassistant.core import callback
 from homeassistant.helpers.aiohttp_client import async_create_clientsession
-from slugify import slugify
+from homeassistant.helpers.selector import selector
 
 from .api import (
-    EG4ApiClient,
+    DEFAULT_PORT,
     EG4ApiClientAuthenticationError,
     EG4ApiClientCommunicationError,
-    EG4ApiClientError,
 )
-from .const import DOMAIN, LOGGER
+from .cloud import EG4CloudClient
+from .const import CONF_LAST_KNOWN_IP, CONF_SYSTEM_ID, DOMAIN, LOGGER
+from .discovery import EG4Discovery, zeroconf_resolver
+from .probe import DongleIdentity, async_probe_host, async_scan, subnet_hosts
 
 
 class EG4FlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
@@ -22,16 +28,66 @@ class EG4FlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
 
     VERSION = 1
 
+    def __init__(self) -> None:
+        """Initialize the flow."""
+        # Devices found on the local network, by serial number.
+        self._discovered: dict[str, DongleIdentity] | None = None
+
+    @staticmethod
+    @callback
+    def async_get_options_flow(
+        config_entry: config_entries.ConfigEntry,  # noqa: ARG004
+    ) -> EG4OptionsFlow:
+        """Return the options flow of an entry."""
+        return EG4OptionsFlow()
+
     async def async_step_user(
         self,
         user_input: dict[str, any] | None = None,
     ) -> config_entries.ConfigFlowResult:
-        """Handle a flow initialized by the user."""
+        """
+        Handle a flow initialized by the user.
+
+        The local network is scanned first, and the form is pre-filled from
+        the first device that answers. The submitted serial number must
+        answer locally, unless cloud credentials are given to fall back on.
+        """
         errors: dict[str, str] = {}
         if user_input is not None:
-            return self.async_create_entry(
-                title="EG4 Integration", data=user_input
+            serial = user_input["inverter_serial_number"]
+            await self.async_set_unique_id(serial)
+            self._abort_if_unique_id_configured()
+            identity = (self._discovered or {}).get(serial) or (
+                await self._async_probe_serial(serial)
+            )
+            # Cloud credentials are optional; the cloud is only a fallback.
+            cloud = bool(
+                user_input.get(CONF_USERNAME) and user_input.get(CONF_PASSWORD)
             )
+            if cloud:
+                try:
+                    await self._test_credentials(
+                        user_input[CONF_USERNAME], user_input[CONF_PASSWORD]
+                    )
+                except EG4ApiClientAuthenticationError as exception:
+                    LOGGER.warning(exception)
+                    errors["base"] = "auth"
+                except EG4ApiClientCommunicationError as exception:
+                    LOGGER.error(exception)
+                    errors["base"] = "connection"
+            elif identity is None:
+                errors["base"] = "connection"
+            if not errors:
+                data = dict(user_input)
+                if identity is not None:
+                    # The first connection skips discovery.
+                    data[CONF_LAST_KNOWN_IP] = identity.host
+                return self.async_create_entry(title="EG4 Integration", data=data)
+        elif self._discovered is None:
+            self._discovered = {
+                identity.serial_number: identity
+                for identity in await self._async_scan()
+            }
 
         data_schema = vol.Schema(
             {
@@ -46,12 +102,20 @@ class EG4FlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
                 vol.Required("polling_interval", default=10): vol.All(
                     vol.Coerce(int), vol.Range(min=1)
                 ),
+                vol.Optional(CONF_USERNAME): selector({"text": {"multiline": False}}),
+                vol.Optional(CONF_PASSWORD): selector({"text": {"type": "password"}}),
             }
         )
+        suggested = dict(user_input or {})
+        if not suggested and self._discovered:
+            found = next(iter(self._discovered.values()))
+            suggested["inverter_serial_number"] = found.serial_number
+            if found.model is not None:
+                suggested["inverter_model"] = found.model
 
         return self.async_show_form(
             step_id="user",
-            data_schema=data_schema,
+            data_schema=self.add_suggested_values_to_schema(data_schema, suggested),
             errors=errors,
             description_placeholders={
                 "description": (
@@ -60,14 +124,43 @@ class EG4FlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
             },
         )
 
+    async def _async_scan(self) -> list[DongleIdentity]:
+        """Probe the local subnet for EG4 devices."""
+        source_ip = await network.async_get_source_ip(self.hass)
+        if not source_ip:
+            return []
+        found = await async_scan(subnet_hosts(source_ip))
+        LOGGER.debug("Found %s on the local network", found)
+        return found
+
+    async def _async_probe_serial(self, serial: str) -> DongleIdentity | None:
+        """Look up the dongle of ``serial`` by name and check it answers."""
+        discovery = EG4Discovery(
+            zeroconf_resolver(await zeroconf.async_get_async_instance(self.hass))
+        )
+        try:
+            host = await discovery.async_discover(serial)
+        except ConnectionError:
+            return None
+        identity = await async_probe_host(host, DEFAULT_PORT)
+        if identity is None or identity.serial_number != serial:
+            return None
+        return identity
+
     async def _test_credentials(self, username: str, password: str) -> None:
         """Validate credentials."""
-        client = EG4ApiClient(
-            username=username,
-            password=password,
-            session=async_create_clientsession(self.hass),
-        )
-        await client.async_get_data()
+        # A session of its own, so the login cookie does not leak into the
+        # session shared by other integrations.
+        session = async_create_clientsession(self.hass, auto_cleanup=False)
+        try:
+            client = EG4CloudClient(
+                username=username,
+                password=password,
+                session=session,
+            )
+            await client.async_login()
+        finally:
+            await session.close()
 
     async def async_step_setup(self, user_input=None):
         errors = {}
@@ -99,3 +192,23 @@ class EG4FlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
                 "description": "Configure your EG4 Integration. For help, visit: https://github.com/n2aws/hacs-eg4-integration"
             }
         )
+
+
+class EG4OptionsFlow(config_entries.OptionsFlow):
+    """Options flow for EG4 Integration."""
+
+    async def async_step_init(
+        self, user_input: dict[str, Any] | None = None
+    ) -> config_entries.ConfigFlowResult:
+        """Set the system the inverter is paralleled in."""
+        if user_input is not None:
+            return self.async_create_entry(data=user_input)
+        data_schema = vol.Schema(
+            {vol.Optional(CONF_SYSTEM_ID): selector({"text": {"multiline": False}})}
+        )
+        return self.async_show_form(
+            step_id="init",
+            data_schema=self.add_suggested_values_to_schema(
+                data_schema, self.config_entry.options
+            ),
+        )
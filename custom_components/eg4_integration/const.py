@@ -1,4 +1,23 @@
 """Constants for EG4 Integration."""
 
+from logging import Logger, getLogger
+
+LOGGER: Logger = getLogger(__package__)
+
 DOMAIN = "eg4_integration"
 ATTRIBUTION = "Data provided by EG4 Electronics"
+
+CONF_LAST_KNOWN_IP = "last_known_ip"
+CONF_GRIDBOSS_LAST_KNOWN_IP = "gridboss_last_known_ip"
+CONF_UNIT_ID = "unit_id"
+CONF_BAUDRATE = "baudrate"
+CONF_PUSH = "push"
+# Entries with the same system ID are paralleled and summed into one system.
+CONF_SYSTEM_ID = "system_id"
+
+ATTR_STALE = "stale"
+ATTR_LAST_READ = "last_read"
+
+DEFAULT_BAUDRATE = 9600
+
+DEFAULT_GRIDBOSS_UNIT_ID = 2
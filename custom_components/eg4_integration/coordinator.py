@@ -2,34 +2,66 @@
 
 from __future__ import annotations
 
-from typing import TYPE_CHECKING, Any
-from datetime import timedelta
 import asyncio
+import time
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import TYPE_CHECKING, Any
 
+from homeassistant.core import CALLBACK_TYPE, callback
 from homeassistant.exceptions import ConfigEntryAuthFailed
+from homeassistant.helpers.storage import Store
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+from homeassistant.util import dt as dt_util
 
 from .api import (
+    EG4ApiClient,
     EG4ApiClientAuthenticationError,
     EG4ApiClientError,
-    EG4ApiClient,
+)
+from .breaker import EG4CircuitOpenError
+from .commands import RegisterWriter
+from .const import DOMAIN, LOGGER
+from .energy import EnergyAccumulator, HourlySums
+from .history import SampleHistory
+from .metrics import CycleTrace, LinkStats, PollMetrics
+from .models import DEFAULT_MAP, GRIDBOSS_MAP, load_register_map
+from .planner import DEFAULT_MAX_GAP
+from .polling import DEFAULT_UNIT_ID, LinkLimiter, PolledDevice, async_poll_devices
+from .registers import RegisterType, compile_decoder, encode_value
+from .scheduler import PollScheduler
+from .sources import (
+    SOURCE_CLOUD,
+    SOURCE_LOCAL,
+    SOURCE_PUSH,
+    SourceArbiter,
+    ValueSource,
 )
 
 if TYPE_CHECKING:
-    from .data import EG4ConfigEntry
+    from collections.abc import Callable
+    from datetime import datetime
 
+    from homeassistant.core import HomeAssistant
 
-MODBUS_MAP = {
-    "battery_status": 100,
-    "charge_level": 101,
-    "inverter_performance": 102,
-    "alert_status": 200,
-}
+    from .cloud import EG4CloudClient
+    from .data import EG4ConfigEntry
+    from .scheduler import RegisterMap
+    from .statistics import StatisticsImporter
 
-MODBUS_MAP_GRIDBOSS = {
-    "gridboss_status": 300,
-    "gridboss_alert": 301,
-}
+
+ENERGY_STORE_VERSION = 1
+# Energy totals are saved at most this often; a restart loses less.
+ENERGY_SAVE_DELAY = 60
+# A value goes unavailable once this many of its read intervals have passed
+# without a fresh read, and is shown as stale after one missed read.
+STALE_CYCLES = 3
+# Share of the polling interval a cycle may spend reading, so that a slow
+# cycle does not push the next one back.
+CYCLE_BUDGET = 0.8
+SNAPSHOT_STORE_VERSION = 1
+# The last values read, shown at the next startup, are saved at most this often.
+SNAPSHOT_SAVE_DELAY = 60
 
 
 # https://developers.home-assistant.io/docs/integration_fetching_data#coordinated-single-api-poll-for-data-for-all-entities
@@ -59,38 +91,591 @@ class EG4IntegrationDataUpdateCoordinator(DataUpdateCoordinator):
             raise UpdateFailed(f"Error fetching data: {error}") from error
 
 
+@dataclass(slots=True)
+class UpdateStats:
+    """Entity state writes done and skipped by change-only dispatch."""
+
+    writes: int = 0
+    writes_avoided: int = 0
+    last_writes: int = 0
+    last_writes_avoided: int = 0
+
+
+@dataclass(frozen=True, slots=True)
+class CoordinatorOptions:
+    """Optional collaborators and per-device settings of a coordinator."""
+
+    max_gap: int = DEFAULT_MAX_GAP
+    unit_id: int = DEFAULT_UNIT_ID
+    gridboss_client: EG4ApiClient | None = None
+    gridboss_unit_id: int = DEFAULT_UNIT_ID
+    cloud_client: EG4CloudClient | None = None
+    statistics: StatisticsImporter | None = None
+    register_map: RegisterMap | None = None
+    gridboss_register_map: RegisterMap | None = None
+
+
 class EG4DataUpdateCoordinator(DataUpdateCoordinator):
     """Class to manage fetching data from the EG4 hardware."""
 
-    def __init__(self, hass, api_client, polling_interval):
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        api_client: EG4ApiClient,
+        polling_interval: float,
+        config_entry: EG4ConfigEntry | None = None,
+        *,
+        options: CoordinatorOptions | None = None,
+    ) -> None:
+        """Initialize the coordinator for the devices behind ``api_client``."""
+        options = options or CoordinatorOptions()
+        cloud_client = options.cloud_client
+        self.polling_interval = max(
+            polling_interval, 5 if api_client.connection_type == "TCP" else 1
+        )
         super().__init__(
             hass,
             LOGGER,
+            config_entry=config_entry,
             name="EG4 Integration",
-            update_interval=timedelta(seconds=polling_interval),
+            # Each cycle reads only the register groups whose tier is due.
+            update_interval=timedelta(seconds=self.polling_interval),
         )
         self.api_client = api_client
-        self.polling_interval = max(polling_interval, 5 if api_client.connection_type == "TCP" else 1)
+        self.cloud_client = cloud_client
+        self.arbiter = SourceArbiter(
+            (SOURCE_LOCAL, SOURCE_CLOUD) if cloud_client else (SOURCE_LOCAL,)
+        )
+        # Where each value last came from, and when.
+        self.value_sources: dict[str, ValueSource] = {}
+        self.energy = EnergyAccumulator()
+        self.energy_hours = HourlySums()
+        # Every sample is kept here; entities only publish significant changes.
+        self.history = SampleHistory()
+        self.statistics = options.statistics
+        self._energy_store: Store | None = None
+        self._snapshot_store: Store | None = None
+        if self.config_entry is not None:
+            self._energy_store = Store(
+                hass,
+                ENERGY_STORE_VERSION,
+                f"{DOMAIN}.{self.config_entry.entry_id}.energy",
+            )
+            self._snapshot_store = Store(
+                hass,
+                SNAPSHOT_STORE_VERSION,
+                f"{DOMAIN}.{self.config_entry.entry_id}.snapshot",
+            )
+        # Values restored from the last run and not read again since.
+        self.stale_keys: set[str] = set()
+        self._published_stale: frozenset[str] = frozenset()
+        self.changed_keys: frozenset[str] = frozenset()
+        self.update_stats = UpdateStats()
+        self.metrics = PollMetrics()
+        # Written values shown until the device has confirmed them.
+        self._optimistic: dict = {}
+        self._published: dict | None = None
+        self._published_success = True
+        self.link_limiter = hass.data.setdefault(DOMAIN, {}).setdefault(
+            "link_limiter", LinkLimiter()
+        )
+        self.devices = [
+            PolledDevice(
+                "inverter",
+                api_client,
+                PollScheduler(
+                    options.register_map or load_register_map(DEFAULT_MAP),
+                    self.polling_interval,
+                    max_registers=api_client.max_read_registers,
+                    max_gap=options.max_gap,
+                ),
+                options.unit_id,
+            )
+        ]
+        if self.config_entry and self.config_entry.data.get("gridboss_serial_number"):
+            gridboss_client = options.gridboss_client
+            gridboss_unit_id = options.gridboss_unit_id
+            if gridboss_client is None:
+                # Same link as the inverter, addressed by its own unit ID.
+                gridboss_client = api_client
+            else:
+                gridboss_unit_id = DEFAULT_UNIT_ID
+            self.devices.append(
+                PolledDevice(
+                    "gridboss",
+                    gridboss_client,
+                    PollScheduler(
+                        options.gridboss_register_map
+                        or load_register_map(GRIDBOSS_MAP),
+                        self.polling_interval,
+                        max_registers=gridboss_client.max_read_registers,
+                        max_gap=options.max_gap,
+                    ),
+                    gridboss_unit_id,
+                )
+            )
+        registers = {
+            key
+            for device in self.devices
+            for key in device.scheduler.register_map.registers
+        }
+        # What the model and attached hardware can show: the registers in
+        # their maps and the energy totals integrated from them.
+        self.available_keys = frozenset(
+            registers
+            | {
+                channel.key
+                for channel in self.energy.channels
+                if channel.power_key in registers
+            }
+        )
+        # How often each register value is read, in seconds.
+        self._read_intervals = {
+            register.key: device.scheduler.intervals[name]
+            for device in self.devices
+            for name, group in device.scheduler.groups.items()
+            for register in group.registers
+        }
+        # Values that missed a read, and those too old to show at all.
+        self.late_keys: frozenset[str] = frozenset()
+        self.expired_keys: frozenset[str] = frozenset()
+        self._restored_at: datetime | None = None
+        # Set when entities come or go; every group is read until the first.
+        self._listeners_changed = False
+        self._writers: dict[str, RegisterWriter] = {}
+
+    async def _async_setup(self) -> None:
+        """Restore the energy totals saved by the last run."""
+        if self._energy_store is not None and (
+            saved := await self._energy_store.async_load()
+        ):
+            self.energy.restore(saved.get("totals", {}), saved.get("marks"))
+            if hour := saved.get("hour"):
+                self.energy_hours.last = (hour[0], hour[1])
+
+    async def async_restore_snapshot(self) -> bool:
+        """
+        Show the values saved by the last run until live ones arrive.
+
+        This does the setup a first refresh would otherwise do. The restored
+        values are marked stale. Return False if nothing was saved.
+        """
+        if self._snapshot_store is None or not (
+            (saved := await self._snapshot_store.async_load()) and saved.get("values")
+        ):
+            return False
+        await self._async_setup()
+        for key, (source, updated) in saved.get("sources", {}).items():
+            if (timestamp := dt_util.parse_datetime(updated)) is not None:
+                self.value_sources[key] = ValueSource(source, timestamp)
+        self.stale_keys = set(saved["values"])
+        self._restored_at = dt_util.utcnow()
+        self.async_set_updated_data(saved["values"])
+        return True
+
+    async def async_shutdown(self) -> None:
+        """Save the energy totals and snapshot now, not after the usual delay."""
+        await super().async_shutdown()
+        if self._energy_store is not None:
+            await self._energy_store.async_save(self._energy_data())
+        if self._snapshot_store is not None and self.data:
+            await self._snapshot_store.async_save(self._snapshot_data())
+
+    def _snapshot_data(self) -> dict:
+        """Return what the snapshot store keeps: values and where they came from."""
+        return {
+            "values": self.data or {},
+            "sources": {
+                key: [stamp.source, stamp.updated.isoformat()]
+                for key, stamp in self.value_sources.items()
+            },
+        }
+
+    def _energy_data(self) -> dict:
+        """Return what the energy store keeps."""
+        data = self.energy.as_dict()
+        if self.energy_hours.last is not None:
+            data["hour"] = list(self.energy_hours.last)
+        return data
+
+    def _accumulate(self, values: dict, timestamp: float) -> dict:
+        """
+        Integrate the power values just read and return the new totals.
+
+        Energy missed during a gap is recovered from the day counters, and
+        every hour closed since the last update goes to long-term
+        statistics in one batch.
+        """
+        totals = self.energy.add(values, timestamp)
+        if backfilled := self.energy.reconcile(
+            values, dt_util.now().date().isoformat()
+        ):
+            LOGGER.debug("Recovered energy missed during a gap: %s", backfilled)
+            totals.update(backfilled)
+        if totals:
+            rows = self.energy_hours.update(time.time(), self.energy.totals)
+            if rows and self.statistics is not None:
+                self.config_entry.async_create_background_task(
+                    self.hass,
+                    self.statistics.async_import_sums(rows),
+                    "eg4_integration energy statistics",
+                )
+            if self._energy_store is not None:
+                self._energy_store.async_delay_save(
+                    self._energy_data, ENERGY_SAVE_DELAY
+                )
+        return totals
+
+    def _record_history(self, values: dict) -> None:
+        """Keep the raw samples just read and import any hour they completed."""
+        self.history.add(values, time.time())
+        if self.statistics is not None and (hourly := self.history.pop_hourly()):
+            self.statistics.async_import(hourly)
+
+    @property
+    def clients(self) -> list[EG4ApiClient]:
+        """Return every distinct client used by the polled devices."""
+        return list(
+            {id(device.client): device.client for device in self.devices}.values()
+        )
+
+    @callback
+    def async_add_listener(
+        self, update_callback: CALLBACK_TYPE, context: Any = None
+    ) -> Callable[[], None]:
+        """Listen for updates, and poll only what enabled entities show."""
+        remove_listener = super().async_add_listener(update_callback, context)
+        self._listeners_changed = True
 
-    async def _async_update_data(self):
-        """Fetch data from the Modbus registers."""
+        @callback
+        def remove() -> None:
+            remove_listener()
+            self._listeners_changed = True
+
+        return remove
+
+    def _select_groups(self) -> None:
+        """
+        Skip the register groups no enabled entity needs.
+
+        Disabled entities never listen, so the listeners' contexts are the
+        keys wanted. Energy totals need their power and day counter values.
+        """
+        self._listeners_changed = False
+        wanted = set(self.async_contexts())
+        for channel in self.energy.channels:
+            if channel.key in wanted:
+                wanted.add(channel.power_key)
+                if channel.day_key:
+                    wanted.add(channel.day_key)
+        for device in self.devices:
+            device.scheduler.select(wanted)
+
+    def _link_totals(self) -> LinkStats:
+        """Return the summed link statistics of every client."""
+        totals = LinkStats()
+        for client in self.clients:
+            totals += client.stats
+        return totals
+
+    async def _async_update_data(self) -> dict[str, Any]:
+        """
+        Fetch from the best available source, falling back down the ranking.
+
+        The local link is preferred. When it fails and the cloud is
+        configured, the cloud fills in until a retry of the local link
+        succeeds again.
+        """
+        if self._listeners_changed:
+            self._select_groups()
+        now = time.monotonic()
+        errors: dict[str, Exception] = {}
+        for source in self.arbiter.candidates(now):
+            start = time.perf_counter()
+            try:
+                if source == SOURCE_CLOUD:
+                    values = await self._async_fetch_cloud()
+                else:
+                    values = await self._async_poll_local()
+            except EG4CircuitOpenError as error:
+                # Nothing was contacted; the breakers keep their own backoff.
+                errors[source] = error
+                continue
+            except (EG4ApiClientError, UpdateFailed, TimeoutError) as error:
+                LOGGER.debug("Fetching from %s failed: %s", source, error)
+                self.arbiter.record_failure(source, now)
+                errors[source] = error
+                continue
+            self.arbiter.record_success(source, time.perf_counter() - start)
+            self._record_sources(source, values)
+            data = {**(self.data or {}), **values}
+            if source != SOURCE_CLOUD:
+                # Cloud values carry no read time worth integrating over.
+                data.update(self._accumulate(values, time.monotonic()))
+                self._record_history(values)
+            # A poll that read a setting before its write went out is stale.
+            data.update(self._optimistic)
+            return data
+        failures = "; ".join(f"{source}: {error}" for source, error in errors.items())
+        msg = f"No data source available: {failures}"
+        raise UpdateFailed(msg)
+
+    async def _async_poll_local(self) -> dict:
+        """Poll every device concurrently for the register groups that are due."""
+        trace = CycleTrace(source=SOURCE_LOCAL)
+        before = self._link_totals()
+        start = time.perf_counter()
+        results = await async_poll_devices(
+            self.devices,
+            self.link_limiter,
+            time.monotonic(),
+            budget=self.polling_interval * CYCLE_BUDGET,
+            trace=trace,
+        )
+        trace.duration = time.perf_counter() - start
+        trace.link = self._link_totals() - before
+        trace.link.timeouts += trace.span_timeouts
+
+        data = {}
+        for name, result in results.items():
+            if isinstance(result, Exception):
+                LOGGER.debug("Error polling %s: %s", name, result)
+                trace.errors[name] = repr(result)
+                if isinstance(result, TimeoutError):
+                    # The device ran past its deadline; the client never saw it.
+                    trace.link.timeouts += 1
+            else:
+                data.update(result)
+        # Keep the values that did arrive unless every device failed.
+        failed = len(trace.errors) == len(results)
+        self.metrics.record(trace, failed=failed)
+        if failed:
+            errors = "; ".join(
+                f"{name}: {error}" for name, error in trace.errors.items()
+            )
+            if all(
+                isinstance(result, EG4CircuitOpenError) for result in results.values()
+            ):
+                raise EG4CircuitOpenError(errors)
+            msg = f"Error fetching data: {errors}"
+            raise UpdateFailed(msg)
+        return data
+
+    async def _async_fetch_cloud(self) -> dict:
+        """Fetch the inverter's values from the cloud monitor."""
+        trace = CycleTrace(source=SOURCE_CLOUD)
+        start = time.perf_counter()
+        serial = self.config_entry.data.get("inverter_serial_number")
         try:
-            await self.api_client.connect()
-            data = {
-                key: await self.api_client.read_data(address, 1)[0]
-                for key, address in MODBUS_MAP.items()
+            async with asyncio.timeout(self.polling_interval):
+                inverters = await self.cloud_client.async_get_inverters()
+            if serial not in inverters:
+                msg = f"Inverter {serial} is not on the cloud account"
+                raise EG4ApiClientError(msg)  # noqa: TRY301
+        except EG4ApiClientAuthenticationError as error:
+            # Retrying cannot help; the user has to enter new credentials.
+            trace.errors[SOURCE_CLOUD] = repr(error)
+            raise ConfigEntryAuthFailed(error) from error
+        except (EG4ApiClientError, TimeoutError) as error:
+            trace.errors[SOURCE_CLOUD] = repr(error)
+            raise
+        finally:
+            trace.duration = time.perf_counter() - start
+            self.metrics.record(trace, failed=bool(trace.errors))
+        return inverters[serial]
+
+    def _record_sources(self, source: str, values: dict) -> None:
+        """Note that ``values`` just arrived from ``source``."""
+        stamp = ValueSource(source, dt_util.utcnow())
+        for key in values:
+            self.value_sources[key] = stamp
+        self.stale_keys.difference_update(values)
+        if self._snapshot_store is not None:
+            self._snapshot_store.async_delay_save(
+                self._snapshot_data, SNAPSHOT_SAVE_DELAY
+            )
+
+    @callback
+    def async_push(self, values: dict) -> None:
+        """
+        Take values pushed by the dongle as a fresh update.
+
+        Like any update this pushes the next poll back by a whole interval,
+        so a live stream leaves the link idle.
+        """
+        self._record_sources(SOURCE_PUSH, values)
+        self._record_history(values)
+        self.async_set_updated_data(
+            {
+                **(self.data or {}),
+                **values,
+                **self._accumulate(values, time.monotonic()),
+                **self._optimistic,
             }
+        )
 
-            # Fetch GridBoss data if configured
-            if self.config_entry.data.get("gridboss_serial_number"):
-                gridboss_data = {
-                    key: await self.api_client.read_data(address, 1)[0]
-                    for key, address in MODBUS_MAP_GRIDBOSS.items()
-                }
-                data.update(gridboss_data)
+    async def async_write(self, key: str, value: float) -> None:
+        """
+        Write one setting and confirm it by reading its register back.
 
-            await self.api_client.close()
-            await asyncio.sleep(self.polling_interval)
-            return data
-        except Exception as error:
-            raise UpdateFailed(f"Error fetching data: {error}")
+        The new value is shown straight away and then replaced by whatever
+        the device reports, without refreshing anything else.
+        """
+        for device in self.devices:
+            register = device.scheduler.register_map.registers.get(key)
+            if register is not None:
+                break
+        else:
+            msg = f"Unknown register {key}"
+            raise ValueError(msg)
+        if register.register_type is not RegisterType.HOLDING:
+            msg = f"Register {key} is read-only"
+            raise ValueError(msg)
+
+        previous = (self.data or {}).get(key)
+        self._optimistic[key] = value
+        self._async_publish({key: value})
+        writer = self._writer(device)
+        try:
+            if register.bit is None:
+                words = await writer.async_write(
+                    register.address, encode_value(register, value)
+                )
+            else:
+                # The other flags of the register are read and written back.
+                words = await writer.async_write_bits(
+                    register.address,
+                    1 << register.bit,
+                    encode_value(register, value)[0],
+                )
+        except EG4ApiClientError:
+            if self._optimistic.get(key) == value:
+                del self._optimistic[key]
+                self._async_publish({key: previous})
+            raise
+
+        decode = compile_decoder(register.address, register.width, (register,))
+        confirmed = decode(
+            [words[register.address + offset] for offset in range(register.width)]
+        )[key]
+        if confirmed != value:
+            LOGGER.warning(
+                "%s reads back as %s after writing %s", key, confirmed, value
+            )
+        if self._optimistic.get(key) == value:
+            # Not overtaken by a newer write of the same setting.
+            del self._optimistic[key]
+            self._record_sources(SOURCE_LOCAL, {key: confirmed})
+            self._async_publish({key: confirmed})
+
+    def _writer(self, device: PolledDevice) -> RegisterWriter:
+        """Return the writer for ``device``, sharing its link's queue."""
+        if (writer := self._writers.get(device.name)) is None:
+            writer = RegisterWriter(
+                device.client, self.link_limiter.limit(device.client), device.unit_id
+            )
+            self._writers[device.name] = writer
+        return writer
+
+    @callback
+    def _async_publish(self, values: dict) -> None:
+        """Merge ``values`` into the data and notify their entities."""
+        self.data = {**(self.data or {}), **values}
+        self.async_update_listeners()
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """
+        Notify only the entities whose value changed since the last update.
+
+        Entities subscribe with their data key as context. Listeners without
+        a context, and every listener when availability changes, are always
+        notified. A value also counts as changed when it turns stale or
+        fresh again, or becomes too old to show, even if it reads the same.
+        """
+        data = self.data or {}
+        previous = self._published
+        availability_changed = self.last_update_success != self._published_success
+        restated = self._published_stale.difference(self.stale_keys)
+        self._published = dict(data)
+        self._published_success = self.last_update_success
+        self._published_stale = frozenset(self.stale_keys)
+        late, expired = self._aged_keys()
+        restated |= (late ^ self.late_keys) | (expired ^ self.expired_keys)
+        self.late_keys, self.expired_keys = late, expired
+
+        if previous is None or availability_changed:
+            self.changed_keys = frozenset(data)
+            notify_all = True
+        else:
+            self.changed_keys = restated.union(
+                key
+                for key in data.keys() | previous.keys()
+                if data.get(key) != previous.get(key)
+            )
+            notify_all = False
+
+        writes = avoided = 0
+        for update_callback, context in list(self._listeners.values()):
+            if notify_all or context is None or context in self.changed_keys:
+                update_callback()
+                writes += 1
+            else:
+                avoided += 1
+
+        stats = self.update_stats
+        stats.writes += writes
+        stats.writes_avoided += avoided
+        stats.last_writes = writes
+        stats.last_writes_avoided = avoided
+
+    @callback
+    def _async_refresh_finished(self) -> None:
+        """
+        Age the values on a failed refresh the listeners will not hear of.
+
+        Only the first of several failed refreshes reaches the listeners, so
+        values turning late or expiring while the failures last are
+        notified here, once per cycle.
+        """
+        if self.last_update_success or self._published_success:
+            return
+        late, expired = self._aged_keys()
+        aged = (late ^ self.late_keys) | (expired ^ self.expired_keys)
+        self.late_keys, self.expired_keys = late, expired
+        for update_callback, context in list(self._listeners.values()):
+            if context in aged:
+                update_callback()
+
+    def _aged_keys(self) -> tuple[frozenset[str], frozenset[str]]:
+        """
+        Return the values that missed a read and those past their limit.
+
+        A value restored from the last run is aged from the restore rather
+        than from when it was read, so it is shown until the first reads
+        have had their chance.
+        """
+        now = dt_util.utcnow()
+        late: set[str] = set()
+        expired: set[str] = set()
+        for key, stamp in self.value_sources.items():
+            if (interval := self._read_intervals.get(key)) is None:
+                continue
+            updated = stamp.updated
+            if key in self.stale_keys and self._restored_at is not None:
+                updated = self._restored_at
+            age = (now - updated).total_seconds()
+            if age > interval + self.polling_interval:
+                late.add(key)
+                if age > interval * STALE_CYCLES:
+                    expired.add(key)
+        return frozenset(late), frozenset(expired)
+
+    def is_stale(self, key: str) -> bool:
+        """Return True if the value of ``key`` was not read when last due."""
+        return key in self.stale_keys or key in self.late_keys
+
+    async def async_close(self) -> None:
+        """Close the Modbus links of every polled device."""
+        for client in self.clients:
+            await client.close()
@@ -11,6 +11,8 @@ if TYPE_CHECKING:
 
     from .api import EG4ApiClient
     from .coordinator import EG4DataUpdateCoordinator
+    from .push import PushListener
+    from .system import SystemAggregator
 
 
 type EG4ConfigEntry = ConfigEntry[EG4Data]
@@ -23,3 +25,6 @@ class EG4Data:
     client: EG4ApiClient
     coordinator: EG4DataUpdateCoordinator
     integration: Integration
+    settings: dict
+    push: PushListener | None = None
+    system: SystemAggregator | None = None
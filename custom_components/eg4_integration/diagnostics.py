@@ -0,0 +1,73 @@
+"""Diagnostics support for EG4 Integration."""
+
+from __future__ import annotations
+
+import time
+from dataclasses import asdict
+from typing import TYPE_CHECKING, Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.const import CONF_HOST, CONF_PASSWORD, CONF_USERNAME
+
+from .const import CONF_GRIDBOSS_LAST_KNOWN_IP, CONF_LAST_KNOWN_IP
+
+if TYPE_CHECKING:
+    from homeassistant.core import HomeAssistant
+
+    from .data import EG4ConfigEntry
+
+TO_REDACT = {
+    CONF_HOST,
+    CONF_PASSWORD,
+    CONF_USERNAME,
+    CONF_LAST_KNOWN_IP,
+    CONF_GRIDBOSS_LAST_KNOWN_IP,
+    "inverter_serial_number",
+    "gridboss_serial_number",
+}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant,  # noqa: ARG001 Unused function argument: `hass`
+    entry: EG4ConfigEntry,
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry, including recent poll cycles."""
+    coordinator = entry.runtime_data.coordinator
+    push = entry.runtime_data.push
+    now = time.monotonic()
+    return {
+        "entry": {
+            "data": async_redact_data(entry.data, TO_REDACT),
+            "options": async_redact_data(entry.options, TO_REDACT),
+        },
+        "coordinator": {
+            "last_update_success": coordinator.last_update_success,
+            "update_interval": coordinator.update_interval.total_seconds(),
+            "data": coordinator.data,
+            "update_stats": asdict(coordinator.update_stats),
+        },
+        "devices": [
+            {
+                "name": device.name,
+                "unit_id": device.unit_id,
+                "connection_type": device.client.connection_type,
+                "connected": device.client.connected,
+                "link": asdict(device.client.stats),
+                "breaker": device.breaker.as_dict(now),
+            }
+            for device in coordinator.devices
+        ],
+        "poll_metrics": coordinator.metrics.as_dict(),
+        "sources": coordinator.arbiter.as_dict(),
+        "value_sources": {
+            key: {"source": source.source, "updated": source.updated.isoformat()}
+            for key, source in coordinator.value_sources.items()
+        },
+        "stale": sorted(coordinator.stale_keys),
+        "push": None
+        if push is None
+        else {
+            "connected": push.connected,
+            "frames": push.frames,
+        },
+    }
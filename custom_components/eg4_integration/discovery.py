@@ -0,0 +1,126 @@
+"""Device discovery for EG4 Integration."""
+
+from __future__ import annotations
+
+import asyncio
+import socket
+import time
+from typing import TYPE_CHECKING
+
+from zeroconf import AddressResolverIPv4
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable
+
+    from zeroconf.asyncio import AsyncZeroconf
+
+    Resolver = Callable[[str], Awaitable[str | None]]
+
+DISCOVERY_TIMEOUT = 3.0
+DISCOVERY_CACHE_TTL = 300.0
+# Failed lookups are remembered briefly so a missing dongle is not re-queried
+# on every reconnect attempt.
+DISCOVERY_RETRY = 30.0
+
+
+def dongle_hostname(serial_number: str) -> str:
+    """Return the mDNS host name an EG4 dongle announces."""
+    return f"EG4-{serial_number}.local."
+
+
+def zeroconf_resolver(aiozc: AsyncZeroconf) -> Resolver:
+    """Resolve host names with Home Assistant's shared zeroconf instance."""
+
+    async def _resolve(hostname: str) -> str | None:
+        resolver = AddressResolverIPv4(hostname)
+        if not await resolver.async_request(aiozc.zeroconf, DISCOVERY_TIMEOUT * 1000):
+            return None
+        addresses = resolver.parsed_addresses()
+        return addresses[0] if addresses else None
+
+    return _resolve
+
+
+async def getaddrinfo_resolver(hostname: str) -> str | None:
+    """Resolve host names with the system resolver without blocking the loop."""
+    try:
+        async with asyncio.timeout(DISCOVERY_TIMEOUT):
+            infos = await asyncio.get_running_loop().getaddrinfo(
+                hostname, None, family=socket.AF_INET, type=socket.SOCK_STREAM
+            )
+    except (TimeoutError, OSError):
+        return None
+    return infos[0][4][0] if infos else None
+
+
+class EG4Discovery:
+    """Find EG4 dongles by serial number, caching answers for a while."""
+
+    def __init__(
+        self,
+        resolver: Resolver = getaddrinfo_resolver,
+        ttl: float = DISCOVERY_CACHE_TTL,
+    ) -> None:
+        """Initialize the discovery cache."""
+        self._resolver = resolver
+        self._ttl = ttl
+        self._cache: dict[str, tuple[str, float]] = {}
+        self._retry_after: dict[str, float] = {}
+        self._pending: dict[str, asyncio.Future[str | None]] = {}
+
+    def seed(self, serial_number: str, host: str) -> None:
+        """
+        Prime the cache with a previously known address.
+
+        The entry counts as already expired, so it is used for the first
+        connection attempt but replaced as soon as a lookup is requested.
+        """
+        self._cache[serial_number] = (host, time.monotonic() - self._ttl)
+
+    def cached(self, serial_number: str) -> str | None:
+        """Return the last known address without doing a lookup."""
+        host, _ = self._cache.get(serial_number, (None, 0.0))
+        return host
+
+    async def async_discover(
+        self, serial_number: str, max_age: float | None = None
+    ) -> str:
+        """
+        Return the dongle address, resolving it when the cache is too old.
+
+        Concurrent callers for the same serial number share one lookup. When
+        a lookup fails the last known address is kept.
+        """
+        max_age = self._ttl if max_age is None else max_age
+        host, resolved_at = self._cache.get(serial_number, (None, -float("inf")))
+        now = time.monotonic()
+        if host is not None and now - resolved_at < max_age:
+            return host
+        if now < self._retry_after.get(serial_number, 0.0):
+            if host is not None:
+                return host
+            msg = f"EG4 dongle {serial_number} was not found"
+            raise ConnectionError(msg)
+
+        if (pending := self._pending.get(serial_number)) is None:
+            pending = asyncio.ensure_future(
+                self._resolver(dongle_hostname(serial_number))
+            )
+            self._pending[serial_number] = pending
+            pending.add_done_callback(lambda _: self._pending.pop(serial_number, None))
+        try:
+            found = await asyncio.shield(pending)
+        except OSError as exception:
+            found = None
+            msg = f"Failed to auto-discover IP: {exception}"
+        else:
+            msg = f"EG4 dongle {serial_number} was not found"
+
+        if found is None:
+            self._retry_after[serial_number] = time.monotonic() + DISCOVERY_RETRY
+            if host is not None:
+                return host
+            raise ConnectionError(msg)
+        self._cache[serial_number] = (found, time.monotonic())
+        self._retry_after.pop(serial_number, None)
+        return found
@@ -0,0 +1,219 @@
+"""Energy totals integrated from power samples as they are read."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Mapping, Sequence
+
+# Samples further apart than this are not integrated across: the power in
+# between is unknown, and guessing would invent energy.
+MAX_SAMPLE_GAP = 300.0
+ENERGY_DIGITS = 4
+HOUR = 3600
+_WATT_SECONDS_PER_KWH = 3_600_000
+
+
+@dataclass(frozen=True, slots=True)
+class EnergyChannel:
+    """
+    An energy total fed by one power value.
+
+    ``sign`` picks the direction counted: 1 integrates the positive part of
+    the power, -1 the negative part, so one signed grid or battery power
+    feeds both an import and an export total. ``day_key`` is the device's
+    own counter of the same energy since midnight, used to fill gaps.
+    """
+
+    key: str
+    power_key: str
+    sign: int = 1
+    day_key: str | None = None
+
+
+ENERGY_CHANNELS = (
+    EnergyChannel("pv_energy", "inverter_performance", day_key="pv_energy_today"),
+    EnergyChannel(
+        "grid_import_energy", "grid_power", day_key="grid_import_energy_today"
+    ),
+    EnergyChannel(
+        "grid_export_energy", "grid_power", -1, day_key="grid_export_energy_today"
+    ),
+    EnergyChannel(
+        "battery_charge_energy", "battery_power", day_key="battery_charge_energy_today"
+    ),
+    EnergyChannel(
+        "battery_discharge_energy",
+        "battery_power",
+        -1,
+        day_key="battery_discharge_energy_today",
+    ),
+)
+
+
+def _positive_area(start: float, end: float, duration: float) -> float:
+    """
+    Return the area under the positive part of a line from ``start`` to ``end``.
+
+    This is the trapezoid rule, cut exactly where the power crosses zero.
+    """
+    if start >= 0 and end >= 0:
+        return (start + end) / 2 * duration
+    if start <= 0 and end <= 0:
+        return 0.0
+    positive = max(start, end)
+    return positive * positive / (2 * (abs(start) + abs(end))) * duration
+
+
+class EnergyAccumulator:
+    """
+    Integrate power values into kWh totals, sample by sample.
+
+    Each power value is integrated against its previous sample using the
+    times the two were read, so the totals do not depend on how often the
+    entities are written or recorded.
+
+    Energy missed while samples stopped, across an outage or a restart, is
+    recovered from the device's day counters: the counter's rise since it
+    was last read, less what was integrated meanwhile, is added once the
+    counter is read again on the same day.
+    """
+
+    def __init__(
+        self,
+        channels: Iterable[EnergyChannel] = ENERGY_CHANNELS,
+        max_gap: float = MAX_SAMPLE_GAP,
+    ) -> None:
+        """Initialize every total at zero."""
+        self.channels = tuple(channels)
+        self.max_gap = max_gap
+        self.totals: dict[str, float] = {channel.key: 0.0 for channel in self.channels}
+        self._by_power: dict[str, list[EnergyChannel]] = {}
+        for channel in self.channels:
+            self._by_power.setdefault(channel.power_key, []).append(channel)
+        self._samples: dict[str, tuple[float, float]] = {}
+        # Per total: the day and value of its day counter when last read, and
+        # the energy integrated since.
+        self._marks: dict[str, tuple[str, float, float]] = {}
+        # Totals whose samples stopped since their day counter was read.
+        self._broken: set[str] = set()
+        self.backfilled = 0.0
+
+    def restore(
+        self,
+        totals: Mapping[str, float],
+        marks: Mapping[str, Sequence] | None = None,
+    ) -> None:
+        """Continue from saved totals and marks; unknown keys are ignored."""
+        for key, value in totals.items():
+            if key in self.totals:
+                self.totals[key] = max(self.totals[key], float(value))
+        for key, (day, value, integrated) in (marks or {}).items():
+            if key in self.totals:
+                self._marks[key] = (day, float(value), float(integrated))
+                # Nothing was sampled while we were not running.
+                self._broken.add(key)
+
+    def as_dict(self) -> dict:
+        """Return the totals and marks in a JSON-friendly form."""
+        return {
+            "totals": dict(self.totals),
+            "marks": {key: list(mark) for key, mark in self._marks.items()},
+        }
+
+    def add(self, values: Mapping[str, object], timestamp: float) -> dict[str, float]:
+        """
+        Integrate the power values in ``values``, read at ``timestamp``.
+
+        Return the totals that advanced, in kWh. The first sample of a power
+        value, and the first after a gap, only sets the starting point.
+        """
+        updated: dict[str, float] = {}
+        for power_key, channels in self._by_power.items():
+            power = values.get(power_key)
+            if not isinstance(power, int | float) or isinstance(power, bool):
+                continue
+            previous = self._samples.get(power_key)
+            self._samples[power_key] = (timestamp, power)
+            if previous is None:
+                continue
+            duration = timestamp - previous[0]
+            if duration > self.max_gap:
+                self._broken.update(channel.key for channel in channels)
+            if not 0 < duration <= self.max_gap:
+                continue
+            for channel in channels:
+                area = _positive_area(
+                    channel.sign * previous[1], channel.sign * power, duration
+                )
+                energy = area / _WATT_SECONDS_PER_KWH
+                self.totals[channel.key] += energy
+                if (mark := self._marks.get(channel.key)) is not None:
+                    self._marks[channel.key] = (mark[0], mark[1], mark[2] + energy)
+                updated[channel.key] = round(self.totals[channel.key], ENERGY_DIGITS)
+        return updated
+
+    def reconcile(self, values: Mapping[str, object], day: str) -> dict[str, float]:
+        """
+        Fill gaps from the day counters in ``values``, read on ``day``.
+
+        Return the totals that grew. A gap that spans midnight cannot be
+        recovered, as the counter's final value for the earlier day is gone.
+        """
+        updated: dict[str, float] = {}
+        for channel in self.channels:
+            counter = values.get(channel.day_key) if channel.day_key else None
+            if not isinstance(counter, int | float) or isinstance(counter, bool):
+                continue
+            mark = self._marks.get(channel.key)
+            if channel.key in self._broken and mark is not None and mark[0] == day:
+                missed = counter - mark[1] - mark[2]
+                if missed > 0:
+                    self.totals[channel.key] += missed
+                    self.backfilled += missed
+                    updated[channel.key] = round(
+                        self.totals[channel.key], ENERGY_DIGITS
+                    )
+            self._broken.discard(channel.key)
+            self._marks[channel.key] = (day, float(counter), 0.0)
+        return updated
+
+
+class HourlySums:
+    """
+    Close hourly sums of the energy totals for long-term statistics.
+
+    An hour's sum is the total at its end, interpolated between the updates
+    either side of it. Across a gap that spreads the energy recovered at the
+    end of the gap evenly over the missing hours.
+    """
+
+    def __init__(self) -> None:
+        """Initialize with no update seen."""
+        self.last: tuple[float, dict[str, float]] | None = None
+
+    def update(
+        self, timestamp: float, totals: Mapping[str, float]
+    ) -> dict[str, list[tuple[float, float]]]:
+        """
+        Note the totals at wall-clock ``timestamp``.
+
+        Return the start and closing sum of every hour that ended since the
+        previous update, by key.
+        """
+        rows: dict[str, list[tuple[float, float]]] = {}
+        if self.last is not None and timestamp > self.last[0]:
+            start, before = self.last
+            end = start - start % HOUR + HOUR
+            while end <= timestamp:
+                fraction = (end - start) / (timestamp - start)
+                for key, total in totals.items():
+                    previous = before.get(key, total)
+                    rows.setdefault(key, []).append(
+                        (end - HOUR, previous + (total - previous) * fraction)
+                    )
+                end += HOUR
+        self.last = (timestamp, dict(totals))
+        return rows
@@ -5,18 +5,25 @@ from __future__ import annotations
 from homeassistant.helpers.device_registry import DeviceInfo
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
-from .const import ATTRIBUTION
+from .const import ATTR_LAST_READ, ATTR_STALE, ATTRIBUTION
 from .coordinator import EG4DataUpdateCoordinator
 
 
-class IntegrationEG4Entity(CoordinatorEntity[EG4DataUpdateCoordinator]):
+class EG4Entity(CoordinatorEntity[EG4DataUpdateCoordinator]):
     """EG4Entity class."""
 
     _attr_attribution = ATTRIBUTION
 
-    def __init__(self, coordinator: EG4DataUpdateCoordinator) -> None:
-        """Initialize."""
-        super().__init__(coordinator)
+    def __init__(
+        self, coordinator: EG4DataUpdateCoordinator, context: str | None = None
+    ) -> None:
+        """
+        Initialize.
+
+        ``context`` is the coordinator data key the entity shows; it is only
+        updated when that value changes.
+        """
+        super().__init__(coordinator, context)
         self._attr_unique_id = coordinator.config_entry.entry_id
         self._attr_device_info = DeviceInfo(
             identifiers={
@@ -26,3 +33,27 @@ class IntegrationEG4Entity(CoordinatorEntity[EG4DataUpdateCoordinator]):
                 ),
             },
         )
+
+    @property
+    def available(self) -> bool:
+        """
+        Return True while the entity's value is recent enough to show.
+
+        A value that failed to refresh is still shown, marked stale, until
+        it is older than its limit, even if the whole last update failed.
+        """
+        key = self.coordinator_context
+        if key is None or key not in self.coordinator.value_sources:
+            return super().available
+        return key not in self.coordinator.expired_keys
+
+    @property
+    def extra_state_attributes(self) -> dict | None:
+        """Mark a value that was not read when last due, with when it was."""
+        key = self.coordinator_context
+        if key is None or not self.coordinator.is_stale(key):
+            return None
+        attributes = {ATTR_STALE: True}
+        if (stamp := self.coordinator.value_sources.get(key)) is not None:
+            attributes[ATTR_LAST_READ] = stamp.updated.isoformat()
+        return attributes
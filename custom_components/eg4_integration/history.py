@@ -0,0 +1,164 @@
+"""In-memory sample history and rolling aggregates of the polled values."""
+
+from __future__ import annotations
+
+from array import array
+from collections import deque
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator, Mapping
+
+# Raw samples kept per value: an hour at one sample a second.
+RING_SIZE = 3600
+SHORT_PERIOD = 300
+LONG_PERIOD = 3600
+# Completed short aggregates kept per value: a day of five-minute periods.
+SHORT_HISTORY = 288
+
+
+class SampleRing:
+    """
+    Fixed-size ring of timestamped samples.
+
+    Timestamps and values live in two preallocated ``array('d')`` buffers,
+    so adding a sample stores two doubles and allocates nothing.
+    """
+
+    __slots__ = ("_head", "_times", "_values", "count", "size")
+
+    def __init__(self, size: int = RING_SIZE) -> None:
+        """Initialize an empty ring holding up to ``size`` samples."""
+        self.size = size
+        self.count = 0
+        self._head = 0
+        self._times = array("d", bytes(8 * size))
+        self._values = array("d", bytes(8 * size))
+
+    def __len__(self) -> int:
+        """Return the number of samples held."""
+        return self.count
+
+    def append(self, timestamp: float, value: float) -> None:
+        """Add a sample, overwriting the oldest once the ring is full."""
+        head = self._head
+        self._times[head] = timestamp
+        self._values[head] = value
+        self._head = (head + 1) % self.size
+        if self.count < self.size:
+            self.count += 1
+
+    def __iter__(self) -> Iterator[tuple[float, float]]:
+        """Yield the samples held, oldest first."""
+        start = (self._head - self.count) % self.size
+        for offset in range(self.count):
+            index = (start + offset) % self.size
+            yield self._times[index], self._values[index]
+
+    def since(self, timestamp: float) -> list[tuple[float, float]]:
+        """Return the samples taken at or after ``timestamp``, oldest first."""
+        return [sample for sample in self if sample[0] >= timestamp]
+
+
+@dataclass(slots=True)
+class Aggregate:
+    """Mean, minimum and maximum of the samples in one period."""
+
+    start: float
+    count: int
+    total: float
+    min: float
+    max: float
+
+    @property
+    def mean(self) -> float:
+        """Return the mean of the samples."""
+        return self.total / self.count
+
+    def as_dict(self) -> dict:
+        """Return the aggregate in a JSON-friendly form."""
+        return {
+            "start": self.start,
+            "mean": self.mean,
+            "min": self.min,
+            "max": self.max,
+            "count": self.count,
+        }
+
+
+class PeriodAggregator:
+    """Fold samples into aggregates over fixed, clock-aligned periods."""
+
+    __slots__ = ("_current", "completed", "period")
+
+    def __init__(self, period: float, keep: int) -> None:
+        """Initialize with no samples; the last ``keep`` periods are kept."""
+        self.period = period
+        self.completed: deque[Aggregate] = deque(maxlen=keep)
+        self._current: Aggregate | None = None
+
+    def add(self, timestamp: float, value: float) -> Aggregate | None:
+        """Add a sample and return the period it closed, if any."""
+        start = timestamp - timestamp % self.period
+        current = self._current
+        if current is not None and current.start == start:
+            current.count += 1
+            current.total += value
+            if value < current.min:
+                current.min = value
+            elif value > current.max:
+                current.max = value
+            return None
+        self._current = Aggregate(start, 1, value, value, value)
+        if current is None or start < current.start:
+            return None
+        self.completed.append(current)
+        return current
+
+
+class SampleHistory:
+    """
+    Recent raw samples and rolling aggregates of every numeric value.
+
+    Each value keeps a ring of raw samples, five-minute aggregates for the
+    last day, and hourly aggregates that are handed out once for import
+    into long-term statistics.
+    """
+
+    def __init__(self, size: int = RING_SIZE) -> None:
+        """Initialize an empty history."""
+        self.size = size
+        self.rings: dict[str, SampleRing] = {}
+        self._short: dict[str, PeriodAggregator] = {}
+        self._long: dict[str, PeriodAggregator] = {}
+        self._hourly: dict[str, list[Aggregate]] = {}
+
+    def add(self, values: Mapping[str, object], timestamp: float) -> None:
+        """Record the numeric values read at ``timestamp``."""
+        for key, value in values.items():
+            if not isinstance(value, int | float) or isinstance(value, bool):
+                continue
+            if (ring := self.rings.get(key)) is None:
+                ring = self.rings[key] = SampleRing(self.size)
+                self._short[key] = PeriodAggregator(SHORT_PERIOD, SHORT_HISTORY)
+                self._long[key] = PeriodAggregator(LONG_PERIOD, 1)
+            ring.append(timestamp, value)
+            self._short[key].add(timestamp, value)
+            if (hour := self._long[key].add(timestamp, value)) is not None:
+                self._hourly.setdefault(key, []).append(hour)
+
+    def window(self, key: str, since: float) -> list[tuple[float, float]]:
+        """Return the raw samples of ``key`` taken since ``since``."""
+        ring = self.rings.get(key)
+        return [] if ring is None else ring.since(since)
+
+    def aggregates(self, key: str) -> list[Aggregate]:
+        """Return the completed five-minute aggregates of ``key``."""
+        aggregator = self._short.get(key)
+        return [] if aggregator is None else list(aggregator.completed)
+
+    def pop_hourly(self) -> dict[str, list[Aggregate]]:
+        """Return the hours completed since the last call, by key."""
+        hourly, self._hourly = self._hourly, {}
+        return hourly
@@ -0,0 +1,195 @@
+"""Poll-cycle instrumentation for EG4 Integration."""
+
+from __future__ import annotations
+
+import math
+from collections import deque
+from dataclasses import asdict, dataclass, field, fields
+from datetime import UTC, datetime
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .planner import ReadSpan
+
+# Samples kept per rolling histogram and cycle traces kept for diagnostics.
+HISTORY_SIZE = 256
+TRACE_HISTORY = 20
+
+SUMMARY_PERCENTILES = (50, 95, 99)
+
+
+def _nearest_rank(ordered: list[float], percent: float) -> float:
+    """Return the nearest-rank ``percent`` percentile of sorted samples."""
+    return ordered[max(1, math.ceil(percent / 100 * len(ordered))) - 1]
+
+
+class RollingHistogram:
+    """The most recent samples of one timing, in seconds."""
+
+    __slots__ = ("_samples",)
+
+    def __init__(self, size: int = HISTORY_SIZE) -> None:
+        """Initialize an empty histogram."""
+        self._samples: deque[float] = deque(maxlen=size)
+
+    def __len__(self) -> int:
+        """Return the number of samples held."""
+        return len(self._samples)
+
+    def add(self, value: float) -> None:
+        """Record one sample, dropping the oldest once full."""
+        self._samples.append(value)
+
+    def percentile(self, percent: float) -> float | None:
+        """Return the nearest-rank ``percent`` percentile, or None if empty."""
+        if not self._samples:
+            return None
+        return _nearest_rank(sorted(self._samples), percent)
+
+    def summary(self) -> dict:
+        """Return the sample count and percentiles in milliseconds."""
+        if not self._samples:
+            return {"count": 0}
+        ordered = sorted(self._samples)
+        summary: dict = {"count": len(ordered)}
+        for percent in SUMMARY_PERCENTILES:
+            value = _nearest_rank(ordered, percent)
+            summary[f"p{percent}_ms"] = round(value * 1000, 1)
+        summary["max_ms"] = round(ordered[-1] * 1000, 1)
+        return summary
+
+
+@dataclass(slots=True)
+class LinkStats:
+    """
+    Running totals kept by one Modbus client.
+
+    ``retries`` counts requests resent after a timeout and reconnects after
+    a failed attempt. Byte counts are whole Modbus frames as sent and
+    received.
+    """
+
+    connects: int = 0
+    connect_time: float = 0.0
+    retries: int = 0
+    requests: int = 0
+    registers: int = 0
+    timeouts: int = 0
+    errors: int = 0
+    bytes_sent: int = 0
+    bytes_received: int = 0
+
+    def __add__(self, other: LinkStats) -> LinkStats:
+        """Return the field-wise sum of two totals."""
+        return LinkStats(
+            *(getattr(self, f.name) + getattr(other, f.name) for f in fields(self))
+        )
+
+    def __sub__(self, other: LinkStats) -> LinkStats:
+        """Return the field-wise difference of two totals."""
+        return LinkStats(
+            *(getattr(self, f.name) - getattr(other, f.name) for f in fields(self))
+        )
+
+
+@dataclass(slots=True)
+class SpanTrace:
+    """One block read during a poll cycle."""
+
+    device: str
+    register_type: str
+    address: int
+    count: int
+    latency: float
+
+
+@dataclass(slots=True)
+class CycleTrace:
+    """What one poll cycle did and how long it took."""
+
+    started: datetime = field(default_factory=lambda: datetime.now(UTC))
+    duration: float = 0.0
+    spans: list[SpanTrace] = field(default_factory=list)
+    link: LinkStats = field(default_factory=LinkStats)
+    errors: dict[str, str] = field(default_factory=dict)
+    source: str | None = None
+    # Block reads that failed while the rest of their device's were read.
+    failed_spans: dict[str, str] = field(default_factory=dict)
+    span_timeouts: int = 0
+
+    def add_span(self, device: str, span: ReadSpan, latency: float) -> None:
+        """Record a completed block read."""
+        self.spans.append(
+            SpanTrace(device, span.register_type, span.address, span.count, latency)
+        )
+
+    def add_failed_span(self, device: str, span: ReadSpan, error: Exception) -> None:
+        """Record a block read that failed or ran out of time."""
+        name = f"{device} {span.register_type} {span.address}+{span.count}"
+        self.failed_spans[name] = repr(error)
+        if isinstance(error, TimeoutError):
+            self.span_timeouts += 1
+
+    def as_dict(self) -> dict:
+        """Return the trace in a JSON-friendly form."""
+        return {
+            "started": self.started.isoformat(),
+            "duration_ms": round(self.duration * 1000, 1),
+            "spans": [
+                {
+                    "device": span.device,
+                    "register_type": span.register_type,
+                    "address": span.address,
+                    "count": span.count,
+                    "latency_ms": round(span.latency * 1000, 1),
+                }
+                for span in self.spans
+            ],
+            "link": asdict(self.link),
+            "errors": self.errors,
+            "failed_spans": self.failed_spans,
+            "source": self.source,
+        }
+
+
+class PollMetrics:
+    """Rolling poll-cycle figures and recent traces of one coordinator."""
+
+    def __init__(self, size: int = HISTORY_SIZE, traces: int = TRACE_HISTORY) -> None:
+        """Initialize empty metrics."""
+        self.cycle_time = RollingHistogram(size)
+        self.span_latency = RollingHistogram(size)
+        self.connect_time = RollingHistogram(size)
+        self.totals = LinkStats()
+        self.traces: deque[CycleTrace] = deque(maxlen=traces)
+        self.cycles = 0
+        self.failed_cycles = 0
+
+    @property
+    def last(self) -> CycleTrace | None:
+        """Return the most recent cycle trace."""
+        return self.traces[-1] if self.traces else None
+
+    def record(self, trace: CycleTrace, *, failed: bool = False) -> None:
+        """Fold a finished cycle into the histograms."""
+        self.cycles += 1
+        self.failed_cycles += failed
+        self.cycle_time.add(trace.duration)
+        for span in trace.spans:
+            self.span_latency.add(span.latency)
+        if trace.link.connects:
+            self.connect_time.add(trace.link.connect_time / trace.link.connects)
+        self.totals += trace.link
+        self.traces.append(trace)
+
+    def as_dict(self) -> dict:
+        """Return the metrics in a JSON-friendly form."""
+        return {
+            "cycles": self.cycles,
+            "failed_cycles": self.failed_cycles,
+            "cycle_time": self.cycle_time.summary(),
+            "span_latency": self.span_latency.summary(),
+            "connect_time": self.connect_time.summary(),
+            "totals": asdict(self.totals),
+            "traces": [trace.as_dict() for trace in self.traces],
+        }
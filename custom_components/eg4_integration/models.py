@@ -0,0 +1,87 @@
+"""Registry of register maps by device model."""
+
+from __future__ import annotations
+
+import json
+import threading
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from .registers import DataType, Register, RegisterType
+from .scheduler import PollTier, RegisterGroup, RegisterMap
+
+if TYPE_CHECKING:
+    from homeassistant.core import HomeAssistant
+
+MAPS_DIR = Path(__file__).parent / "maps"
+DEFAULT_MAP = "inverter"
+GRIDBOSS_MAP = "gridboss"
+
+# The map file each model offered by the config flow is read with. The hybrid
+# inverters share one register layout.
+MODEL_MAPS = {
+    "flexboss21": DEFAULT_MAP,
+    "flexboss18": DEFAULT_MAP,
+    "18kpv": DEFAULT_MAP,
+    "12kpv": DEFAULT_MAP,
+    "12000xp": DEFAULT_MAP,
+    "6000xp": DEFAULT_MAP,
+    "3000ehv": DEFAULT_MAP,
+    "gridboss": GRIDBOSS_MAP,
+}
+
+# Parsed maps by name, shared by every entry of every model using the map.
+_MAPS: dict[str, RegisterMap] = {}
+_LOCK = threading.Lock()
+
+
+def parse_register_map(data: dict) -> RegisterMap:
+    """Build a register map from its data file contents."""
+    return RegisterMap(
+        RegisterGroup(
+            group["name"],
+            PollTier(group["tier"]),
+            tuple(
+                Register(
+                    register["key"],
+                    register["address"],
+                    DataType(register.get("data_type", DataType.UINT16)),
+                    register.get("scale", 1),
+                    register.get("bit"),
+                    RegisterType(register.get("register_type", RegisterType.HOLDING)),
+                )
+                for register in group["registers"]
+            ),
+        )
+        for group in data["groups"]
+    )
+
+
+def map_name(model: str | None) -> str:
+    """Return the name of the map ``model`` is read with, the default if unknown."""
+    if model in (DEFAULT_MAP, GRIDBOSS_MAP):
+        return model
+    return MODEL_MAPS.get(model or "", DEFAULT_MAP)
+
+
+def load_register_map(model: str | None) -> RegisterMap:
+    """
+    Return the register map of ``model``.
+
+    Each map file is parsed the first time it is needed, which does file
+    I/O; from the event loop use ``async_get_register_map``.
+    """
+    name = map_name(model)
+    with _LOCK:
+        if (register_map := _MAPS.get(name)) is None:
+            path = MAPS_DIR / f"{name}.json"
+            register_map = parse_register_map(json.loads(path.read_text()))
+            _MAPS[name] = register_map
+    return register_map
+
+
+async def async_get_register_map(hass: HomeAssistant, model: str | None) -> RegisterMap:
+    """Return the register map of ``model``, parsing it in the executor if new."""
+    if (register_map := _MAPS.get(map_name(model))) is not None:
+        return register_map
+    return await hass.async_add_executor_job(load_register_map, model)
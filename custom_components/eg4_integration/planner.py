@@ -0,0 +1,118 @@
+"""Register read planning for EG4 Integration."""
+
+from __future__ import annotations
+
+import contextlib
+import time
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+
+from .registers import RegisterType, compile_decoder
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable, Sequence
+
+    from .api import EG4ApiClient
+    from .commands import LinkQueue
+    from .registers import Register
+
+# A Modbus read response PDU holds at most 125 registers.
+MAX_READ_REGISTERS = 125
+DEFAULT_MAX_REGISTERS = 40
+DEFAULT_MAX_GAP = 8
+
+
+@dataclass(frozen=True, slots=True)
+class ReadSpan:
+    """A contiguous block of registers fetched with one request."""
+
+    register_type: RegisterType
+    address: int
+    count: int
+    registers: tuple[Register, ...]
+    # Splits the returned block back into decoded values by key.
+    decode: Callable[[Sequence[int]], dict] = field(repr=False, compare=False)
+
+
+def plan_reads(
+    registers: Iterable[Register],
+    *,
+    max_registers: int = DEFAULT_MAX_REGISTERS,
+    max_gap: int = DEFAULT_MAX_GAP,
+) -> list[ReadSpan]:
+    """
+    Group registers into the fewest contiguous read spans.
+
+    Values closer than ``max_gap`` unused registers are read together, no
+    span is longer than ``max_registers``, and holding and input registers
+    are always read separately.
+    """
+    if not 1 <= max_registers <= MAX_READ_REGISTERS:
+        msg = f"max_registers must be between 1 and {MAX_READ_REGISTERS}"
+        raise ValueError(msg)
+    if max_gap < 0:
+        msg = "max_gap must not be negative"
+        raise ValueError(msg)
+
+    spans: list[ReadSpan] = []
+    members: list[Register] = []
+    start = end = 0
+
+    for register in sorted(
+        registers, key=lambda register: (register.register_type, register.address)
+    ):
+        last = register.address + register.width - 1
+        if members and (
+            register.register_type is not members[0].register_type
+            or register.address - end - 1 > max_gap
+            or max(end, last) - start >= max_registers
+        ):
+            spans.append(_build_span(start, end, members))
+            members = []
+        if not members:
+            start = end = register.address
+        end = max(end, last)
+        members.append(register)
+
+    if members:
+        spans.append(_build_span(start, end, members))
+    return spans
+
+
+def _build_span(start: int, end: int, members: list[Register]) -> ReadSpan:
+    """Create a span covering ``start``..``end`` inclusive."""
+    count = end - start + 1
+    return ReadSpan(
+        register_type=members[0].register_type,
+        address=start,
+        count=count,
+        registers=tuple(members),
+        decode=compile_decoder(start, count, members),
+    )
+
+
+async def async_read_spans(
+    client: EG4ApiClient,
+    spans: Iterable[ReadSpan],
+    unit_id: int = 1,
+    on_span: Callable[[ReadSpan, float], None] | None = None,
+    queue: LinkQueue | None = None,
+) -> dict:
+    """
+    Read every span with one request each and return values by key.
+
+    With a ``queue``, each read waits for its own turn on the link so that
+    writes can go out between them. ``on_span`` is called with each span
+    and its latency in seconds once it has been read.
+    """
+    data: dict = {}
+    for span in spans:
+        async with queue.slot() if queue else contextlib.nullcontext():
+            start = time.perf_counter()
+            registers = await client.read_data(
+                span.address, span.count, span.register_type, unit_id
+            )
+        if on_span is not None:
+            on_span(span, time.perf_counter() - start)
+        data.update(span.decode(registers))
+    return data
@@ -0,0 +1,180 @@
+"""Concurrent polling of the devices behind a config entry."""
+
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+
+from .api import EG4ApiClientError
+from .breaker import BreakerState, CircuitBreaker, EG4CircuitOpenError
+from .commands import LinkQueue
+from .planner import async_read_spans
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+    from .api import EG4ApiClient
+    from .metrics import CycleTrace
+    from .planner import ReadSpan
+    from .scheduler import PollScheduler
+
+DEFAULT_UNIT_ID = 1
+
+# Transactions allowed in flight at once on one link. A dongle socket can
+# interleave requests for the units behind it, an RS485 bus cannot.
+TRANSPORT_CONCURRENCY = {
+    "TCP": 4,
+    "RTU": 1,
+}
+
+
+@dataclass(slots=True)
+class PolledDevice:
+    """One Modbus unit and the registers read from it."""
+
+    name: str
+    client: EG4ApiClient
+    scheduler: PollScheduler
+    unit_id: int = DEFAULT_UNIT_ID
+    breaker: CircuitBreaker = field(init=False)
+
+    def __post_init__(self) -> None:
+        """Start with the device's breaker closed."""
+        self.breaker = CircuitBreaker(self.name)
+
+
+class LinkLimiter:
+    """Hand out one request queue per physical link, sized by its transport."""
+
+    def __init__(self, limits: dict[str, int] | None = None) -> None:
+        """Initialize the limiter."""
+        self._limits = TRANSPORT_CONCURRENCY if limits is None else limits
+        self._queues: dict[tuple, LinkQueue] = {}
+
+    def limit(self, client: EG4ApiClient) -> LinkQueue:
+        """Return the queue every transaction on ``client``'s link goes through."""
+        key = client.link_key
+        if (queue := self._queues.get(key)) is None:
+            queue = LinkQueue(
+                self._limits.get(client.connection_type, 1), client.silent_interval
+            )
+            self._queues[key] = queue
+        return queue
+
+
+async def async_poll_device(
+    device: PolledDevice,
+    limiter: LinkLimiter,
+    now: float,
+    trace: CycleTrace | None = None,
+    deadline: float | None = None,
+) -> dict:
+    """
+    Read the register groups of ``device`` that are due at ``now``.
+
+    Each block read gets an equal share of the time left before
+    ``deadline``, in event loop time. A block that fails or runs out of
+    time is skipped and its groups are read again on the next cycle; the
+    device only fails if every block does.
+    """
+    due = device.scheduler.due(now)
+    if not due:
+        return {}
+    on_span = None
+    if trace is not None:
+
+        def on_span(span: ReadSpan, latency: float) -> None:
+            trace.add_span(device.name, span, latency)
+
+    loop = asyncio.get_running_loop()
+    queue = limiter.limit(device.client)
+    spans = device.scheduler.plan(due)
+    data: dict = {}
+    failed: set[str] = set()
+    error: Exception | None = None
+    for index, span in enumerate(spans):
+        budget = None
+        if deadline is not None:
+            budget = max(0.0, deadline - loop.time()) / (len(spans) - index)
+        try:
+            async with asyncio.timeout(budget):
+                # The link stays open between polls and reconnects on demand.
+                data.update(
+                    await async_read_spans(
+                        device.client, (span,), device.unit_id, on_span, queue
+                    )
+                )
+        except (EG4ApiClientError, OSError, TimeoutError) as span_error:
+            error = span_error
+            failed.update(register.key for register in span.registers)
+            if trace is not None:
+                trace.add_failed_span(device.name, span, span_error)
+    if error is not None and not data:
+        raise error
+    device.scheduler.mark_polled(
+        (
+            name
+            for name in due
+            if not any(
+                register.key in failed
+                for register in device.scheduler.groups[name].registers
+            )
+        ),
+        now,
+    )
+    return data
+
+
+async def async_probe_device(device: PolledDevice, limiter: LinkLimiter) -> None:
+    """Read a single register of ``device`` to see whether it answers."""
+    register = next(iter(device.scheduler.register_map.registers.values()))
+    async with limiter.limit(device.client).slot():
+        await device.client.read_data(
+            register.address, 1, register.register_type, device.unit_id
+        )
+
+
+async def async_poll_devices(
+    devices: Iterable[PolledDevice],
+    limiter: LinkLimiter,
+    now: float,
+    budget: float,
+    trace: CycleTrace | None = None,
+) -> dict[str, dict | BaseException]:
+    """
+    Poll every device concurrently.
+
+    Each device gets its own ``budget`` of seconds, shared out between its block
+    reads, so a slow or dead unit only costs its own data and a slow block
+    only its own values. Failures are returned in place of that device's
+    values. A device whose breaker is open is not contacted and fails at
+    once; when the breaker is half open, a probe read goes first. Block
+    reads are recorded in ``trace`` when one is given.
+    """
+
+    async def _poll(device: PolledDevice) -> dict:
+        breaker = device.breaker
+        state = breaker.state_at(now)
+        if state is BreakerState.OPEN:
+            msg = f"{device.name} is not answering"
+            raise EG4CircuitOpenError(msg)
+        deadline = asyncio.get_running_loop().time() + budget
+        try:
+            if state is BreakerState.HALF_OPEN:
+                async with asyncio.timeout_at(deadline):
+                    await async_probe_device(device, limiter)
+            data = await async_poll_device(device, limiter, now, trace, deadline)
+        except (EG4ApiClientError, OSError, TimeoutError):
+            breaker.record_failure(now)
+            raise
+        breaker.record_success()
+        return data
+
+    devices = list(devices)
+    results = await asyncio.gather(
+        *(_poll(device) for device in devices), return_exceptions=True
+    )
+    return {
+        device.name: result for device, result in zip(devices, results, strict=True)
+    }
@@ -0,0 +1,228 @@
+"""Concurrent probing of the local network for EG4 dongles."""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import ipaddress
+import struct
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from .api import DEFAULT_PORT
+from .push import PUSH_PORT, FrameParser, build_read_request
+from .registers import Register, RegisterType, compile_decoder
+from .scheduler import PollTier, RegisterGroup, RegisterMap
+
+if TYPE_CHECKING:
+    from collections.abc import Collection, Iterable, Sequence
+
+PROBE_PORTS = (DEFAULT_PORT, PUSH_PORT)
+PROBE_CONNECT_TIMEOUT = 0.5
+PROBE_READ_TIMEOUT = 1.0
+# The whole scan gives up after this long and reports what it found.
+PROBE_DEADLINE = 5.0
+PROBE_CONCURRENCY = 128
+PROBE_UNIT_ID = 1
+
+# Holding registers 0-6 identify the inverter: its device type, then its
+# serial number as ASCII, two characters a register, first character low.
+IDENTITY_ADDRESS = 0
+IDENTITY_COUNT = 7
+_SERIAL_WORDS = 5
+IDENTITY_REGISTERS = RegisterMap(
+    (
+        RegisterGroup(
+            "identity",
+            PollTier.SLOW,
+            (
+                Register("device_type", 0),
+                *(
+                    Register(f"serial_{index}", 2 + index)
+                    for index in range(_SERIAL_WORDS)
+                ),
+            ),
+        ),
+    )
+)
+_DECODE_IDENTITY = compile_decoder(
+    IDENTITY_ADDRESS, IDENTITY_COUNT, IDENTITY_REGISTERS.registers.values()
+)
+
+# Device type codes and the inverter models offered by the config flow.
+MODEL_CODES = {
+    1: "flexboss21",
+    2: "flexboss18",
+    3: "18kpv",
+    4: "12kpv",
+    5: "12000xp",
+    6: "6000xp",
+    7: "3000ehv",
+    8: "gridboss",
+}
+
+# MBAP header and read holding registers request, big-endian on the wire.
+_MBAP = struct.Struct(">HHHB")
+_READ_HOLDING = 0x03
+
+
+@dataclass(frozen=True, slots=True)
+class DongleIdentity:
+    """An EG4 device that answered a probe."""
+
+    host: str
+    serial_number: str
+    model: str | None
+    ports: frozenset[int]
+
+
+def decode_identity(values: dict) -> tuple[str, str | None] | None:
+    """Return the serial number and model in decoded identity registers."""
+    raw = struct.pack(
+        f"<{_SERIAL_WORDS}H",
+        *(values[f"serial_{index}"] for index in range(_SERIAL_WORDS)),
+    )
+    try:
+        serial = raw.decode("ascii").strip("\x00 ")
+    except UnicodeDecodeError:
+        return None
+    if not serial.isalnum():
+        return None
+    return serial, MODEL_CODES.get(values["device_type"])
+
+
+def _modbus_read_request(address: int, count: int, unit_id: int) -> bytes:
+    """Return a Modbus TCP read holding registers request."""
+    return _MBAP.pack(1, 0, 6, unit_id) + struct.pack(
+        ">BHH", _READ_HOLDING, address, count
+    )
+
+
+async def _async_read_modbus(
+    reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+) -> dict | None:
+    """Read the identity registers over Modbus TCP."""
+    writer.write(_modbus_read_request(IDENTITY_ADDRESS, IDENTITY_COUNT, PROBE_UNIT_ID))
+    header = await reader.readexactly(_MBAP.size)
+    _, protocol, length, _ = _MBAP.unpack(header)
+    body = await reader.readexactly(length - 1)
+    if (
+        protocol != 0
+        or len(body) < 2 + 2 * IDENTITY_COUNT
+        or body[0] != _READ_HOLDING
+        or body[1] != 2 * IDENTITY_COUNT
+    ):
+        return None
+    words = struct.unpack_from(f">{IDENTITY_COUNT}H", body, 2)
+    return _DECODE_IDENTITY(list(words))
+
+
+async def _async_read_dongle(
+    reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+) -> dict | None:
+    """Read the identity registers through the dongle's own protocol."""
+    writer.write(
+        build_read_request(RegisterType.HOLDING, IDENTITY_ADDRESS, IDENTITY_COUNT)
+    )
+    parser = FrameParser(IDENTITY_REGISTERS)
+    # The dongle may push other frames first; wait for the answer.
+    while data := await reader.read(4096):
+        for frame in parser.feed(data):
+            if frame.address == IDENTITY_ADDRESS and frame.count == IDENTITY_COUNT:
+                return frame.values
+    return None
+
+
+async def async_probe_host(
+    host: str,
+    port: int,
+    connect_timeout: float = PROBE_CONNECT_TIMEOUT,
+    read_timeout: float = PROBE_READ_TIMEOUT,
+    dongle_protocol: bool | None = None,
+) -> DongleIdentity | None:
+    """
+    Ask ``host`` on ``port`` who it is, in a single read.
+
+    The read uses the dongle's own protocol when ``dongle_protocol`` is set,
+    which by default it is on port 8000, and Modbus TCP otherwise. Return
+    None if nothing answers in time or the answer is not an EG4 identity.
+    """
+    if dongle_protocol is None:
+        dongle_protocol = port == PUSH_PORT
+    try:
+        async with asyncio.timeout(connect_timeout):
+            reader, writer = await asyncio.open_connection(host, port)
+    except (OSError, TimeoutError):
+        return None
+    try:
+        async with asyncio.timeout(read_timeout):
+            if dongle_protocol:
+                values = await _async_read_dongle(reader, writer)
+            else:
+                values = await _async_read_modbus(reader, writer)
+    except (OSError, TimeoutError, asyncio.IncompleteReadError, struct.error):
+        return None
+    finally:
+        writer.close()
+        with contextlib.suppress(OSError):
+            await writer.wait_closed()
+    if values is None or (identity := decode_identity(values)) is None:
+        return None
+    return DongleIdentity(host, identity[0], identity[1], frozenset((port,)))
+
+
+def subnet_hosts(address: str, prefix: int = 24) -> list[str]:
+    """Return every other host address on ``address``'s subnet."""
+    network = ipaddress.ip_interface(f"{address}/{prefix}").network
+    return [str(host) for host in network.hosts() if str(host) != address]
+
+
+async def async_scan(
+    hosts: Iterable[str],
+    ports: Sequence[int] = PROBE_PORTS,
+    deadline: float = PROBE_DEADLINE,
+    concurrency: int = PROBE_CONCURRENCY,
+    connect_timeout: float = PROBE_CONNECT_TIMEOUT,
+    read_timeout: float = PROBE_READ_TIMEOUT,
+    dongle_ports: Collection[int] = (PUSH_PORT,),
+) -> list[DongleIdentity]:
+    """
+    Probe every host on every port concurrently and return what answered.
+
+    ``dongle_ports`` speak the dongle's own protocol, the rest Modbus TCP.
+    At most ``concurrency`` probes are in flight. Probes still running at
+    the ``deadline`` are abandoned. A device answering on several ports is
+    reported once, with all of them.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def _probe(host: str, port: int) -> DongleIdentity | None:
+        async with semaphore:
+            return await async_probe_host(
+                host, port, connect_timeout, read_timeout, port in dongle_ports
+            )
+
+    tasks = [
+        asyncio.create_task(_probe(host, port)) for host in hosts for port in ports
+    ]
+    if not tasks:
+        return []
+    done, pending = await asyncio.wait(tasks, timeout=deadline)
+    for task in pending:
+        task.cancel()
+    if pending:
+        await asyncio.wait(pending)
+
+    found: dict[str, DongleIdentity] = {}
+    for task in tasks:
+        if task not in done or (identity := task.result()) is None:
+            continue
+        if (known := found.get(identity.host)) is not None:
+            identity = DongleIdentity(
+                known.host,
+                known.serial_number,
+                known.model or identity.model,
+                known.ports | identity.ports,
+            )
+        found[identity.host] = identity
+    return list(found.values())
@@ -0,0 +1,266 @@
+"""Push data stream from the EG4 WiFi dongle."""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import random
+import struct
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any
+
+from pymodbus.framer import FramerRTU
+
+from .const import LOGGER
+from .registers import RegisterType
+
+if TYPE_CHECKING:
+    from collections.abc import Buffer, Callable, Coroutine
+
+    from .scheduler import RegisterMap
+
+PUSH_PORT = 8000
+PUSH_RECONNECT_DELAY = 1.0
+PUSH_RECONNECT_MAX_DELAY = 300.0
+# The dongle sends a heartbeat about every minute; silence for longer means
+# the connection is dead even if the socket has not noticed.
+PUSH_IDLE_TIMEOUT = 180.0
+READ_SIZE = 4096
+
+FRAME_PREFIX = b"\xa1\x1a"
+FUNCTION_HEARTBEAT = 0xC1
+FUNCTION_TRANSLATED_DATA = 0xC2
+
+# Prefix, protocol, frame length (counted after itself), address, function,
+# datalog serial and data length, all little-endian.
+_HEADER = struct.Struct("<2sHHBB10sH")
+# Inside the data: action, device function, inverter serial, first register
+# and byte count of the register values that follow.
+_DATA_HEADER = struct.Struct("<BB10sHB")
+_CRC_SIZE = 2
+# Frame length counts from the address byte; add what comes before it.
+_LENGTH_OFFSET = 6
+
+_DEVICE_FUNCTIONS = {
+    0x03: RegisterType.HOLDING,
+    0x04: RegisterType.INPUT,
+}
+_READ_FUNCTIONS = {
+    register_type: function for function, register_type in _DEVICE_FUNCTIONS.items()
+}
+# A read request's data: action, device function, inverter serial, first
+# register and register count.
+_READ_REQUEST = struct.Struct("<BB10sHH")
+_PROTOCOL = 2
+
+
+def build_read_request(
+    register_type: RegisterType, address: int, count: int, serial: str = ""
+) -> bytes:
+    """
+    Return a frame asking the dongle to read registers from its inverter.
+
+    The dongle answers with a translated data frame like the ones it pushes.
+    An empty ``serial`` addresses whichever inverter is attached.
+    """
+    data = _READ_REQUEST.pack(
+        0, _READ_FUNCTIONS[register_type], serial.encode(), address, count
+    )
+    data += FramerRTU.compute_CRC(data).to_bytes(2, "big")
+    header = _HEADER.pack(
+        FRAME_PREFIX,
+        _PROTOCOL,
+        _HEADER.size - _LENGTH_OFFSET + len(data),
+        1,
+        FUNCTION_TRANSLATED_DATA,
+        b"",
+        len(data),
+    )
+    return header + data
+
+
+@dataclass(slots=True)
+class DongleFrame:
+    """One data frame pushed by the dongle, already decoded."""
+
+    datalog: str
+    serial: str
+    register_type: RegisterType
+    address: int
+    count: int
+    values: dict
+
+
+class FrameParser:
+    """
+    Split the dongle's byte stream into frames and decode them.
+
+    Headers and register values are unpacked in place from the receive
+    buffer, so a frame's payload is never copied before decoding. Frames
+    for blocks the register map has nothing in are dropped after the header.
+    """
+
+    def __init__(self, register_map: RegisterMap) -> None:
+        """Initialize the parser with the map used to decode values."""
+        self._register_map = register_map
+        self._buffer = bytearray()
+        self.heartbeats: list[bytes] = []
+        self.errors = 0
+
+    def feed(self, data: Buffer) -> list[DongleFrame]:
+        """Add received bytes and return the complete data frames in them."""
+        buffer = self._buffer
+        buffer += data
+        frames: list[DongleFrame] = []
+        offset = 0
+        with memoryview(buffer) as view:
+            while True:
+                start = buffer.find(FRAME_PREFIX, offset)
+                if start < 0:
+                    # Keep a trailing byte that may begin the next prefix.
+                    offset = max(offset, len(buffer) - 1)
+                    break
+                if len(buffer) - start < _HEADER.size:
+                    offset = start
+                    break
+                _, _, length, _, function, _, _ = _HEADER.unpack_from(view, start)
+                end = start + _LENGTH_OFFSET + length
+                if end > len(buffer):
+                    offset = start
+                    break
+                offset = end
+                if function == FUNCTION_HEARTBEAT:
+                    self.heartbeats.append(bytes(view[start:end]))
+                elif function == FUNCTION_TRANSLATED_DATA:
+                    frame = self._parse_data(view, start, end)
+                    if frame is not None:
+                        frames.append(frame)
+        del buffer[:offset]
+        return frames
+
+    def _parse_data(self, view: memoryview, start: int, end: int) -> DongleFrame | None:
+        """Decode one translated data frame lying at ``view[start:end]``."""
+        data_start = start + _HEADER.size
+        data_end = end - _CRC_SIZE
+        if data_end - data_start < _DATA_HEADER.size:
+            self.errors += 1
+            return None
+        crc = FramerRTU.compute_CRC(view[data_start:data_end])
+        if crc != int.from_bytes(view[data_end:end], "big"):
+            self.errors += 1
+            return None
+
+        _, _, _, _, _, datalog, _ = _HEADER.unpack_from(view, start)
+        _, function, serial, address, size = _DATA_HEADER.unpack_from(view, data_start)
+        values_start = data_start + _DATA_HEADER.size
+        register_type = _DEVICE_FUNCTIONS.get(function)
+        if register_type is None or values_start + size > data_end:
+            self.errors += 1
+            return None
+        count = size // 2
+        decode = self._register_map.block_decoder(register_type, address, count)
+        if decode is None:
+            return None
+        return DongleFrame(
+            datalog=datalog.decode("ascii", "replace"),
+            serial=serial.decode("ascii", "replace"),
+            register_type=register_type,
+            address=address,
+            count=count,
+            values=decode(view, values_start),
+        )
+
+
+class PushListener:
+    """
+    Keep a connection to the dongle's data port and hand on pushed values.
+
+    ``host`` is called before every connection attempt, so an address found
+    by rediscovery is picked up. Heartbeats are echoed back, as the dongle
+    expects from its server.
+    """
+
+    def __init__(
+        self,
+        host: Callable[[], str | None],
+        register_map: RegisterMap,
+        on_values: Callable[[dict], None],
+        port: int = PUSH_PORT,
+        serial: str | None = None,
+    ) -> None:
+        """Initialize the listener; it does nothing until started."""
+        self._host = host
+        self._register_map = register_map
+        self._on_values = on_values
+        self.port = port
+        self.serial = serial
+        self.frames = 0
+        self.connected = False
+        self._task: asyncio.Task | None = None
+
+    def start(
+        self,
+        create_task: Callable[[Coroutine[Any, Any, None]], asyncio.Task] = (
+            asyncio.create_task
+        ),
+    ) -> None:
+        """
+        Start listening in the background.
+
+        ``create_task`` runs the listening loop; Home Assistant passes one
+        that ties the task to the config entry.
+        """
+        if self._task is None:
+            self._task = create_task(self._async_run())
+
+    async def stop(self) -> None:
+        """Stop listening and close the connection."""
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+    async def _async_run(self) -> None:
+        """Connect, listen until the stream ends, and reconnect with backoff."""
+        failures = 0
+        while True:
+            if (host := self._host()) is not None:
+                try:
+                    await self._async_listen(host)
+                except (OSError, TimeoutError) as exception:
+                    LOGGER.debug("Push stream from %s lost: %s", host, exception)
+                else:
+                    LOGGER.debug("Push stream from %s closed", host)
+                if self.frames:
+                    failures = 0
+            delay = min(PUSH_RECONNECT_MAX_DELAY, PUSH_RECONNECT_DELAY * 2**failures)
+            failures += 1
+            await asyncio.sleep(random.uniform(delay / 2, delay))
+
+    async def _async_listen(self, host: str) -> None:
+        """Read frames from one connection until it ends."""
+        reader, writer = await asyncio.open_connection(host, self.port)
+        parser = FrameParser(self._register_map)
+        self.connected = True
+        self.frames = 0
+        try:
+            while data := await asyncio.wait_for(
+                reader.read(READ_SIZE), PUSH_IDLE_TIMEOUT
+            ):
+                values: dict = {}
+                for frame in parser.feed(data):
+                    if self.serial and frame.serial != self.serial:
+                        continue
+                    values.update(frame.values)
+                    self.frames += 1
+                if parser.heartbeats:
+                    writer.write(b"".join(parser.heartbeats))
+                    parser.heartbeats.clear()
+                if values:
+                    self._on_values(values)
+        finally:
+            self.connected = False
+            writer.close()
+            with contextlib.suppress(OSError):
+                await writer.wait_closed()
@@ -0,0 +1,158 @@
+"""Declarative register schema and block decoding for EG4 Integration."""
+
+from __future__ import annotations
+
+import math
+import struct
+import sys
+from array import array
+from dataclasses import dataclass
+from enum import StrEnum
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Buffer, Callable, Iterable, Sequence
+
+
+class RegisterType(StrEnum):
+    """Modbus register table a value lives in."""
+
+    HOLDING = "holding"
+    INPUT = "input"
+
+
+class DataType(StrEnum):
+    """How the raw register words of a value are interpreted."""
+
+    UINT16 = "uint16"
+    INT16 = "int16"
+    # EG4 sends 32-bit values low word first.
+    UINT32 = "uint32"
+    INT32 = "int32"
+
+
+_STRUCT_CODES = {
+    DataType.UINT16: "H",
+    DataType.INT16: "h",
+    DataType.UINT32: "I",
+    DataType.INT32: "i",
+}
+
+_WIDTHS = {
+    DataType.UINT16: 1,
+    DataType.INT16: 1,
+    DataType.UINT32: 2,
+    DataType.INT32: 2,
+}
+
+
+@dataclass(frozen=True, slots=True)
+class Register:
+    """
+    A single value in the register map.
+
+    ``scale`` multiplies the raw value (0.1 for decivolts), and ``bit``
+    turns the value into a flag read from one bit of the register.
+    """
+
+    key: str
+    address: int
+    data_type: DataType = DataType.UINT16
+    scale: float = 1
+    bit: int | None = None
+    register_type: RegisterType = RegisterType.HOLDING
+
+    @property
+    def width(self) -> int:
+        """Return the number of 16-bit registers the value occupies."""
+        return _WIDTHS[self.data_type]
+
+
+def encode_value(register: Register, value: float, word: int = 0) -> list[int]:
+    """
+    Return the register words holding ``value``, the inverse of decoding.
+
+    A flag is encoded as its own bit set or clear in ``word``, the rest of
+    its register, whose other bits are kept.
+    """
+    if register.bit is not None:
+        mask = 1 << register.bit
+        return [(word & ~mask) | (int(bool(value)) << register.bit)]
+    raw = struct.pack(
+        f"<{_STRUCT_CODES[register.data_type]}", round(value / register.scale)
+    )
+    return list(struct.unpack(f"<{register.width}H", raw))
+
+
+def compile_buffer_decoder(
+    address: int, count: int, registers: Iterable[Register]
+) -> Callable[[Buffer, int], dict]:
+    """
+    Build a decoder for a block of ``count`` registers starting at ``address``.
+
+    The decoder reads the block as little-endian words straight out of any
+    buffer at the given offset. It is unpacked with one precompiled
+    ``struct`` format, with pad bytes over unused registers, and the values
+    are then scaled or masked according to their schema.
+    """
+    slots: dict[tuple[int, DataType], int] = {}
+    fmt = ["<"]
+    position = 0
+    plain: list[tuple[str, int]] = []
+    scaled: list[tuple[str, int, float, int]] = []
+    flags: list[tuple[str, int, int]] = []
+
+    for register in sorted(registers, key=lambda register: register.address):
+        offset = register.address - address
+        slot_key = (offset, register.data_type)
+        if slot_key not in slots:
+            if offset < position:
+                msg = f"Register {register.key} overlaps another value"
+                raise ValueError(msg)
+            if offset > position:
+                fmt.append(f"{(offset - position) * 2}x")
+            fmt.append(_STRUCT_CODES[register.data_type])
+            position = offset + register.width
+            slots[slot_key] = len(slots)
+        slot = slots[slot_key]
+        if register.bit is not None:
+            flags.append((register.key, slot, 1 << register.bit))
+        elif register.scale != 1:
+            digits = max(0, math.ceil(-math.log10(register.scale)))
+            scaled.append((register.key, slot, register.scale, digits))
+        else:
+            plain.append((register.key, slot))
+
+    if position > count:
+        msg = f"Register block at {address} is shorter than its values"
+        raise ValueError(msg)
+    unpack = struct.Struct("".join(fmt)).unpack_from
+
+    def decode(buffer: Buffer, offset: int = 0) -> dict:
+        """Decode one block of little-endian register words."""
+        raw = unpack(buffer, offset)
+        values = {key: raw[slot] for key, slot in plain}
+        for key, slot, scale, digits in scaled:
+            values[key] = round(raw[slot] * scale, digits)
+        for key, slot, mask in flags:
+            values[key] = bool(raw[slot] & mask)
+        return values
+
+    return decode
+
+
+def compile_decoder(
+    address: int, count: int, registers: Iterable[Register]
+) -> Callable[[Sequence[int]], dict]:
+    """Build a decoder for a block of register words as read over Modbus."""
+    decode_buffer = compile_buffer_decoder(address, count, registers)
+    swap = sys.byteorder == "big"
+
+    def decode(words: Sequence[int]) -> dict:
+        """Decode one block of raw register words."""
+        buffer = array("H", words)
+        if swap:
+            buffer.byteswap()
+        return decode_buffer(buffer)
+
+    return decode
@@ -0,0 +1,171 @@
+"""Tiered register polling for EG4 Integration."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from enum import StrEnum
+from typing import TYPE_CHECKING
+
+from .planner import DEFAULT_MAX_GAP, DEFAULT_MAX_REGISTERS, plan_reads
+from .registers import compile_buffer_decoder
+
+if TYPE_CHECKING:
+    from collections.abc import Buffer, Callable, Collection, Iterable
+
+    from .planner import ReadSpan
+    from .registers import Register, RegisterType
+
+
+class PollTier(StrEnum):
+    """How often a group of registers is refreshed."""
+
+    FAST = "fast"
+    MEDIUM = "medium"
+    SLOW = "slow"
+
+
+# Seconds between reads; the fast tier follows the configured polling interval.
+TIER_INTERVALS = {
+    PollTier.MEDIUM: 60,
+    PollTier.SLOW: 600,
+}
+
+
+@dataclass(frozen=True, slots=True)
+class RegisterGroup:
+    """Registers that are always read together at the same rate."""
+
+    name: str
+    tier: PollTier
+    registers: tuple[Register, ...]
+
+
+class RegisterMap:
+    """
+    The register groups of one device model.
+
+    Read plans and their decoders are compiled on first use and shared by
+    every scheduler polling the same map.
+    """
+
+    def __init__(self, groups: Iterable[RegisterGroup]) -> None:
+        """Initialize the map."""
+        self.groups = {group.name: group for group in groups}
+        self.registers = {
+            register.key: register
+            for group in self.groups.values()
+            for register in group.registers
+        }
+        self._plans: dict[tuple[frozenset[str], int, int], list[ReadSpan]] = {}
+        self._block_decoders: dict[
+            tuple[RegisterType, int, int], Callable[[Buffer, int], dict] | None
+        ] = {}
+
+    def plan(
+        self,
+        names: frozenset[str],
+        max_registers: int = DEFAULT_MAX_REGISTERS,
+        max_gap: int = DEFAULT_MAX_GAP,
+    ) -> list[ReadSpan]:
+        """Return the coalesced read plan covering the groups in ``names``."""
+        cache_key = (names, max_registers, max_gap)
+        if (spans := self._plans.get(cache_key)) is None:
+            spans = plan_reads(
+                (
+                    register
+                    for name in names
+                    for register in self.groups[name].registers
+                ),
+                max_registers=max_registers,
+                max_gap=max_gap,
+            )
+            self._plans[cache_key] = spans
+        return spans
+
+    def block_decoder(
+        self, register_type: RegisterType, address: int, count: int
+    ) -> Callable[[Buffer, int], dict] | None:
+        """
+        Return a buffer decoder for the values inside an arbitrary block.
+
+        Used for blocks the device chose to send, such as pushed frames.
+        Returns None if no value of the map lies wholly inside the block.
+        """
+        cache_key = (register_type, address, count)
+        if cache_key not in self._block_decoders:
+            registers = [
+                register
+                for register in self.registers.values()
+                if register.register_type == register_type
+                and address <= register.address
+                and register.address + register.width <= address + count
+            ]
+            self._block_decoders[cache_key] = (
+                compile_buffer_decoder(address, count, registers) if registers else None
+            )
+        return self._block_decoders[cache_key]
+
+
+class PollScheduler:
+    """Decide which register groups are due and plan their reads."""
+
+    def __init__(
+        self,
+        register_map: RegisterMap,
+        fast_interval: float,
+        *,
+        max_registers: int = DEFAULT_MAX_REGISTERS,
+        max_gap: int = DEFAULT_MAX_GAP,
+    ) -> None:
+        """Initialize the scheduler with every group due immediately."""
+        self.register_map = register_map
+        self.intervals = {
+            name: max(fast_interval, TIER_INTERVALS.get(group.tier, 0))
+            for name, group in register_map.groups.items()
+        }
+        # Groups falling due within half a fast cycle are read early rather
+        # than waiting a whole extra cycle because of timer drift.
+        self._tolerance = fast_interval / 2
+        self._max_registers = max_registers
+        self._max_gap = max_gap
+        self._next_due = dict.fromkeys(register_map.groups, 0.0)
+        # Groups none of whose values anyone wants.
+        self.skipped: frozenset[str] = frozenset()
+
+    @property
+    def groups(self) -> dict[str, RegisterGroup]:
+        """Return the scheduled groups by name."""
+        return self.register_map.groups
+
+    def due(self, now: float) -> frozenset[str]:
+        """Return the names of the groups that should be read at ``now``."""
+        return frozenset(
+            name
+            for name, next_due in self._next_due.items()
+            if next_due <= now + self._tolerance and name not in self.skipped
+        )
+
+    def select(self, keys: Collection[str]) -> None:
+        """
+        Read only the groups holding at least one of ``keys`` from now on.
+
+        A group selected again is read on the next cycle.
+        """
+        self.skipped = frozenset(
+            name
+            for name, group in self.register_map.groups.items()
+            if not any(register.key in keys for register in group.registers)
+        )
+
+    def plan(self, names: frozenset[str]) -> list[ReadSpan]:
+        """Return the coalesced read plan covering ``names``."""
+        return self.register_map.plan(names, self._max_registers, self._max_gap)
+
+    def mark_polled(self, names: Iterable[str], now: float) -> None:
+        """Schedule the next read of ``names`` after a successful cycle."""
+        for name in names:
+            self._next_due[name] = now + self.intervals[name]
+
+    def reset(self) -> None:
+        """Make every group due on the next cycle."""
+        self._next_due = dict.fromkeys(self.register_map.groups, 0.0)
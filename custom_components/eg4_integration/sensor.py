@@ -2,36 +2,317 @@
 
 from __future__ import annotations
 
-from typing import TYPE_CHECKING
+import time
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import TYPE_CHECKING, Any
 
-from homeassistant.components.sensor import SensorEntity, SensorEntityDescription
+from homeassistant.components.sensor import (
+    SensorDeviceClass,
+    SensorEntity,
+    SensorEntityDescription,
+    SensorStateClass,
+)
+from homeassistant.const import (
+    PERCENTAGE,
+    EntityCategory,
+    UnitOfEnergy,
+    UnitOfInformation,
+    UnitOfPower,
+    UnitOfTime,
+)
+from homeassistant.core import callback
+from homeassistant.helpers.device_registry import DeviceInfo
 
+from .breaker import BreakerState
+from .const import ATTRIBUTION, DOMAIN
 from .entity import EG4Entity
+from .system import LOAD_POWER
 
 if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    from homeassistant.core import HomeAssistant
+    from homeassistant.helpers.entity_platform import AddEntitiesCallback
+    from homeassistant.helpers.typing import StateType
+
     from .coordinator import EG4DataUpdateCoordinator
     from .data import EG4ConfigEntry
+    from .metrics import PollMetrics, RollingHistogram
+    from .polling import PolledDevice
+    from .system import SystemAggregator
+
+
+@dataclass(frozen=True, kw_only=True)
+class EG4SensorEntityDescription(SensorEntityDescription):
+    """
+    Describes an EG4 sensor.
+
+    Changes smaller than the larger of ``deadband`` and ``deadband_percent``
+    of the last published value are not written to the state machine, unless
+    nothing has been published for ``max_silence``.
+    """
+
+    deadband: float | None = None
+    deadband_percent: float | None = None
+    max_silence: timedelta | None = None
+
+
+_POWER = {
+    "device_class": SensorDeviceClass.POWER,
+    "native_unit_of_measurement": UnitOfPower.WATT,
+    "state_class": SensorStateClass.MEASUREMENT,
+    "deadband": 5,
+    "deadband_percent": 2,
+    "max_silence": timedelta(minutes=5),
+}
+
+# Totals only grow, so holding back increments under 10 Wh loses nothing.
+_ENERGY = {
+    "device_class": SensorDeviceClass.ENERGY,
+    "native_unit_of_measurement": UnitOfEnergy.KILO_WATT_HOUR,
+    "state_class": SensorStateClass.TOTAL_INCREASING,
+    "suggested_display_precision": 2,
+    "deadband": 0.01,
+    "max_silence": timedelta(minutes=15),
+}
 
 ENTITY_DESCRIPTIONS = (
-    SensorEntityDescription(
+    EG4SensorEntityDescription(
         key="battery_status",
         name="Battery Status",
         icon="mdi:battery",
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
     ),
-    SensorEntityDescription(
+    EG4SensorEntityDescription(
         key="charge_level",
         name="Charge Level",
         icon="mdi:battery-charging",
+        device_class=SensorDeviceClass.BATTERY,
+        native_unit_of_measurement=PERCENTAGE,
+        state_class=SensorStateClass.MEASUREMENT,
+        deadband=1,
+        max_silence=timedelta(minutes=15),
     ),
-    SensorEntityDescription(
+    EG4SensorEntityDescription(
         key="inverter_performance",
         name="Inverter Performance",
         icon="mdi:flash",
+        **_POWER,
+    ),
+    EG4SensorEntityDescription(
+        key="grid_power",
+        name="Grid Power",
+        icon="mdi:transmission-tower",
+        **_POWER,
+    ),
+    EG4SensorEntityDescription(
+        key="battery_power",
+        name="Battery Power",
+        icon="mdi:battery-charging",
+        **_POWER,
     ),
-    SensorEntityDescription(
+    EG4SensorEntityDescription(
+        key="pv_energy",
+        name="PV Energy",
+        icon="mdi:solar-power",
+        **_ENERGY,
+    ),
+    EG4SensorEntityDescription(
+        key="grid_import_energy",
+        name="Grid Import Energy",
+        icon="mdi:transmission-tower-import",
+        **_ENERGY,
+    ),
+    EG4SensorEntityDescription(
+        key="grid_export_energy",
+        name="Grid Export Energy",
+        icon="mdi:transmission-tower-export",
+        **_ENERGY,
+    ),
+    EG4SensorEntityDescription(
+        key="battery_charge_energy",
+        name="Battery Charge Energy",
+        icon="mdi:battery-arrow-up",
+        **_ENERGY,
+    ),
+    EG4SensorEntityDescription(
+        key="battery_discharge_energy",
+        name="Battery Discharge Energy",
+        icon="mdi:battery-arrow-down",
+        **_ENERGY,
+    ),
+    EG4SensorEntityDescription(
         key="gridboss_status",
         name="GridBoss Status",
         icon="mdi:server",
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+    ),
+)
+
+
+@dataclass(frozen=True, kw_only=True)
+class EG4MetricSensorEntityDescription(SensorEntityDescription):
+    """Describes a sensor showing the coordinator's poll-cycle metrics."""
+
+    value_fn: Callable[[PollMetrics], StateType]
+    attributes_fn: Callable[[PollMetrics], dict] | None = None
+
+
+def _median_ms(histogram: RollingHistogram) -> float | None:
+    """Return the median of ``histogram`` in milliseconds."""
+    value = histogram.percentile(50)
+    return None if value is None else round(value * 1000, 1)
+
+
+def _last_cycle(metrics: PollMetrics, name: str) -> int | None:
+    """Return one link statistic of the most recent cycle."""
+    return None if metrics.last is None else getattr(metrics.last.link, name)
+
+
+_TIMING = {
+    "device_class": SensorDeviceClass.DURATION,
+    "native_unit_of_measurement": UnitOfTime.MILLISECONDS,
+    "state_class": SensorStateClass.MEASUREMENT,
+    "entity_category": EntityCategory.DIAGNOSTIC,
+    "entity_registry_enabled_default": False,
+}
+
+METRIC_DESCRIPTIONS = (
+    EG4MetricSensorEntityDescription(
+        key="poll_cycle_time",
+        name="Poll Cycle Time",
+        icon="mdi:timer-outline",
+        value_fn=lambda metrics: _median_ms(metrics.cycle_time),
+        attributes_fn=lambda metrics: metrics.cycle_time.summary(),
+        **_TIMING,
+    ),
+    EG4MetricSensorEntityDescription(
+        key="read_latency",
+        name="Read Latency",
+        icon="mdi:timer-outline",
+        value_fn=lambda metrics: _median_ms(metrics.span_latency),
+        attributes_fn=lambda metrics: metrics.span_latency.summary(),
+        **_TIMING,
+    ),
+    EG4MetricSensorEntityDescription(
+        key="connect_time",
+        name="Connect Time",
+        icon="mdi:lan-connect",
+        value_fn=lambda metrics: _median_ms(metrics.connect_time),
+        attributes_fn=lambda metrics: metrics.connect_time.summary(),
+        **_TIMING,
+    ),
+    EG4MetricSensorEntityDescription(
+        key="registers_per_cycle",
+        name="Registers per Cycle",
+        icon="mdi:counter",
+        state_class=SensorStateClass.MEASUREMENT,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        value_fn=lambda metrics: _last_cycle(metrics, "registers"),
+    ),
+    EG4MetricSensorEntityDescription(
+        key="bytes_per_cycle",
+        name="Bytes per Cycle",
+        icon="mdi:swap-horizontal",
+        device_class=SensorDeviceClass.DATA_SIZE,
+        native_unit_of_measurement=UnitOfInformation.BYTES,
+        state_class=SensorStateClass.MEASUREMENT,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        value_fn=lambda metrics: (
+            None
+            if metrics.last is None
+            else metrics.last.link.bytes_sent + metrics.last.link.bytes_received
+        ),
+    ),
+    EG4MetricSensorEntityDescription(
+        key="poll_retries",
+        name="Poll Retries",
+        icon="mdi:replay",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        value_fn=lambda metrics: metrics.totals.retries,
+    ),
+    EG4MetricSensorEntityDescription(
+        key="poll_timeouts",
+        name="Poll Timeouts",
+        icon="mdi:timer-alert-outline",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        value_fn=lambda metrics: metrics.totals.timeouts,
+    ),
+    EG4MetricSensorEntityDescription(
+        key="data_source",
+        name="Data Source",
+        icon="mdi:source-branch",
+        entity_category=EntityCategory.DIAGNOSTIC,
+        value_fn=lambda metrics: None if metrics.last is None else metrics.last.source,
+    ),
+)
+
+_BREAKER = {
+    "device_class": SensorDeviceClass.ENUM,
+    "options": [state.value for state in BreakerState],
+    "entity_category": EntityCategory.DIAGNOSTIC,
+}
+
+# Whether each polled device is answering, by device name.
+BREAKER_DESCRIPTIONS = {
+    "inverter": SensorEntityDescription(
+        key="inverter_link",
+        name="Inverter Link",
+        icon="mdi:lan-connect",
+        **_BREAKER,
+    ),
+    "gridboss": SensorEntityDescription(
+        key="gridboss_link",
+        name="GridBoss Link",
+        icon="mdi:lan-connect",
+        **_BREAKER,
+    ),
+}
+
+# Totals across every inverter, on the system device.
+SYSTEM_DESCRIPTIONS = (
+    EG4SensorEntityDescription(
+        key="pv_power",
+        name="System PV Power",
+        icon="mdi:solar-power",
+        **_POWER,
+    ),
+    EG4SensorEntityDescription(
+        key="grid_power",
+        name="System Grid Power",
+        icon="mdi:transmission-tower",
+        **_POWER,
+    ),
+    EG4SensorEntityDescription(
+        key="battery_power",
+        name="System Battery Power",
+        icon="mdi:battery-charging",
+        **_POWER,
+    ),
+    EG4SensorEntityDescription(
+        key=LOAD_POWER,
+        name="System Load Power",
+        icon="mdi:home-lightning-bolt",
+        **_POWER,
+    ),
+    *(
+        EG4SensorEntityDescription(
+            key=description.key,
+            name=f"System {description.name}",
+            icon=description.icon,
+            **_ENERGY,
+        )
+        for description in ENTITY_DESCRIPTIONS
+        if description.state_class == SensorStateClass.TOTAL_INCREASING
     ),
 )
 
@@ -41,32 +322,220 @@ async def async_setup_entry(
     entry: EG4ConfigEntry,
     async_add_entities: AddEntitiesCallback,
 ) -> None:
-    """Set up the sensor platform."""
-    coordinator: EG4DataUpdateCoordinator = hass.data[DOMAIN][entry.entry_id]
-
+    """Set up sensors for the values the device exposes, and the system totals."""
+    coordinator = entry.runtime_data.coordinator
     async_add_entities(
-        EG4Sensor(
-            coordinator=entry.runtime_data.coordinator,
-            description=entity_description,
-        )
-        for entity_description in ENTITY_DESCRIPTIONS
+        [
+            *(
+                EG4Sensor(coordinator=coordinator, description=entity_description)
+                for entity_description in ENTITY_DESCRIPTIONS
+                if entity_description.key in coordinator.available_keys
+            ),
+            *(
+                EG4MetricSensor(coordinator=coordinator, description=entity_description)
+                for entity_description in METRIC_DESCRIPTIONS
+            ),
+            *(
+                EG4BreakerSensor(
+                    coordinator=coordinator,
+                    device=device,
+                    description=BREAKER_DESCRIPTIONS[device.name],
+                )
+                for device in coordinator.devices
+            ),
+        ]
+    )
+    if (system := entry.runtime_data.system) is None:
+        return
+    system.async_register_platform(
+        entry.entry_id,
+        async_add_entities,
+        lambda: [
+            EG4SystemSensor(system=system, description=entity_description)
+            for entity_description in SYSTEM_DESCRIPTIONS
+        ],
     )
 
 
 class EG4Sensor(EG4Entity, SensorEntity):
     """Representation of a Sensor."""
 
+    entity_description: EG4SensorEntityDescription
+
     def __init__(
         self,
         coordinator: EG4DataUpdateCoordinator,
-        description: SensorEntityDescription,
+        description: EG4SensorEntityDescription,
     ) -> None:
         """Initialize the sensor class."""
+        super().__init__(coordinator, description.key)
+        self.entity_description = description
+        self._attr_unique_id = f"{coordinator.config_entry.entry_id}_{description.key}"
+        self._publish(self.raw_value)
+
+    @property
+    def raw_value(self) -> Any:
+        """Return the latest value read, whether or not it was published."""
+        return (self.coordinator.data or {}).get(self.entity_description.key)
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """
+        Write state only for significant changes or when the heartbeat is due.
+
+        Turning stale, fresh or unavailable is always written.
+        """
+        value = self.raw_value
+        stale = self.coordinator.is_stale(self.entity_description.key)
+        if (
+            self.coordinator.last_update_success
+            and self._published_stale == stale
+            and self._published_available == self.available
+            and not self._is_significant(value)
+        ):
+            return
+        self._publish(value)
+        super()._handle_coordinator_update()
+
+    def _publish(self, value: Any) -> None:
+        """Make ``value`` the published state."""
+        self._attr_native_value = value
+        self._published_at = time.monotonic()
+        self._published_stale = self.coordinator.is_stale(self.entity_description.key)
+        self._published_available = self.available
+
+    def _is_significant(self, value: Any) -> bool:
+        """Return True if ``value`` differs enough from the published state."""
+        description = self.entity_description
+        previous = self._attr_native_value
+        if value == previous:
+            return False
+        if (
+            description.deadband is None and description.deadband_percent is None
+        ) or not (isinstance(value, int | float) and isinstance(previous, int | float)):
+            return True
+        if (
+            description.max_silence is not None
+            and time.monotonic() - self._published_at
+            >= description.max_silence.total_seconds()
+        ):
+            return True
+        threshold = max(
+            description.deadband or 0,
+            abs(previous) * (description.deadband_percent or 0) / 100,
+        )
+        return abs(value - previous) >= threshold
+
+
+class EG4MetricSensor(EG4Entity, SensorEntity):
+    """A diagnostic sensor fed by the coordinator's poll-cycle metrics."""
+
+    entity_description: EG4MetricSensorEntityDescription
+
+    def __init__(
+        self,
+        coordinator: EG4DataUpdateCoordinator,
+        description: EG4MetricSensorEntityDescription,
+    ) -> None:
+        """Initialize the sensor class; it is updated after every cycle."""
         super().__init__(coordinator)
         self.entity_description = description
         self._attr_unique_id = f"{coordinator.config_entry.entry_id}_{description.key}"
 
     @property
-    def native_value(self):
-        """Return the native value from the coordinator data."""
-        return self.coordinator.data.get(self.entity_description.key)
+    def available(self) -> bool:
+        """Stay available while polling fails, to show why."""
+        return True
+
+    @property
+    def native_value(self) -> StateType:
+        """Return the metric."""
+        return self.entity_description.value_fn(self.coordinator.metrics)
+
+    @property
+    def extra_state_attributes(self) -> dict | None:
+        """Return the histogram summary behind the metric."""
+        if self.entity_description.attributes_fn is None:
+            return None
+        return self.entity_description.attributes_fn(self.coordinator.metrics)
+
+
+class EG4BreakerSensor(EG4Entity, SensorEntity):
+    """A diagnostic sensor showing the state of one device's circuit breaker."""
+
+    def __init__(
+        self,
+        coordinator: EG4DataUpdateCoordinator,
+        device: PolledDevice,
+        description: SensorEntityDescription,
+    ) -> None:
+        """Initialize the sensor class; it is updated after every cycle."""
+        super().__init__(coordinator)
+        self.entity_description = description
+        self._attr_unique_id = f"{coordinator.config_entry.entry_id}_{description.key}"
+        self._device = device
+
+    @property
+    def available(self) -> bool:
+        """Stay available while polling fails, to show why."""
+        return True
+
+    @property
+    def native_value(self) -> str:
+        """Return whether the device is polled, skipped or probed."""
+        return self._device.breaker.state
+
+    @property
+    def extra_state_attributes(self) -> dict:
+        """Return the failures in a row and the outages seen."""
+        breaker = self._device.breaker
+        return {"failures": breaker.failures, "trips": breaker.trips}
+
+
+class EG4SystemSensor(SensorEntity):
+    """A total across every inverter of the site."""
+
+    _attr_attribution = ATTRIBUTION
+    _attr_should_poll = False
+
+    def __init__(
+        self, system: SystemAggregator, description: EG4SensorEntityDescription
+    ) -> None:
+        """Initialize the sensor class; it is updated when its total moves."""
+        self.entity_description = description
+        self._system = system
+        self._attr_unique_id = f"system_{system.system_id}_{description.key}"
+        self._attr_device_info = DeviceInfo(
+            identifiers={(DOMAIN, f"system_{system.system_id}")},
+            name=f"EG4 System {system.system_id}",
+            manufacturer="EG4 Electronics",
+        )
+
+    async def async_added_to_hass(self) -> None:
+        """Follow the total."""
+        self.async_on_remove(
+            self._system.async_add_listener(
+                self.entity_description.key, self.async_write_ha_state
+            )
+        )
+
+    @property
+    def available(self) -> bool:
+        """Return True while at least one inverter counts towards the total."""
+        return self._system.contributors(self.entity_description.key) > 0
+
+    @property
+    def native_value(self) -> float | None:
+        """Return the total."""
+        value = self._system.value(self.entity_description.key)
+        if value is None:
+            return None
+        return round(value, 4 if self.device_class == SensorDeviceClass.ENERGY else 1)
+
+    @property
+    def extra_state_attributes(self) -> dict:
+        """Return how many of the inverters count towards the total."""
+        return {
+            "members": self._system.contributors(self.entity_description.key),
+            "members_total": len(self._system.members),
+        }
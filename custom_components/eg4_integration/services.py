@@ -0,0 +1,74 @@
+"""Services for EG4 Integration."""
+
+from __future__ import annotations
+
+import time
+from typing import TYPE_CHECKING
+
+import voluptuous as vol
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant.core import SupportsResponse
+from homeassistant.exceptions import ServiceValidationError
+from homeassistant.helpers import config_validation as cv
+
+from .const import DOMAIN
+from .history import RING_SIZE
+
+if TYPE_CHECKING:
+    from homeassistant.core import HomeAssistant, ServiceCall, ServiceResponse
+
+SERVICE_GET_SAMPLES = "get_samples"
+ATTR_CONFIG_ENTRY_ID = "config_entry_id"
+ATTR_KEYS = "keys"
+ATTR_SECONDS = "seconds"
+
+GET_SAMPLES_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_CONFIG_ENTRY_ID): cv.string,
+        vol.Optional(ATTR_KEYS): vol.All(cv.ensure_list, [cv.string]),
+        vol.Optional(ATTR_SECONDS, default=300): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=RING_SIZE)
+        ),
+    }
+)
+
+
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the integration's services."""
+
+    async def _async_get_samples(call: ServiceCall) -> ServiceResponse:
+        """Return the recent raw samples and five-minute aggregates."""
+        entry = hass.config_entries.async_get_entry(call.data[ATTR_CONFIG_ENTRY_ID])
+        if (
+            entry is None
+            or entry.domain != DOMAIN
+            or entry.state is not ConfigEntryState.LOADED
+        ):
+            raise ServiceValidationError(
+                translation_domain=DOMAIN, translation_key="entry_not_loaded"
+            )
+        history = entry.runtime_data.coordinator.history
+        keys = call.data.get(ATTR_KEYS) or sorted(history.rings)
+        since = time.time() - call.data[ATTR_SECONDS]
+        return {
+            "samples": {
+                key: [list(sample) for sample in history.window(key, since)]
+                for key in keys
+            },
+            "aggregates": {
+                key: [
+                    aggregate.as_dict()
+                    for aggregate in history.aggregates(key)
+                    if aggregate.start >= since
+                ]
+                for key in keys
+            },
+        }
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_GET_SAMPLES,
+        _async_get_samples,
+        schema=GET_SAMPLES_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
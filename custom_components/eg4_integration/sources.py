@@ -0,0 +1,162 @@
+"""Arbitration between the paths the data can arrive over."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from .const import LOGGER
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+    from datetime import datetime
+
+SOURCE_LOCAL = "local"
+SOURCE_PUSH = "push"
+SOURCE_CLOUD = "cloud"
+
+# How old a source's data typically is when it arrives, on top of the time
+# taken to fetch it. The cloud only hears from the dongle every few minutes.
+SOURCE_STALENESS = {
+    SOURCE_LOCAL: 0.0,
+    SOURCE_PUSH: 0.0,
+    SOURCE_CLOUD: 300.0,
+}
+# Weight of the newest sample in a source's running latency.
+LATENCY_SMOOTHING = 0.2
+# A source that keeps failing is retried after this long, doubling up to
+# the maximum, so a dead link does not cost a timeout every cycle.
+PROBE_INTERVAL = 30.0
+PROBE_MAX_INTERVAL = 600.0
+
+
+@dataclass(slots=True, frozen=True)
+class ValueSource:
+    """Where a value came from and when it arrived."""
+
+    source: str
+    updated: datetime
+
+
+@dataclass(slots=True)
+class SourceHealth:
+    """Running record of one source's latency and failures."""
+
+    name: str
+    staleness: float = 0.0
+    latency: float | None = None
+    failures: int = 0
+    retry_at: float = 0.0
+    successes: int = 0
+
+    @property
+    def healthy(self) -> bool:
+        """Return True if the last attempt on this source succeeded."""
+        return not self.failures
+
+    @property
+    def cost(self) -> float:
+        """Return the expected age of fresh data from this source, in seconds."""
+        return self.staleness + (self.latency or 0.0)
+
+
+class SourceArbiter:
+    """
+    Pick the source each poll cycle fetches from.
+
+    Healthy sources are ranked by how fresh their data is on arrival: their
+    typical staleness plus their running latency. A source that fails drops
+    behind every healthy one until its retry time has passed. It is then
+    tried in its usual place again, ahead of the sources standing in for it,
+    so a source that has recovered takes over on the first cycle it answers.
+    """
+
+    def __init__(
+        self,
+        sources: Iterable[str],
+        probe_interval: float = PROBE_INTERVAL,
+        max_probe_interval: float = PROBE_MAX_INTERVAL,
+    ) -> None:
+        """Initialize the arbiter with every source untried and healthy."""
+        self.sources = {
+            name: SourceHealth(name, SOURCE_STALENESS.get(name, 0.0))
+            for name in sources
+        }
+        self.probe_interval = probe_interval
+        self.max_probe_interval = max_probe_interval
+        self.active: str | None = None
+        self.switches = 0
+
+    def ranked(self) -> list[SourceHealth]:
+        """Return the sources, best first."""
+        return sorted(
+            self.sources.values(), key=lambda health: (not health.healthy, health.cost)
+        )
+
+    def candidates(self, now: float) -> list[str]:
+        """
+        Return the sources to try at ``now``, in order.
+
+        Sources waiting out a retry are left out, and the rest are tried
+        cheapest first, whether or not they failed last time. If every source
+        is waiting, the one due soonest is tried anyway, so a cycle never
+        gives up untried.
+        """
+        ranked = self.ranked()
+        due = sorted(
+            (health for health in ranked if health.retry_at <= now),
+            key=lambda health: health.cost,
+        )
+        if not due:
+            return [min(ranked, key=lambda health: health.retry_at).name]
+        return [health.name for health in due]
+
+    def record_success(self, name: str, latency: float) -> None:
+        """Record a successful fetch from ``name`` that took ``latency``."""
+        health = self.sources[name]
+        health.latency = (
+            latency
+            if health.latency is None
+            else health.latency + LATENCY_SMOOTHING * (latency - health.latency)
+        )
+        health.failures = 0
+        health.retry_at = 0.0
+        health.successes += 1
+        if self.active != name:
+            if self.active is not None:
+                LOGGER.info("Switching data source from %s to %s", self.active, name)
+                self.switches += 1
+            self.active = name
+
+    def record_failure(self, name: str, now: float) -> None:
+        """Record a failed fetch from ``name`` at ``now``."""
+        health = self.sources[name]
+        health.failures += 1
+        # One failure may be a glitch; retry next cycle before backing off.
+        if health.failures > 1:
+            health.retry_at = now + min(
+                self.max_probe_interval,
+                self.probe_interval * 2 ** (health.failures - 2),
+            )
+
+    def as_dict(self) -> dict:
+        """Return the arbiter's state in a JSON-friendly form."""
+        return {
+            "active": self.active,
+            "switches": self.switches,
+            "sources": [
+                {
+                    "name": health.name,
+                    "healthy": health.healthy,
+                    "latency_ms": (
+                        None
+                        if health.latency is None
+                        else round(health.latency * 1000, 1)
+                    ),
+                    "staleness": health.staleness,
+                    "failures": health.failures,
+                    "successes": health.successes,
+                }
+                for health in self.ranked()
+            ],
+        }
@@ -0,0 +1,127 @@
+"""Import of hourly aggregates into Home Assistant long-term statistics."""
+
+from __future__ import annotations
+
+from functools import partial
+from typing import TYPE_CHECKING
+
+from homeassistant.components.recorder import get_instance
+from homeassistant.components.recorder.models import StatisticData, StatisticMetaData
+from homeassistant.components.recorder.statistics import (
+    async_add_external_statistics,
+    get_last_statistics,
+)
+from homeassistant.components.sensor import SensorStateClass
+from homeassistant.core import callback
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN
+from .energy import ENERGY_CHANNELS
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+    from homeassistant.components.sensor import SensorEntityDescription
+    from homeassistant.core import HomeAssistant
+
+    from .history import Aggregate
+
+
+class StatisticsImporter:
+    """
+    Write hourly mean, minimum and maximum of measured values as statistics.
+
+    The hours are computed from every raw sample, however few of them the
+    entities publish, and go in as external statistics of this entry.
+    Energy totals go in as hourly sums, including hours filled in after a
+    gap.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        entry_id: str,
+        descriptions: Iterable[SensorEntityDescription],
+    ) -> None:
+        """Initialize the importer for the measured values and energy totals."""
+        self.hass = hass
+        summed = {channel.key for channel in ENERGY_CHANNELS}
+        self._metadata = {
+            description.key: StatisticMetaData(
+                has_mean=description.key not in summed,
+                has_sum=description.key in summed,
+                name=str(description.name),
+                source=DOMAIN,
+                statistic_id=f"{DOMAIN}:{entry_id.lower()}_{description.key}",
+                unit_of_measurement=description.native_unit_of_measurement,
+            )
+            for description in descriptions
+            if description.state_class == SensorStateClass.MEASUREMENT
+            or description.key in summed
+        }
+
+    def statistic_id(self, key: str) -> str | None:
+        """Return the statistic ``key`` is imported as, if any."""
+        metadata = self._metadata.get(key)
+        return None if metadata is None else metadata["statistic_id"]
+
+    @callback
+    def async_import(self, hourly: dict[str, list[Aggregate]]) -> None:
+        """Queue the completed hours for the recorder, if it is running."""
+        if "recorder" not in self.hass.config.components:
+            return
+        for key, hours in hourly.items():
+            if (metadata := self._metadata.get(key)) is None or metadata["has_sum"]:
+                continue
+            async_add_external_statistics(
+                self.hass,
+                metadata,
+                [
+                    StatisticData(
+                        start=dt_util.utc_from_timestamp(hour.start),
+                        mean=hour.mean,
+                        min=hour.min,
+                        max=hour.max,
+                    )
+                    for hour in hours
+                ],
+            )
+
+    async def async_import_sums(
+        self, rows: dict[str, list[tuple[float, float]]]
+    ) -> None:
+        """
+        Import closed hourly sums of energy totals in one batch per total.
+
+        Hours already in the database are left alone, so a batch replayed
+        after a restart adds nothing twice.
+        """
+        if "recorder" not in self.hass.config.components:
+            return
+        recorder = get_instance(self.hass)
+        for key, sums in rows.items():
+            if (metadata := self._metadata.get(key)) is None or not metadata["has_sum"]:
+                continue
+            statistic_id = metadata["statistic_id"]
+            last = await recorder.async_add_executor_job(
+                partial(
+                    get_last_statistics,
+                    self.hass,
+                    1,
+                    statistic_id,
+                    convert_units=True,
+                    types={"sum"},
+                )
+            )
+            last_start = (
+                last[statistic_id][0]["start"] if last.get(statistic_id) else None
+            )
+            new = [
+                StatisticData(
+                    start=dt_util.utc_from_timestamp(start), state=total, sum=total
+                )
+                for start, total in sums
+                if last_start is None or start > last_start
+            ]
+            if new:
+                async_add_external_statistics(self.hass, metadata, new)
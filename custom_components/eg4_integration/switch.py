@@ -5,7 +5,9 @@ from __future__ import annotations
 from typing import TYPE_CHECKING, Any
 
 from homeassistant.components.switch import SwitchEntity, SwitchEntityDescription
+from homeassistant.exceptions import HomeAssistantError
 
+from .api import EG4ApiClientError
 from .entity import EG4Entity
 
 if TYPE_CHECKING:
@@ -34,12 +36,13 @@ async def async_setup_entry(
     entry: EG4ConfigEntry,
     async_add_entities: AddEntitiesCallback,
 ) -> None:
-    """Set up switches based on a config entry."""
-    coordinator: EG4DataUpdateCoordinator = hass.data[DOMAIN][entry.entry_id]
+    """Set up switches for the settings the device exposes."""
+    coordinator = entry.runtime_data.coordinator
 
     async_add_entities(
         EG4Switch(coordinator, description)
         for description in ENTITY_DESCRIPTIONS
+        if description.key in coordinator.available_keys
     )
 
 
@@ -52,7 +55,7 @@ class EG4Switch(EG4Entity, SwitchEntity):
         description: SwitchEntityDescription,
     ) -> None:
         """Initialize the switch class."""
-        super().__init__(coordinator)
+        super().__init__(coordinator, description.key)
         self.entity_description = description
         self._attr_unique_id = f"{coordinator.config_entry.entry_id}_{description.key}"
 
@@ -61,12 +64,18 @@ class EG4Switch(EG4Entity, SwitchEntity):
         """Return true if the switch is on."""
         return self.coordinator.data.get(self.entity_description.key)
 
-    async def async_turn_on(self, **kwargs: Any) -> None:
+    async def async_turn_on(self, **kwargs: Any) -> None:  # noqa: ARG002
         """Turn the switch on."""
-        await self.coordinator.api_client.write_register(MODBUS_MAP[self.entity_description.key], 1)
-        self.async_write_ha_state()
+        await self._async_set(value=True)
 
-    async def async_turn_off(self, **kwargs: Any) -> None:
+    async def async_turn_off(self, **kwargs: Any) -> None:  # noqa: ARG002
         """Turn the switch off."""
-        await self.coordinator.api_client.write_register(MODBUS_MAP[self.entity_description.key], 0)
-        self.async_write_ha_state()
+        await self._async_set(value=False)
+
+    async def _async_set(self, *, value: bool) -> None:
+        """Write the setting; the coordinator updates the state."""
+        try:
+            await self.coordinator.async_write(self.entity_description.key, value)
+        except EG4ApiClientError as exception:
+            msg = f"Error setting {self.entity_description.name}: {exception}"
+            raise HomeAssistantError(msg) from exception
@@ -0,0 +1,240 @@
+"""Totals across the paralleled inverters of a site."""
+
+from __future__ import annotations
+
+import asyncio
+from functools import partial
+from typing import TYPE_CHECKING
+
+from homeassistant.core import callback
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN
+from .energy import ENERGY_CHANNELS
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    from homeassistant.core import CALLBACK_TYPE, HomeAssistant
+    from homeassistant.helpers.entity import Entity
+    from homeassistant.helpers.entity_platform import AddEntitiesCallback
+
+    from .coordinator import EG4DataUpdateCoordinator
+
+# System power values and the member value each one sums.
+POWER_SUMS = {
+    "pv_power": "inverter_performance",
+    "grid_power": "grid_power",
+    "battery_power": "battery_power",
+}
+# Energy totals sum the member totals of the same name.
+ENERGY_SUMS = {channel.key: channel.key for channel in ENERGY_CHANNELS}
+LOAD_POWER = "load_power"
+# Paralleled inverters only need system totals from the second member on.
+MIN_MEMBERS = 2
+SYSTEM_STORE_VERSION = 1
+# Energy shares are saved at most this often.
+SYSTEM_SAVE_DELAY = 60
+
+
+def _number(value: object) -> float | None:
+    """Return ``value`` if it is a number that can be summed."""
+    if isinstance(value, int | float) and not isinstance(value, bool):
+        return value
+    return None
+
+
+class SystemAggregator:
+    """
+    Running sums of the members' power and energy values.
+
+    The aggregator subscribes to each member coordinator once per summed
+    value, so it only hears about values that changed and each change costs
+    one subtraction and one addition. A member's power stops counting once
+    its value is too old to show, and counts again when it is read. Energy
+    totals keep a stale or unloaded member's last total, so the sums never
+    go down.
+
+    Load power has no register of its own: each member's load is its PV
+    power plus grid import less battery charging, and the system load is
+    the sum of those.
+
+    The system entities are added by one member's sensor platform, and move
+    to another member's when that entry is unloaded. The energy shares are
+    saved in ``store`` when one is given, so a member that is unloaded or
+    removed still counts after a restart.
+    """
+
+    def __init__(self, system_id: str = "", store: Store | None = None) -> None:
+        """Initialize the system called ``system_id`` with no members."""
+        self.system_id = system_id
+        self._store = store
+        self._load_lock = asyncio.Lock()
+        self._loaded = store is None
+        self.members: dict[str, EG4DataUpdateCoordinator] = {}
+        keys = (*POWER_SUMS, *ENERGY_SUMS, LOAD_POWER)
+        self.totals: dict[str, float] = dict.fromkeys(keys, 0.0)
+        self._values: dict[str, dict[str, float]] = {key: {} for key in keys}
+        self._unsubscribe: dict[str, list[CALLBACK_TYPE]] = {}
+        self._listeners: dict[str, list[CALLBACK_TYPE]] = {key: [] for key in keys}
+        # Each member's sensor platform and how to create the entities with it.
+        self._platforms: dict[
+            str, tuple[AddEntitiesCallback, Callable[[], list[Entity]]]
+        ] = {}
+        self._host: str | None = None
+
+    async def async_load(self) -> None:
+        """Restore the energy shares saved by the last run, once."""
+        async with self._load_lock:
+            if self._loaded:
+                return
+            self._loaded = True
+            saved = await self._store.async_load() or {}
+        for key, shares in saved.get("energy", {}).items():
+            if key not in ENERGY_SUMS:
+                continue
+            for entry_id, value in shares.items():
+                if entry_id not in self._values[key]:
+                    self._set(key, entry_id, value)
+
+    def _energy_data(self) -> dict:
+        """Return the energy shares to save."""
+        return {
+            "energy": {
+                key: dict(shares)
+                for key in ENERGY_SUMS
+                if (shares := self._values[key])
+            }
+        }
+
+    def value(self, key: str) -> float | None:
+        """Return the system total of ``key``, or None if no member counts."""
+        return self.totals[key] if self._values[key] else None
+
+    def contributors(self, key: str) -> int:
+        """Return how many members count towards ``key``."""
+        return len(self._values[key])
+
+    @callback
+    def async_add_listener(
+        self, key: str, update_callback: CALLBACK_TYPE
+    ) -> CALLBACK_TYPE:
+        """Call ``update_callback`` whenever the total of ``key`` changes."""
+        self._listeners[key].append(update_callback)
+
+        @callback
+        def remove() -> None:
+            self._listeners[key].remove(update_callback)
+
+        return remove
+
+    @callback
+    def async_add_member(
+        self, entry_id: str, coordinator: EG4DataUpdateCoordinator
+    ) -> None:
+        """Start summing the values of ``coordinator``."""
+        self.members[entry_id] = coordinator
+        self._unsubscribe[entry_id] = [
+            coordinator.async_add_listener(
+                partial(self._async_member_updated, entry_id, key), key
+            )
+            for key in (*POWER_SUMS.values(), *ENERGY_SUMS.values())
+            if key in coordinator.available_keys
+        ]
+        for key in (*POWER_SUMS.values(), *ENERGY_SUMS.values()):
+            self._async_member_updated(entry_id, key)
+        self._async_add_entities()
+
+    @callback
+    def async_remove_member(self, entry_id: str) -> None:
+        """Stop summing the values of the member of ``entry_id``."""
+        for unsubscribe in self._unsubscribe.pop(entry_id, ()):
+            unsubscribe()
+        self.members.pop(entry_id, None)
+        self._platforms.pop(entry_id, None)
+        # Energy shares stay, so a reload does not dip the totals.
+        for key in (*POWER_SUMS, LOAD_POWER):
+            self._set(key, entry_id, None)
+        if entry_id == self._host:
+            # The system entities went with the entry's platform.
+            self._host = None
+            self._async_add_entities()
+
+    @callback
+    def async_register_platform(
+        self,
+        entry_id: str,
+        async_add_entities: AddEntitiesCallback,
+        create_entities: Callable[[], list[Entity]],
+    ) -> None:
+        """Offer a member's sensor platform to add the system entities with."""
+        self._platforms[entry_id] = (async_add_entities, create_entities)
+        self._async_add_entities()
+
+    @callback
+    def _async_add_entities(self) -> None:
+        """Add the system entities once there are enough members."""
+        if self._host is not None or len(self.members) < MIN_MEMBERS:
+            return
+        for entry_id, (async_add_entities, create_entities) in self._platforms.items():
+            if entry_id in self.members:
+                self._host = entry_id
+                async_add_entities(create_entities())
+                return
+
+    @callback
+    def _async_member_updated(self, entry_id: str, key: str) -> None:
+        """Fold the new value of one member's ``key`` into the sums."""
+        coordinator = self.members[entry_id]
+        if key in ENERGY_SUMS:
+            # Restored at setup, so known before the first sample arrives.
+            self._set(key, entry_id, coordinator.energy.totals.get(key))
+            return
+        value = _number((coordinator.data or {}).get(key))
+        if key in coordinator.expired_keys:
+            value = None
+        for system_key, member_key in POWER_SUMS.items():
+            if member_key == key:
+                self._set(system_key, entry_id, value)
+        self._set(LOAD_POWER, entry_id, self._member_load(entry_id))
+
+    def _member_load(self, entry_id: str) -> float | None:
+        """Return the load one member supplies, if all its power values count."""
+        pv = self._values["pv_power"].get(entry_id)
+        grid = self._values["grid_power"].get(entry_id)
+        battery = self._values["battery_power"].get(entry_id)
+        if pv is None or grid is None or battery is None:
+            return None
+        return pv + grid - battery
+
+    def _set(self, key: str, entry_id: str, value: float | None) -> None:
+        """Replace one member's share of ``key`` and notify if the total moved."""
+        values = self._values[key]
+        previous = values.get(entry_id)
+        if value == previous:
+            return
+        if value is None:
+            values.pop(entry_id, None)
+        else:
+            values[entry_id] = value
+        # Start again from zero when nothing counts, so rounding errors do not
+        # outlive the members that caused them.
+        self.totals[key] = (
+            self.totals[key] + (value or 0) - (previous or 0) if values else 0.0
+        )
+        if key in ENERGY_SUMS and self._store is not None:
+            self._store.async_delay_save(self._energy_data, SYSTEM_SAVE_DELAY)
+        for update_callback in list(self._listeners[key]):
+            update_callback()
+
+
+async def async_get_system(hass: HomeAssistant, system_id: str) -> SystemAggregator:
+    """Return the aggregator of the entries with ``system_id``, loaded."""
+    systems = hass.data.setdefault(DOMAIN, {}).setdefault("systems", {})
+    if (system := systems.get(system_id)) is None:
+        system = systems[system_id] = SystemAggregator(
+            system_id,
+            Store(hass, SYSTEM_STORE_VERSION, f"{DOMAIN}.system.{system_id}"),
+        )
+    await system.async_load()
+    return system
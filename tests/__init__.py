@@ -0,0 +1 @@
+"""Tests for EG4 Integration."""
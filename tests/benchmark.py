@@ -0,0 +1,162 @@
+"""
+Poll-cycle benchmarks against the local EG4 simulator.
+
+Run with ``python -m tests.benchmark`` from the repository root.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import time
+from contextlib import AsyncExitStack
+from dataclasses import dataclass
+
+from custom_components.eg4_integration.api import EG4ApiClient
+from custom_components.eg4_integration.models import DEFAULT_MAP, load_register_map
+from custom_components.eg4_integration.polling import (
+    LinkLimiter,
+    PolledDevice,
+    async_poll_devices,
+)
+from custom_components.eg4_integration.scheduler import PollScheduler
+
+from .simulator import EG4Simulator, SimulatedUnit
+
+INVERTER_REGISTERS = load_register_map(DEFAULT_MAP)
+
+
+@dataclass(frozen=True, slots=True)
+class BenchmarkResult:
+    """Poll-cycle figures for one site size."""
+
+    devices: int
+    cycles: int
+    round_trips_per_cycle: float
+    p50_ms: float
+    p99_ms: float
+    cpu_ms_per_cycle: float
+
+    def __str__(self) -> str:
+        """Format the result as a table row."""
+        return (
+            f"{self.devices:>7} {self.round_trips_per_cycle:>11.1f} "
+            f"{self.p50_ms:>8.1f} {self.p99_ms:>8.1f} {self.cpu_ms_per_cycle:>8.2f}"
+        )
+
+
+def _percentile(samples: list[float], percent: float) -> float:
+    """Return the ``percent`` percentile of ``samples``."""
+    if len(samples) == 1:
+        return samples[0]
+    return statistics.quantiles(samples, n=100, method="inclusive")[percent - 1]
+
+
+async def async_benchmark_site(
+    devices: int,
+    cycles: int = 20,
+    *,
+    latency: float = 0.005,
+    jitter: float = 0.0,
+    fault_rate: float = 0.0,
+    shared_bus: bool = False,
+) -> BenchmarkResult:
+    """
+    Poll a simulated site of ``devices`` inverters for ``cycles`` full cycles.
+
+    Each inverter gets its own simulated dongle, or with ``shared_bus`` they
+    all answer on one link under their own unit IDs. The CPU figure covers
+    the whole process, simulator included.
+    """
+    registers = INVERTER_REGISTERS.registers.values()
+
+    def unit(seed: int) -> SimulatedUnit:
+        return SimulatedUnit.from_values(
+            registers, latency=latency, jitter=jitter, fault_rate=fault_rate, seed=seed
+        )
+
+    async with AsyncExitStack() as stack:
+        if shared_bus:
+            simulator = await stack.enter_async_context(
+                EG4Simulator({index + 1: unit(index) for index in range(devices)})
+            )
+            simulators = [simulator]
+            client = EG4ApiClient(host=simulator.host, port=simulator.port)
+            stack.push_async_callback(client.close)
+            targets = [(client, index + 1) for index in range(devices)]
+        else:
+            simulators = [
+                await stack.enter_async_context(EG4Simulator({1: unit(index)}))
+                for index in range(devices)
+            ]
+            targets = []
+            for simulator in simulators:
+                client = EG4ApiClient(host=simulator.host, port=simulator.port)
+                stack.push_async_callback(client.close)
+                targets.append((client, 1))
+
+        polled = [
+            PolledDevice(
+                f"inverter{index}",
+                client,
+                PollScheduler(INVERTER_REGISTERS, 1),
+                unit_id,
+            )
+            for index, (client, unit_id) in enumerate(targets)
+        ]
+        limiter = LinkLimiter()
+        # Connect outside the measured cycles.
+        await async_poll_devices(polled, limiter, 0, budget=10)
+
+        before = sum(simulator.requests for simulator in simulators)
+        durations = []
+        cpu_start = time.process_time()
+        for _ in range(cycles):
+            for device in polled:
+                device.scheduler.reset()
+            start = time.perf_counter()
+            await async_poll_devices(polled, limiter, 0, budget=10)
+            durations.append(time.perf_counter() - start)
+        cpu = time.process_time() - cpu_start
+        requests = sum(simulator.requests for simulator in simulators) - before
+
+    return BenchmarkResult(
+        devices=devices,
+        cycles=cycles,
+        round_trips_per_cycle=requests / cycles,
+        p50_ms=_percentile(durations, 50) * 1000,
+        p99_ms=_percentile(durations, 99) * 1000,
+        cpu_ms_per_cycle=cpu / cycles * 1000,
+    )
+
+
+async def async_main(args: argparse.Namespace) -> None:
+    """Run the benchmark for every requested site size."""
+    print("devices round trips  p50 ms   p99 ms   cpu ms")  # noqa: T201
+    for devices in args.devices:
+        result = await async_benchmark_site(
+            devices,
+            args.cycles,
+            latency=args.latency,
+            jitter=args.jitter,
+            fault_rate=args.fault_rate,
+            shared_bus=args.shared_bus,
+        )
+        print(result)  # noqa: T201
+
+
+def main() -> None:
+    """Parse arguments and run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--devices", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--cycles", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.005)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--fault-rate", type=float, default=0.0)
+    parser.add_argument("--shared-bus", action="store_true")
+    asyncio.run(async_main(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
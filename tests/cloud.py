@@ -0,0 +1,100 @@
+"""Local stand-in for the EG4 cloud monitor API."""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import secrets
+
+from aiohttp import web
+
+from custom_components.eg4_integration.cloud import INVERTERS_PATH, LOGIN_PATH
+
+USERNAME = "owner@example.com"
+PASSWORD = "hunter2"
+COOKIE = "JSESSIONID"
+
+
+class CloudStandIn:
+    """An aiohttp server answering the cloud endpoints the client uses."""
+
+    def __init__(self) -> None:
+        """Initialize the stand-in with two inverters on the account."""
+        self.rows = [
+            {"serialNum": "4512345678", "soc": 87, "ppv": 4200, "status": 1},
+            {"serialNum": "4512345679", "soc": 86, "ppv": 4100, "status": 1},
+        ]
+        self.sessions: set[str] = set()
+        self.logins = 0
+        self.requests = 0
+        self.latency = 0.0
+        # Requests left before answering 429, or None for no limit.
+        self.remaining: int | None = None
+        self.retry_after = 1
+        # X-RateLimit-Reset sent with the last allowed request, if any.
+        self.reset: float | None = None
+        self.host = "127.0.0.1"
+        self.port = 0
+        self._runner: web.AppRunner | None = None
+
+    @property
+    def url(self) -> str:
+        """Return the base URL of the stand-in."""
+        return f"http://{self.host}:{self.port}"
+
+    def etag(self) -> str:
+        """Return the validator of the current inverter list."""
+        body = json.dumps(self.rows, sort_keys=True).encode()
+        return f'"{hashlib.sha1(body).hexdigest()}"'  # noqa: S324
+
+    async def _login(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        form = await request.post()
+        if form.get("account") != USERNAME or form.get("password") != PASSWORD:
+            return web.json_response({"success": False, "msg": "Wrong password"})
+        self.logins += 1
+        session = secrets.token_hex(8)
+        self.sessions.add(session)
+        response = web.json_response({"success": True})
+        response.set_cookie(COOKIE, session)
+        return response
+
+    async def _inverters(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if request.cookies.get(COOKIE) not in self.sessions:
+            return web.Response(status=401)
+        if self.remaining is not None:
+            if self.remaining <= 0:
+                return web.Response(
+                    status=429, headers={"Retry-After": str(self.retry_after)}
+                )
+            self.remaining -= 1
+        headers = {"ETag": self.etag()}
+        if self.remaining == 0 and self.reset is not None:
+            headers["X-RateLimit-Remaining"] = "0"
+            headers["X-RateLimit-Reset"] = str(self.reset)
+        if request.headers.get("If-None-Match") == headers["ETag"]:
+            return web.Response(status=304, headers=headers)
+        return web.json_response(
+            {"success": True, "total": len(self.rows), "rows": self.rows},
+            headers=headers,
+        )
+
+    async def __aenter__(self) -> CloudStandIn:
+        """Start serving on a free port."""
+        app = web.Application()
+        app.router.add_post(LOGIN_PATH, self._login)
+        app.router.add_post(INVERTERS_PATH, self._inverters)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, 0)
+        await site.start()
+        self.port = self._runner.addresses[0][1]
+        return self
+
+    async def __aexit__(self, *_exc) -> None:
+        """Stop serving."""
+        await self._runner.cleanup()
@@ -0,0 +1,25 @@
+"""Fixtures for EG4 Integration tests."""
+
+import pytest_asyncio
+from custom_components.eg4_integration.models import (
+    DEFAULT_MAP,
+    GRIDBOSS_MAP,
+    load_register_map,
+)
+
+from .simulator import EG4Simulator, SimulatedUnit
+
+INVERTER_REGISTERS = load_register_map(DEFAULT_MAP)
+GRIDBOSS_REGISTERS = load_register_map(GRIDBOSS_MAP)
+
+
+@pytest_asyncio.fixture
+async def simulator():
+    """Serve an inverter on unit 1 and a GridBoss on unit 2."""
+    async with EG4Simulator(
+        {
+            1: SimulatedUnit.from_values(INVERTER_REGISTERS.registers.values()),
+            2: SimulatedUnit.from_values(GRIDBOSS_REGISTERS.registers.values()),
+        }
+    ) as simulator:
+        yield simulator
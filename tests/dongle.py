@@ -0,0 +1,145 @@
+"""Fake EG4 WiFi dongle pushing data frames on its data port."""
+
+from __future__ import annotations
+
+import asyncio
+import struct
+from typing import TYPE_CHECKING
+
+from pymodbus.framer import FramerRTU
+
+from custom_components.eg4_integration.push import (
+    FRAME_PREFIX,
+    FUNCTION_HEARTBEAT,
+    FUNCTION_TRANSLATED_DATA,
+)
+from custom_components.eg4_integration.registers import RegisterType
+
+if TYPE_CHECKING:
+    from collections.abc import Sequence
+
+DATALOG = "BA12345678"
+SERIAL = "4512345678"
+_DEVICE_FUNCTIONS = {RegisterType.HOLDING: 0x03, RegisterType.INPUT: 0x04}
+_REGISTER_TYPES = {function: table for table, function in _DEVICE_FUNCTIONS.items()}
+# Offset of the data in a frame, and the read request found there.
+_DATA_OFFSET = 20
+_READ_REQUEST = struct.Struct("<BB10sHH")
+
+
+def build_frame(function: int, data: bytes, datalog: str = DATALOG) -> bytes:
+    """Wrap ``data`` in the dongle's frame header."""
+    body = struct.pack("<BB10sH", 1, function, datalog.encode(), len(data)) + data
+    return FRAME_PREFIX + struct.pack("<HH", 2, len(body)) + body
+
+
+def build_data_frame(
+    register_type: RegisterType,
+    address: int,
+    words: Sequence[int],
+    serial: str = SERIAL,
+    datalog: str = DATALOG,
+) -> bytes:
+    """Return a translated data frame carrying ``words`` from ``address``."""
+    values = struct.pack(f"<{len(words)}H", *words)
+    data = (
+        struct.pack(
+            "<BB10sHB",
+            1,
+            _DEVICE_FUNCTIONS[register_type],
+            serial.encode(),
+            address,
+            len(values),
+        )
+        + values
+    )
+    crc = FramerRTU.compute_CRC(data).to_bytes(2, "big")
+    return build_frame(FUNCTION_TRANSLATED_DATA, data + crc, datalog)
+
+
+def build_heartbeat(datalog: str = DATALOG) -> bytes:
+    """Return a heartbeat frame."""
+    return build_frame(FUNCTION_HEARTBEAT, b"\x00", datalog)
+
+
+class FakeDongle:
+    """
+    A TCP server standing in for the dongle's push port.
+
+    Read requests are answered from ``registers``, keyed by register table
+    and address.
+    """
+
+    def __init__(self, host: str = "127.0.0.1") -> None:
+        """Initialize the dongle; port 0 picks a free port."""
+        self.host = host
+        self.port = 0
+        self.registers: dict[tuple[RegisterType, int], int] = {}
+        self.received = bytearray()
+        self.connections = 0
+        self.connected = asyncio.Event()
+        self._writers: list[asyncio.StreamWriter] = []
+        self._server: asyncio.Server | None = None
+
+    async def _handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        """Keep a listener connection and record what it sends."""
+        self.connections += 1
+        self._writers.append(writer)
+        self.connected.set()
+        while data := await reader.read(1024):
+            self.received += data
+            if (request := self._read_request(data)) is not None:
+                writer.write(request)
+        self._writers.remove(writer)
+        writer.close()
+
+    def _read_request(self, data: bytes) -> bytes | None:
+        """Return the answer to a read request in ``data``, if it is one."""
+        if (
+            not data.startswith(FRAME_PREFIX)
+            or data[7] != FUNCTION_TRANSLATED_DATA
+            or len(data) < _DATA_OFFSET + _READ_REQUEST.size
+        ):
+            return None
+        action, function, _, address, count = _READ_REQUEST.unpack_from(
+            data, _DATA_OFFSET
+        )
+        table = _REGISTER_TYPES.get(function)
+        if action != 0 or table is None:
+            return None
+        words = [
+            self.registers.get((table, address + offset), 0) for offset in range(count)
+        ]
+        return build_data_frame(table, address, words)
+
+    async def send(self, data: bytes) -> None:
+        """Send raw bytes to every connected listener."""
+        for writer in self._writers:
+            writer.write(data)
+            await writer.drain()
+
+    async def push(
+        self, register_type: RegisterType, address: int, words: Sequence[int]
+    ) -> None:
+        """Push one data frame to every connected listener."""
+        await self.send(build_data_frame(register_type, address, words))
+
+    async def disconnect(self) -> None:
+        """Drop every listener connection."""
+        self.connected.clear()
+        for writer in list(self._writers):
+            writer.close()
+
+    async def __aenter__(self) -> FakeDongle:
+        """Start serving."""
+        self._server = await asyncio.start_server(self._handle, self.host, 0)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def __aexit__(self, *_exc) -> None:
+        """Stop serving."""
+        await self.disconnect()
+        self._server.close()
+        await self._server.wait_closed()
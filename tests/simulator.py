@@ -0,0 +1,205 @@
+"""Local EG4 Modbus simulator built on the pymodbus server."""
+
+from __future__ import annotations
+
+import asyncio
+import math
+import random
+from typing import TYPE_CHECKING
+
+from pymodbus import FramerType
+from pymodbus.datastore import (
+    ModbusSequentialDataBlock,
+    ModbusServerContext,
+    ModbusSlaveContext,
+)
+from pymodbus.server import ModbusTcpServer
+
+from custom_components.eg4_integration.registers import (
+    DataType,
+    RegisterType,
+    encode_value,
+)
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Mapping
+
+    from custom_components.eg4_integration.registers import Register
+
+_BLOCK_SIZE = 0x10000 - 1
+
+
+def encode_values(
+    registers: Iterable[Register], values: Mapping[str, float | bool]
+) -> dict[RegisterType, dict[int, int]]:
+    """Turn decoded values into raw register words, the inverse of decoding."""
+    words: dict[RegisterType, dict[int, int]] = {table: {} for table in RegisterType}
+    for register in registers:
+        if register.key not in values:
+            continue
+        table = words[register.register_type]
+        value = values[register.key]
+        current = table.get(register.address, 0)
+        for index, word in enumerate(encode_value(register, value, current)):
+            table[register.address + index] = word
+    return words
+
+
+def sample_values(registers: Iterable[Register], seed: int = 0) -> dict:
+    """Return plausible values for every register, stable for a given seed."""
+    rng = random.Random(seed)
+    values = {}
+    for register in registers:
+        if register.bit is not None:
+            values[register.key] = rng.random() < 0.5
+        elif register.data_type in (DataType.INT16, DataType.INT32):
+            values[register.key] = _scaled(register, rng.randint(-1000, 1000))
+        else:
+            values[register.key] = _scaled(register, rng.randint(0, 1000))
+    return values
+
+
+def _scaled(register: Register, raw: int) -> float:
+    """Scale ``raw`` and round it to the digits the decoder keeps."""
+    if register.scale == 1:
+        return raw
+    return round(raw * register.scale, max(0, math.ceil(-math.log10(register.scale))))
+
+
+class SimulatedUnit(ModbusSlaveContext):
+    """
+    One EG4 device answering on a unit ID.
+
+    Every request waits ``latency`` plus up to ``jitter`` seconds. With
+    probability ``fault_rate`` it instead fails with ``fault``: "exception"
+    answers with a Modbus exception, "timeout" never answers.
+    """
+
+    def __init__(
+        self,
+        words: Mapping[RegisterType, Mapping[int, int]] | None = None,
+        *,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        fault_rate: float = 0.0,
+        fault: str = "exception",
+        seed: int = 0,
+    ) -> None:
+        """Initialize the unit with its register contents."""
+        words = words or {}
+        super().__init__(
+            hr=ModbusSequentialDataBlock(0, [0] * _BLOCK_SIZE),
+            ir=ModbusSequentialDataBlock(0, [0] * _BLOCK_SIZE),
+        )
+        for table, values in words.items():
+            for address, word in values.items():
+                self.set_register(table, address, word)
+        self.latency = latency
+        self.jitter = jitter
+        self.fault_rate = fault_rate
+        self.fault = fault
+        self.requests = 0
+        self._delayed = False
+        self.writes: list[tuple[int, list[int]]] = []
+        self._rng = random.Random(seed)
+
+    @classmethod
+    def from_values(
+        cls,
+        registers: Iterable[Register],
+        values: Mapping[str, float | bool] | None = None,
+        **kwargs,
+    ) -> SimulatedUnit:
+        """Create a unit serving ``values`` laid out by ``registers``."""
+        registers = list(registers)
+        if values is None:
+            values = sample_values(registers)
+        return cls(encode_values(registers, values), **kwargs)
+
+    def set_register(self, table: RegisterType, address: int, word: int) -> None:
+        """Change one raw register word."""
+        code = 4 if table is RegisterType.INPUT else 3
+        self.setValues(code, address, [word])
+
+    def _faulted(self) -> bool:
+        """Decide whether the current request fails."""
+        return bool(self.fault_rate) and self._rng.random() < self.fault_rate
+
+    def validate(self, fc_as_hex, address, count=1):
+        """
+        Count a request and reject it on an exception fault.
+
+        pymodbus validates every request once before touching the datastore.
+        """
+        self.requests += 1
+        self._delayed = False
+        if self.fault == "exception" and self._faulted():
+            return False
+        return super().validate(fc_as_hex, address, count)
+
+    async def _respond(self) -> None:
+        """Apply latency, jitter and timeout faults once per request."""
+        if self._delayed:
+            return
+        self._delayed = True
+        delay = self.latency + self._rng.uniform(0, self.jitter)
+        if delay:
+            await asyncio.sleep(delay)
+        if self.fault == "timeout" and self._faulted():
+            await asyncio.sleep(3600)
+
+    async def async_getValues(self, fc_as_hex, address, count=1):  # noqa: N802
+        """Serve a read after the simulated delay."""
+        await self._respond()
+        return self.getValues(fc_as_hex, address, count)
+
+    async def async_setValues(self, fc_as_hex, address, values):  # noqa: N802
+        """Serve a write after the simulated delay."""
+        await self._respond()
+        self.writes.append((address, list(values)))
+        self.setValues(fc_as_hex, address, values)
+
+
+class EG4Simulator:
+    """A Modbus TCP (or RTU over TCP) server hosting one or more units."""
+
+    def __init__(
+        self,
+        units: Mapping[int, SimulatedUnit],
+        *,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        framer: FramerType = FramerType.SOCKET,
+    ) -> None:
+        """Initialize the simulator; ``port`` 0 picks a free port."""
+        self.units = dict(units)
+        self.host = host
+        self.port = port
+        self._server = ModbusTcpServer(
+            ModbusServerContext(slaves=self.units, single=False),
+            framer=framer,
+            address=(host, port),
+        )
+
+    @property
+    def requests(self) -> int:
+        """Return the number of requests served by every unit."""
+        return sum(unit.requests for unit in self.units.values())
+
+    async def start(self) -> EG4Simulator:
+        """Start serving in the background."""
+        await self._server.serve_forever(background=True)
+        self.port = self._server.transport.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self) -> None:
+        """Stop serving and drop every connection."""
+        await self._server.shutdown()
+
+    async def __aenter__(self) -> EG4Simulator:
+        """Start the simulator."""
+        return await self.start()
+
+    async def __aexit__(self, *_exc) -> None:
+        """Stop the simulator."""
+        await self.stop()
@@ -1,45 +1,155 @@
 import pytest
-from pymodbus.exceptions import ModbusException
-from custom_components.eg4_integration.api import EG4ApiClient
+from pymodbus import FramerType
+
+from custom_components.eg4_integration.api import (
+    EG4ApiClient,
+    EG4ApiClientCommunicationError,
+)
+from custom_components.eg4_integration.discovery import EG4Discovery
+from custom_components.eg4_integration.registers import RegisterType
+
+from .simulator import EG4Simulator, SimulatedUnit
+
+
+class FakeResponse:
+    def __init__(self, registers):
+        self.registers = registers
+
+    def isError(self):  # noqa: N802 pymodbus names it so
+        return False
+
+
+class FakeModbusClient:
+    def __init__(self, *, reachable=True):
+        self.reachable = reachable
+        self.connected = False
+        self.connects = 0
+
+    async def connect(self):
+        self.connects += 1
+        self.connected = self.reachable
+        return self.reachable
+
+    async def read_holding_registers(self, address, count=1, slave=1):
+        return FakeResponse([0] * count)
+
+    def close(self):
+        self.connected = False
+
+
+def fake_transport(monkeypatch, client, fake):
+    monkeypatch.setattr(client, "_build_client", lambda: fake)
+
 
 @pytest.mark.asyncio
-async def test_tcp_connection():
-    client = EG4ApiClient(host="127.0.0.1", port=502)
+async def test_tcp_connection(simulator):
+    client = EG4ApiClient(host=simulator.host, port=simulator.port)
     await client.connect()
     assert client.client.connected
     await client.close()
     assert client.client is None
 
+
 @pytest.mark.asyncio
 async def test_serial_connection():
-    client = EG4ApiClient(serial_port="/dev/ttyUSB0", baudrate=9600)
-    await client.connect()
-    assert client.client.connected
-    await client.close()
-    assert client.client is None
+    # RTU framing over a socket stands in for the serial port.
+    async with EG4Simulator({1: SimulatedUnit()}, framer=FramerType.RTU) as simulator:
+        client = EG4ApiClient(serial_port=f"socket://{simulator.host}:{simulator.port}")
+        await client.connect()
+        assert client.client.connected
+        assert await client.read_data(100, 3) == [0, 0, 0]
+        await client.close()
+        assert client.client is None
+
 
 @pytest.mark.asyncio
-async def test_read_data():
-    client = EG4ApiClient(host="127.0.0.1", port=502)
-    await client.connect()
-    with pytest.raises(ModbusException):
-        await client.read_data(100, 1)
+async def test_read_data(simulator):
+    simulator.units[1].set_register(RegisterType.HOLDING, 101, 87)
+    client = EG4ApiClient(host=simulator.host, port=simulator.port)
+    assert (await client.read_data(100, 3))[1] == 87
     await client.close()
 
+
+@pytest.mark.asyncio
+async def test_read_data_fault():
+    async with EG4Simulator({1: SimulatedUnit(fault_rate=1)}) as simulator:
+        client = EG4ApiClient(host=simulator.host, port=simulator.port)
+        with pytest.raises(EG4ApiClientCommunicationError):
+            await client.read_data(100, 1)
+        await client.close()
+
+
 @pytest.mark.asyncio
 async def test_invalid_connection():
     client = EG4ApiClient()
-    with pytest.raises(ValueError):
+    with pytest.raises(ValueError, match="host or serial_port"):
         await client.connect()
 
+
 @pytest.mark.asyncio
 async def test_auto_discover_ip():
-    client = EG4ApiClient(serial_number="123456789")
+    async def responder(hostname):
+        return "192.168.1.89" if hostname == "EG4-123456789.local." else None
+
+    client = EG4ApiClient(serial_number="123456789", discovery=EG4Discovery(responder))
     discovered_ip = await client.auto_discover_ip()
-    assert discovered_ip == "192.168.1.89", "IP discovery failed for serial number 123456789"
+    assert discovered_ip == "192.168.1.89", (
+        "IP discovery failed for serial number 123456789"
+    )
+
 
 @pytest.mark.asyncio
 async def test_auto_discover_ip_no_serial():
     client = EG4ApiClient()
-    with pytest.raises(ValueError):
+    with pytest.raises(ValueError, match="Serial number is required"):
         await client.auto_discover_ip()
+
+
+@pytest.mark.asyncio
+async def test_session_reused_between_reads(monkeypatch):
+    client = EG4ApiClient(host="127.0.0.1", port=502)
+    fake = FakeModbusClient()
+    fake_transport(monkeypatch, client, fake)
+
+    for _ in range(3):
+        await client.read_data(100, 3)
+    assert fake.connects == 1
+
+    fake.connected = False
+    await client.read_data(100, 3)
+    assert fake.connects == 2
+
+
+@pytest.mark.asyncio
+async def test_reconnect_backoff(monkeypatch):
+    client = EG4ApiClient(host="127.0.0.1", port=502)
+    fake = FakeModbusClient(reachable=False)
+    fake_transport(monkeypatch, client, fake)
+
+    with pytest.raises(EG4ApiClientCommunicationError):
+        await client.ensure_connected()
+    with pytest.raises(EG4ApiClientCommunicationError):
+        await client.ensure_connected()
+    assert fake.connects == 1
+
+    client._next_attempt = 0
+    fake.reachable = True
+    await client.ensure_connected()
+    assert client.connected
+    assert client._failures == 0
+
+
+@pytest.mark.asyncio
+async def test_silent_unit_keeps_bus_open():
+    async with EG4Simulator({1: SimulatedUnit()}, framer=FramerType.RTU) as simulator:
+        client = EG4ApiClient(
+            serial_port=f"socket://{simulator.host}:{simulator.port}", baudrate=115200
+        )
+        await client.read_data(100, 2)
+        # Nothing answers on unit 5; the other units keep the open port.
+        with pytest.raises(EG4ApiClientCommunicationError):
+            await client.read_data(100, 2, unit_id=5)
+        assert await client.read_data(100, 2) == [0, 0]
+        assert client.stats.connects == 1
+        assert client.stats.timeouts == 1
+        await client.close()
@@ -0,0 +1,27 @@
+import pytest
+
+from .benchmark import async_benchmark_site
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("devices", [1, 4])
+async def test_benchmark_separate_dongles(devices):
+    result = await async_benchmark_site(devices, cycles=5, latency=0.02)
+
+    assert (result.devices, result.cycles) == (devices, 5)
+    assert result.p50_ms <= result.p99_ms
+    assert result.round_trips_per_cycle == 3 * devices
+    # Dongles are polled side by side: three requests deep, not 3 * devices.
+    # The bound leaves room for a loaded machine but not for polling four
+    # dongles one after another.
+    assert result.p50_ms < 3 * 20 * 4
+
+
+@pytest.mark.asyncio
+async def test_benchmark_shared_link():
+    result = await async_benchmark_site(4, cycles=5, latency=0.02, shared_bus=True)
+
+    assert (result.devices, result.cycles) == (4, 5)
+    assert result.p50_ms <= result.p99_ms
+    assert result.round_trips_per_cycle == 12
+    assert result.p50_ms >= 12 * 20
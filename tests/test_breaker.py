@@ -0,0 +1,35 @@
+from custom_components.eg4_integration.breaker import BreakerState, CircuitBreaker
+
+
+def test_one_failure_keeps_polling():
+    breaker = CircuitBreaker("inverter")
+    breaker.record_failure(0)
+    assert breaker.state_at(0) is BreakerState.CLOSED
+
+
+def test_opens_and_backs_off():
+    breaker = CircuitBreaker("inverter", interval=30, max_interval=100)
+    breaker.record_failure(0)
+    breaker.record_failure(0)
+    assert breaker.state_at(29) is BreakerState.OPEN
+    assert breaker.state_at(30) is BreakerState.HALF_OPEN
+    # The probe failed: wait twice as long, up to the maximum.
+    breaker.record_failure(30)
+    assert breaker.retry_at == 90
+    breaker.record_failure(90)
+    assert breaker.retry_at == 190
+    assert breaker.trips == 1
+
+
+def test_probe_success_closes():
+    breaker = CircuitBreaker("inverter")
+    breaker.record_failure(0)
+    breaker.record_failure(0)
+    breaker.record_success()
+    assert breaker.state_at(0) is BreakerState.CLOSED
+    assert breaker.as_dict(0) == {
+        "state": BreakerState.CLOSED,
+        "failures": 0,
+        "trips": 1,
+        "retry_in": 0.0,
+    }
@@ -0,0 +1,20 @@
+import pytest
+from custom_components.eg4_integration.bus import BusTiming
+
+
+def test_silent_interval_follows_baudrate():
+    timing = BusTiming(9600)
+    assert timing.char_time == pytest.approx(11 / 9600)
+    # 3.5 characters of 11 bits: about 4 ms at 9600 baud.
+    assert timing.silent_interval == pytest.approx(0.00401, abs=1e-5)
+    assert BusTiming(19200).silent_interval == pytest.approx(0.002005, abs=1e-6)
+    # Fixed by the spec above 19200 baud.
+    assert BusTiming(115200).silent_interval == 0.00175
+
+
+def test_transaction_time():
+    timing = BusTiming(9600)
+    # Read of 40 registers: 8 byte request, 85 byte response.
+    expected = 93 * 11 / 9600 + 2 * timing.silent_interval
+    assert timing.transaction_time(8, 85) == pytest.approx(expected)
+    assert timing.response_timeout(8, 85) > timing.transaction_time(8, 85)
@@ -0,0 +1,141 @@
+import asyncio
+import time
+
+import aiohttp
+import pytest
+import pytest_asyncio
+from custom_components.eg4_integration.api import EG4ApiClientAuthenticationError
+from custom_components.eg4_integration.cloud import (
+    CLOUD_MAX_PAUSE,
+    EG4CloudClient,
+    EG4CloudRateLimitError,
+    TokenBucket,
+)
+
+from .cloud import PASSWORD, USERNAME, CloudStandIn
+
+
+@pytest_asyncio.fixture
+async def cloud():
+    async with CloudStandIn() as cloud:
+        yield cloud
+
+
+@pytest_asyncio.fixture
+async def session():
+    # The stand-in is addressed by IP, which the default jar refuses cookies from.
+    async with aiohttp.ClientSession(
+        cookie_jar=aiohttp.CookieJar(unsafe=True)
+    ) as session:
+        yield session
+
+
+def client(cloud, session, password=PASSWORD, bucket=None):
+    return EG4CloudClient(
+        USERNAME,
+        password,
+        session,
+        base_url=cloud.url,
+        bucket=bucket or TokenBucket(100, 100),
+    )
+
+
+@pytest.mark.asyncio
+async def test_all_inverters_in_one_request(cloud, session):
+    cloud_client = client(cloud, session)
+    inverters = await cloud_client.async_get_inverters()
+    assert inverters == {
+        "4512345678": {"charge_level": 87, "inverter_performance": 4200},
+        "4512345679": {"charge_level": 86, "inverter_performance": 4100},
+    }
+    # One login and one fetch.
+    assert cloud.requests == 2
+
+
+@pytest.mark.asyncio
+async def test_session_reused(cloud, session):
+    cloud_client = client(cloud, session)
+    for _ in range(3):
+        await cloud_client.async_get_inverters()
+    assert cloud.logins == 1
+
+    # An expired session is renewed once, transparently.
+    cloud.sessions.clear()
+    await cloud_client.async_get_inverters()
+    assert cloud.logins == 2
+
+
+@pytest.mark.asyncio
+async def test_bad_credentials(cloud, session):
+    with pytest.raises(EG4ApiClientAuthenticationError):
+        await client(cloud, session, password="wrong").async_login()
+
+
+@pytest.mark.asyncio
+async def test_conditional_requests(cloud, session):
+    cloud_client = client(cloud, session)
+    first = await cloud_client.async_get_inverters()
+    assert await cloud_client.async_get_inverters() == first
+    assert cloud_client.not_modified == 1
+
+    cloud.rows[0]["soc"] = 88
+    changed = await cloud_client.async_get_inverters()
+    assert changed["4512345678"]["charge_level"] == 88
+    assert cloud_client.not_modified == 1
+
+
+@pytest.mark.asyncio
+async def test_concurrent_callers_share_one_request(cloud, session):
+    cloud_client = client(cloud, session)
+    await cloud_client.async_login()
+    cloud.latency = 0.05
+    results = await asyncio.gather(
+        *(cloud_client.async_get_inverters() for _ in range(10))
+    )
+    assert all(result == results[0] for result in results)
+    # The login and a single fetch.
+    assert cloud.requests == 2
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_pauses_requests(cloud, session):
+    cloud_client = client(cloud, session)
+    await cloud_client.async_login()
+    cloud.remaining = 0
+    cloud.retry_after = 0.2
+    with pytest.raises(EG4CloudRateLimitError):
+        await cloud_client.async_get_inverters()
+
+    cloud.remaining = None
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    await cloud_client.async_get_inverters()
+    assert loop.time() - start >= 0.2
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_reset_as_unix_time(cloud, session):
+    bucket = TokenBucket(100, 100)
+    cloud_client = client(cloud, session, bucket=bucket)
+    cloud.remaining = 1
+    cloud.reset = time.time() + 30
+    await cloud_client.async_get_inverters()
+    assert 25 < bucket.delay() <= 30
+
+    # A reset far in the future only holds requests back so long.
+    cloud_client = client(cloud, session, bucket=(bucket := TokenBucket(100, 100)))
+    cloud.remaining = 1
+    cloud.reset = time.time() + 86400
+    await cloud_client.async_get_inverters()
+    assert bucket.delay() <= CLOUD_MAX_PAUSE
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_paces_bursts():
+    bucket = TokenBucket(rate=20, capacity=2)
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    for _ in range(4):
+        await bucket.acquire()
+    # Two from the burst, then two more at 20 per second.
+    assert loop.time() - start >= 0.09
@@ -0,0 +1,135 @@
+import asyncio
+
+import pytest
+from custom_components.eg4_integration.api import EG4ApiClient
+from custom_components.eg4_integration.commands import (
+    CommandPriority,
+    LinkQueue,
+    RegisterWriter,
+)
+from custom_components.eg4_integration.registers import RegisterType
+
+from .simulator import EG4Simulator, SimulatedUnit
+
+
+@pytest.mark.asyncio
+async def test_writes_overtake_queued_polls():
+    queue = LinkQueue()
+    order = []
+
+    async def transaction(name, priority):
+        async with queue.slot(priority):
+            order.append(name)
+            await asyncio.sleep(0.01)
+
+    async with queue.slot():
+        tasks = [
+            asyncio.create_task(transaction("poll1", CommandPriority.POLL)),
+            asyncio.create_task(transaction("poll2", CommandPriority.POLL)),
+            asyncio.create_task(transaction("write", CommandPriority.WRITE)),
+        ]
+        await asyncio.sleep(0)
+        assert queue.pending == 3
+    await asyncio.gather(*tasks)
+
+    assert order == ["write", "poll1", "poll2"]
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_gives_up_its_turn():
+    queue = LinkQueue()
+    async with queue.slot():
+        waiter = asyncio.create_task(queue.slot().__aenter__())
+        await asyncio.sleep(0)
+        waiter.cancel()
+    async with asyncio.timeout(1), queue.slot():
+        pass
+
+
+@pytest.mark.asyncio
+async def test_writes_coalesce_and_batch():
+    unit = SimulatedUnit()
+    async with EG4Simulator({1: unit}) as simulator:
+        client = EG4ApiClient(host=simulator.host, port=simulator.port)
+        queue = LinkQueue()
+        writer = RegisterWriter(client, queue, unit_id=1)
+
+        async with queue.slot():
+            # The link is busy: these wait and merge into one batch.
+            writes = [
+                asyncio.create_task(writer.async_write(210, [1])),
+                asyncio.create_task(writer.async_write(210, [0])),
+                asyncio.create_task(writer.async_write(211, [1])),
+                asyncio.create_task(writer.async_write(300, [7])),
+            ]
+            await asyncio.sleep(0)
+        results = await asyncio.gather(*writes)
+        await client.close()
+
+    # The toggle collapsed, 210-211 went out together, 300 on its own.
+    assert unit.writes == [(210, [0, 1]), (300, [7])]
+    assert results[0] == {210: 0, 211: 1, 300: 7}
+    assert all(result == results[0] for result in results)
+    # Two writes and two read-backs.
+    assert unit.requests == 4
+
+
+@pytest.mark.asyncio
+async def test_bit_writes_keep_other_bits():
+    unit = SimulatedUnit({RegisterType.HOLDING: {210: 0b1001}})
+    async with EG4Simulator({1: unit}) as simulator:
+        client = EG4ApiClient(host=simulator.host, port=simulator.port)
+        queue = LinkQueue()
+        writer = RegisterWriter(client, queue, unit_id=1)
+
+        async with queue.slot():
+            # Two flags of one register merge into one read-modify-write.
+            writes = [
+                asyncio.create_task(writer.async_write_bits(210, 0b0010, 0b0010)),
+                asyncio.create_task(writer.async_write_bits(210, 0b1000, 0)),
+            ]
+            await asyncio.sleep(0)
+        results = await asyncio.gather(*writes)
+        await client.close()
+
+    assert unit.writes == [(210, [0b0011])]
+    assert results[0] == {210: 0b0011}
+
+
+@pytest.mark.asyncio
+async def test_write_failure_reaches_every_caller():
+    unit = SimulatedUnit(fault_rate=1)
+    async with EG4Simulator({1: unit}) as simulator:
+        client = EG4ApiClient(host=simulator.host, port=simulator.port)
+        writer = RegisterWriter(client, LinkQueue(), unit_id=1)
+        results = await asyncio.gather(
+            writer.async_write(210, [1]),
+            writer.async_write(211, [1]),
+            return_exceptions=True,
+        )
+        await client.close()
+
+    assert all(isinstance(result, Exception) for result in results)
+    assert unit.writes == []
+
+
+@pytest.mark.asyncio
+async def test_read_back_uses_holding_registers():
+    unit = SimulatedUnit({RegisterType.INPUT: {210: 5}})
+    async with EG4Simulator({1: unit}) as simulator:
+        client = EG4ApiClient(host=simulator.host, port=simulator.port)
+        writer = RegisterWriter(client, LinkQueue(), unit_id=1)
+        assert await writer.async_write(210, [3]) == {210: 3}
+        await client.close()
+
+
+@pytest.mark.asyncio
+async def test_silent_interval_between_transactions():
+    queue = LinkQueue(interval=0.02)
+    loop = asyncio.get_running_loop()
+    async with queue.slot():
+        pass
+    ended = loop.time()
+    async with queue.slot():
+        started = loop.time()
+    assert started - ended >= 0.02
@@ -1,18 +1,72 @@
 import pytest
 from homeassistant import config_entries
+
 from custom_components.eg4_integration.config_flow import EG4FlowHandler
+from custom_components.eg4_integration.const import DOMAIN
+from custom_components.eg4_integration.probe import DongleIdentity
+
+USER_INPUT = {
+    "inverter_model": "Model A",
+    "inverter_serial_number": "12345",
+    "gridboss_serial_number": "67890",
+    "polling_interval": 30,
+}
+
+
+def user_flow(hass, found=None):
+    flow = EG4FlowHandler()
+    flow.hass = hass
+    flow.handler = DOMAIN
+    flow.context = {"source": config_entries.SOURCE_USER}
+
+    async def _probe(serial):
+        return found if found and found.serial_number == serial else None
+
+    flow._async_probe_serial = _probe
+    return flow
+
 
 @pytest.mark.asyncio
 async def test_config_flow(hass):
-    flow = EG4FlowHandler()
-    result = await flow.async_step_user(user_input={
-        "inverter_model": "Model A",
-        "inverter_serial_number": "12345",
-        "gridboss_serial_number": "67890",
-        "polling_interval": 30,
-    })
+    flow = user_flow(
+        hass, DongleIdentity("192.168.1.89", "12345", "12000xp", frozenset((502,)))
+    )
+    result = await flow.async_step_user(user_input=USER_INPUT)
 
     assert result["type"] == "create_entry"
     assert result["title"] == "EG4 Integration"
     assert result["data"]["inverter_model"] == "Model A"
     assert result["data"]["polling_interval"] == 30
+    assert result["data"]["last_known_ip"] == "192.168.1.89"
+
+
+@pytest.mark.asyncio
+async def test_config_flow_unreachable(hass):
+    flow = user_flow(hass)
+    result = await flow.async_step_user(user_input=USER_INPUT)
+
+    assert result["type"] == "form"
+    assert result["errors"] == {"base": "connection"}
+
+
+@pytest.mark.asyncio
+async def test_config_flow_prefilled_from_scan(hass):
+    flow = user_flow(hass)
+    found = DongleIdentity("192.168.1.89", "4512345678", "18kpv", frozenset((502,)))
+
+    async def _scan():
+        return [found]
+
+    flow._async_scan = _scan
+    result = await flow.async_step_user()
+
+    assert result["type"] == "form"
+    suggested = {
+        str(key): key.description["suggested_value"]
+        for key in result["data_schema"].schema
+        if key.description and "suggested_value" in key.description
+    }
+    assert suggested == {
+        "inverter_serial_number": "4512345678",
+        "inverter_model": "18kpv",
+    }
@@ -1,29 +1,440 @@
+import asyncio
+import time
+from datetime import timedelta
+
+import aiohttp
 import pytest
+from homeassistant.components.recorder import get_instance
+from homeassistant.components.recorder.statistics import get_last_statistics
+from homeassistant.exceptions import ConfigEntryAuthFailed
 from homeassistant.helpers.update_coordinator import UpdateFailed
-from custom_components.eg4_integration.coordinator import EG4DataUpdateCoordinator
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+from pytest_homeassistant_custom_component.components.recorder.common import (
+    async_wait_recording_done,
+)
+
+from custom_components.eg4_integration.api import EG4ApiClient
+from custom_components.eg4_integration.cloud import EG4CloudClient, TokenBucket
+from custom_components.eg4_integration.const import DOMAIN
+from custom_components.eg4_integration.coordinator import (
+    CoordinatorOptions,
+    EG4DataUpdateCoordinator,
+)
+from custom_components.eg4_integration.models import (
+    DEFAULT_MAP,
+    GRIDBOSS_MAP,
+    load_register_map,
+)
+from custom_components.eg4_integration.sensor import ENTITY_DESCRIPTIONS
+from custom_components.eg4_integration.sources import (
+    SOURCE_CLOUD,
+    SOURCE_LOCAL,
+    ValueSource,
+)
+from custom_components.eg4_integration.statistics import StatisticsImporter
+
+from .cloud import PASSWORD, USERNAME, CloudStandIn
+from .simulator import sample_values
+
+INVERTER_REGISTERS = load_register_map(DEFAULT_MAP)
+GRIDBOSS_REGISTERS = load_register_map(GRIDBOSS_MAP)
+
 
 @pytest.mark.asyncio
-async def test_update_data(hass):
-    config_entry = {
-        "data": {
-            "host": "127.0.0.1",
-            "port": 502,
-            "polling_interval": 30,
-        }
-    }
-    coordinator = EG4DataUpdateCoordinator(hass, config_entry)
+async def test_update_data(hass, simulator):
+    client = EG4ApiClient(host=simulator.host, port=simulator.port)
+    coordinator = EG4DataUpdateCoordinator(hass, client, 30)
+    data = await coordinator._async_update_data()
+    assert data == sample_values(INVERTER_REGISTERS.registers.values())
+    await coordinator.async_close()
+
+
+@pytest.mark.asyncio
+async def test_update_data_unreachable(hass):
+    client = EG4ApiClient(host="127.0.0.1", port=1)
+    coordinator = EG4DataUpdateCoordinator(hass, client, 30)
     with pytest.raises(UpdateFailed):
         await coordinator._async_update_data()
 
+
 @pytest.mark.asyncio
-async def test_gridboss_data(hass):
-    config_entry = {
-        "data": {
-            "host": "127.0.0.1",
-            "port": 502,
+async def test_gridboss_data(hass, simulator):
+    config_entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={
+            "host": simulator.host,
+            "port": simulator.port,
             "gridboss_serial_number": "12345",
-        }
-    }
-    coordinator = EG4DataUpdateCoordinator(hass, config_entry)
+        },
+    )
+    client = EG4ApiClient(host=simulator.host, port=simulator.port)
+    coordinator = EG4DataUpdateCoordinator(
+        hass,
+        client,
+        30,
+        config_entry=config_entry,
+        options=CoordinatorOptions(gridboss_unit_id=2),
+    )
+    data = await coordinator._async_update_data()
+    gridboss = sample_values(GRIDBOSS_REGISTERS.registers.values())
+    assert {key: data[key] for key in gridboss} == gridboss
+    # Both units share one connection, read in four requests.
+    assert simulator.requests == 4
+    await coordinator.async_close()
+
+
+class IdleClient:
+    connection_type = "TCP"
+    max_read_registers = 40
+
+
+@pytest.mark.asyncio
+async def test_only_changed_entities_notified(hass):
+    coordinator = EG4DataUpdateCoordinator(hass, IdleClient(), 30)
+    notified = []
+    for key in ("battery_status", "charge_level", "alert_status"):
+        coordinator.async_add_listener(lambda key=key: notified.append(key), key)
+
+    coordinator.async_set_updated_data(
+        {"battery_status": 1, "charge_level": 50, "alert_status": False}
+    )
+    assert sorted(notified) == ["alert_status", "battery_status", "charge_level"]
+
+    notified.clear()
+    coordinator.async_set_updated_data(
+        {"battery_status": 1, "charge_level": 51, "alert_status": False}
+    )
+    assert notified == ["charge_level"]
+    assert coordinator.changed_keys == {"charge_level"}
+    assert coordinator.update_stats.last_writes == 1
+    assert coordinator.update_stats.last_writes_avoided == 2
+    assert coordinator.update_stats.writes_avoided == 2
+    await coordinator.async_shutdown()
+
+
+@pytest.mark.asyncio
+async def test_cycle_trace(hass, simulator):
+    client = EG4ApiClient(host=simulator.host, port=simulator.port)
+    coordinator = EG4DataUpdateCoordinator(hass, client, 30)
+    await coordinator._async_update_data()
+    trace = coordinator.metrics.last
+    assert len(trace.spans) == simulator.requests == 3
+    assert trace.link.connects == 1
+    assert trace.link.requests == 3
+    assert trace.link.registers == sum(span.count for span in trace.spans)
+    # MBAP-framed reads: 12 bytes out, 9 plus the data back.
+    assert trace.link.bytes_sent == 36
+    assert trace.link.bytes_received == 27 + 2 * trace.link.registers
+    assert trace.errors == {}
+    assert len(coordinator.metrics.span_latency) == 3
+    await coordinator.async_close()
+
+
+@pytest.mark.asyncio
+async def test_cycle_trace_failure(hass):
+    client = EG4ApiClient(host="127.0.0.1", port=1)
+    coordinator = EG4DataUpdateCoordinator(hass, client, 30)
     with pytest.raises(UpdateFailed):
         await coordinator._async_update_data()
+    assert coordinator.metrics.failed_cycles == 1
+    assert "inverter" in coordinator.metrics.last.errors
+    assert coordinator.metrics.last.link.errors == 1
+
+
+@pytest.mark.asyncio
+async def test_write_setting(hass, simulator):
+    client = EG4ApiClient(host=simulator.host, port=simulator.port)
+    coordinator = EG4DataUpdateCoordinator(hass, client, 30)
+    coordinator.data = await coordinator._async_update_data()
+    requests = simulator.requests
+    notified = []
+    coordinator.async_add_listener(
+        lambda: notified.append(coordinator.data["notifications_enabled"]),
+        "notifications_enabled",
+    )
+
+    value = not coordinator.data["notifications_enabled"]
+    await coordinator.async_write("notifications_enabled", value)
+
+    # Shown optimistically; the matching read-back changes nothing.
+    assert notified == [value]
+    assert coordinator.data["notifications_enabled"] is value
+    assert simulator.units[1].writes == [(210, [int(value)])]
+    # The register is read for its other bits, written and read back.
+    assert simulator.requests == requests + 3
+    await coordinator.async_shutdown()
+    await coordinator.async_close()
+
+
+@pytest.mark.asyncio
+async def test_pushed_values(hass):
+    coordinator = EG4DataUpdateCoordinator(hass, IdleClient(), 30)
+    coordinator.async_set_updated_data({"battery_status": 1, "charge_level": 50})
+    coordinator.async_push({"charge_level": 51})
+    assert coordinator.data == {"battery_status": 1, "charge_level": 51}
+
+
+@pytest.mark.asyncio
+async def test_cloud_fallback(hass):
+    async with (
+        CloudStandIn() as cloud,
+        aiohttp.ClientSession(cookie_jar=aiohttp.CookieJar(unsafe=True)) as session,
+    ):
+        config_entry = MockConfigEntry(
+            domain=DOMAIN, data={"inverter_serial_number": "4512345678"}
+        )
+        client = EG4ApiClient(host="127.0.0.1", port=1)
+        cloud_client = EG4CloudClient(
+            USERNAME,
+            PASSWORD,
+            session,
+            base_url=cloud.url,
+            bucket=TokenBucket(100, 100),
+        )
+        coordinator = EG4DataUpdateCoordinator(
+            hass,
+            client,
+            30,
+            config_entry=config_entry,
+            options=CoordinatorOptions(cloud_client=cloud_client),
+        )
+        data = await coordinator._async_update_data()
+        assert data == {"charge_level": 87, "inverter_performance": 4200}
+        assert coordinator.arbiter.active == SOURCE_CLOUD
+        assert coordinator.value_sources["charge_level"].source == SOURCE_CLOUD
+        assert coordinator.metrics.last.source == SOURCE_CLOUD
+        assert coordinator.metrics.failed_cycles == 1
+
+
+@pytest.mark.asyncio
+async def test_cloud_credentials_rejected(hass):
+    async with (
+        CloudStandIn() as cloud,
+        aiohttp.ClientSession(cookie_jar=aiohttp.CookieJar(unsafe=True)) as session,
+    ):
+        config_entry = MockConfigEntry(
+            domain=DOMAIN, data={"inverter_serial_number": "4512345678"}
+        )
+        client = EG4ApiClient(host="127.0.0.1", port=1)
+        cloud_client = EG4CloudClient(
+            USERNAME, "wrong", session, base_url=cloud.url, bucket=TokenBucket(100, 100)
+        )
+        coordinator = EG4DataUpdateCoordinator(
+            hass,
+            client,
+            30,
+            config_entry=config_entry,
+            options=CoordinatorOptions(cloud_client=cloud_client),
+        )
+        with pytest.raises(ConfigEntryAuthFailed):
+            await coordinator._async_update_data()
+
+
+@pytest.mark.asyncio
+async def test_local_recovers_from_cloud(hass, simulator):
+    async with (
+        CloudStandIn() as cloud,
+        aiohttp.ClientSession(cookie_jar=aiohttp.CookieJar(unsafe=True)) as session,
+    ):
+        config_entry = MockConfigEntry(
+            domain=DOMAIN, data={"inverter_serial_number": "4512345678"}
+        )
+        client = EG4ApiClient(host=simulator.host, port=1)
+        cloud_client = EG4CloudClient(
+            USERNAME,
+            PASSWORD,
+            session,
+            base_url=cloud.url,
+            bucket=TokenBucket(100, 100),
+        )
+        coordinator = EG4DataUpdateCoordinator(
+            hass,
+            client,
+            30,
+            config_entry=config_entry,
+            options=CoordinatorOptions(cloud_client=cloud_client),
+        )
+        await coordinator._async_update_data()
+        assert coordinator.arbiter.active == SOURCE_CLOUD
+
+        # The local link answers again and takes over on the first cycle
+        # after the client's reconnect backoff has run out.
+        client.port = simulator.port
+        await asyncio.sleep(max(0.0, client._next_attempt - time.monotonic()))
+        data = await coordinator._async_update_data()
+        assert coordinator.arbiter.active == SOURCE_LOCAL
+        assert coordinator.value_sources["charge_level"].source == SOURCE_LOCAL
+        assert (
+            data["charge_level"]
+            == sample_values(INVERTER_REGISTERS.registers.values())["charge_level"]
+        )
+        assert cloud.requests == 2
+        await coordinator.async_close()
+
+
+@pytest.mark.asyncio
+async def test_energy_accumulated(hass, simulator):
+    client = EG4ApiClient(host=simulator.host, port=simulator.port)
+    coordinator = EG4DataUpdateCoordinator(hass, client, 30)
+    coordinator.data = await coordinator._async_update_data()
+    assert "pv_energy" not in coordinator.data
+
+    # The next read of the power group comes ten seconds after the first.
+    read_at, power = coordinator.energy._samples["inverter_performance"]
+    coordinator.energy._samples["inverter_performance"] = (read_at - 10, power)
+    coordinator.devices[0].scheduler.reset()
+    coordinator.data = await coordinator._async_update_data()
+
+    expected = power * 10 / 3_600_000
+    assert (
+        power
+        == sample_values(INVERTER_REGISTERS.registers.values())["inverter_performance"]
+    )
+    assert coordinator.energy.totals["pv_energy"] == pytest.approx(expected, rel=0.01)
+    assert coordinator.data["pv_energy"] == round(
+        coordinator.energy.totals["pv_energy"], 4
+    )
+    assert len(coordinator.history.rings["inverter_performance"]) == 2
+    await coordinator.async_close()
+
+
+@pytest.mark.asyncio
+async def test_energy_statistics_imported(recorder_mock, hass):
+    config_entry = MockConfigEntry(domain=DOMAIN, data={})
+    config_entry.add_to_hass(hass)
+    statistics = StatisticsImporter(hass, config_entry.entry_id, ENTITY_DESCRIPTIONS)
+    coordinator = EG4DataUpdateCoordinator(
+        hass,
+        IdleClient(),
+        30,
+        config_entry=config_entry,
+        options=CoordinatorOptions(statistics=statistics),
+    )
+    # The last update was an hour ago, so at least one hour has closed since.
+    coordinator.energy_hours.last = (time.time() - 3600, {"pv_energy": 0.0})
+    coordinator._accumulate({"inverter_performance": 3600}, 0.0)
+    coordinator._accumulate({"inverter_performance": 3600}, 120.0)
+    await hass.async_block_till_done(wait_background_tasks=True)
+    await async_wait_recording_done(hass)
+
+    statistic_id = statistics.statistic_id("pv_energy")
+    last = await get_instance(hass).async_add_executor_job(
+        get_last_statistics,
+        hass,
+        1,
+        statistic_id,
+        True,  # noqa: FBT003 convert_units
+        {"sum"},
+    )
+    assert 0 < last[statistic_id][0]["sum"] <= 0.12
+
+
+@pytest.mark.asyncio
+async def test_available_keys(hass):
+    coordinator = EG4DataUpdateCoordinator(hass, IdleClient(), 30)
+    assert "gridboss_status" not in coordinator.available_keys
+    assert {"charge_level", "pv_energy", "alerts_enabled"} <= coordinator.available_keys
+
+
+@pytest.mark.asyncio
+async def test_only_wanted_groups_polled(hass, simulator):
+    client = EG4ApiClient(host=simulator.host, port=simulator.port)
+    coordinator = EG4DataUpdateCoordinator(hass, client, 30)
+    remove = coordinator.async_add_listener(lambda: None, "pv_energy")
+    data = await coordinator._async_update_data()
+    assert coordinator.devices[0].scheduler.skipped == {"battery", "settings"}
+    assert "inverter_performance" in data
+    assert "pv_energy_today" in data
+    assert "charge_level" not in data
+    remove()
+    await coordinator.async_close()
+
+
+@pytest.mark.asyncio
+async def test_snapshot_restored(hass, hass_storage, simulator):
+    config_entry = MockConfigEntry(domain=DOMAIN, data={})
+    charge_level = sample_values(INVERTER_REGISTERS.registers.values())["charge_level"]
+    hass_storage[f"{DOMAIN}.{config_entry.entry_id}.snapshot"] = {
+        "version": 1,
+        "key": f"{DOMAIN}.{config_entry.entry_id}.snapshot",
+        "data": {
+            "values": {"charge_level": charge_level},
+            "sources": {"charge_level": ["local", "2026-01-01T00:00:00+00:00"]},
+        },
+    }
+    client = EG4ApiClient(host=simulator.host, port=simulator.port)
+    coordinator = EG4DataUpdateCoordinator(hass, client, 30, config_entry=config_entry)
+    assert await coordinator.async_restore_snapshot()
+    assert coordinator.data == {"charge_level": charge_level}
+    assert coordinator.stale_keys == {"charge_level"}
+    assert coordinator.value_sources["charge_level"].updated.year == 2026
+
+    coordinator.async_set_updated_data(await coordinator._async_update_data())
+    assert not coordinator.stale_keys
+    # Read again with the same value, but no longer stale.
+    assert "charge_level" in coordinator.changed_keys
+    await coordinator.async_close()
+
+
+@pytest.mark.asyncio
+async def test_no_snapshot(hass):
+    config_entry = MockConfigEntry(domain=DOMAIN, data={})
+    coordinator = EG4DataUpdateCoordinator(
+        hass, IdleClient(), 30, config_entry=config_entry
+    )
+    assert not await coordinator.async_restore_snapshot()
+    assert coordinator.data is None
+
+
+@pytest.mark.asyncio
+async def test_values_age_out_while_updates_fail(hass):
+    client = EG4ApiClient(host="127.0.0.1", port=1)
+    coordinator = EG4DataUpdateCoordinator(hass, client, 30)
+    values = {"charge_level": 50}
+    coordinator._record_sources(SOURCE_LOCAL, values)
+    coordinator.async_set_updated_data(values)
+    notified = []
+    coordinator.async_add_listener(lambda: notified.append(True), "charge_level")
+
+    await coordinator.async_refresh()
+    assert not coordinator.last_update_success
+    assert len(notified) == 1
+    assert not coordinator.expired_keys
+
+    # Later failures are not passed on, but the value still ages out.
+    coordinator.value_sources["charge_level"] = ValueSource(
+        SOURCE_LOCAL, dt_util.utcnow() - timedelta(hours=1)
+    )
+    await coordinator.async_refresh()
+    assert coordinator.expired_keys == {"charge_level"}
+    assert len(notified) == 2
+
+    await coordinator.async_refresh()
+    assert len(notified) == 2
+    await coordinator.async_shutdown()
+
+
+@pytest.mark.asyncio
+async def test_values_age_out(hass):
+    coordinator = EG4DataUpdateCoordinator(hass, IdleClient(), 30)
+    values = {"charge_level": 50, "inverter_performance": 100}
+    coordinator._record_sources(SOURCE_LOCAL, values)
+    coordinator.async_set_updated_data(values)
+    assert not coordinator.late_keys
+
+    # The power block timed out for a couple of cycles: shown, but stale.
+    coordinator.value_sources["inverter_performance"] = ValueSource(
+        SOURCE_LOCAL, dt_util.utcnow() - timedelta(seconds=70)
+    )
+    coordinator.async_set_updated_data(values)
+    assert coordinator.is_stale("inverter_performance")
+    assert not coordinator.is_stale("charge_level")
+    assert coordinator.changed_keys == {"inverter_performance"}
+    assert not coordinator.expired_keys
+
+    coordinator.value_sources["inverter_performance"] = ValueSource(
+        SOURCE_LOCAL, dt_util.utcnow() - timedelta(seconds=100)
+    )
+    coordinator.async_set_updated_data(values)
+    assert coordinator.expired_keys == {"inverter_performance"}
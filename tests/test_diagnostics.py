@@ -0,0 +1,32 @@
+from types import SimpleNamespace
+
+import pytest
+from custom_components.eg4_integration.api import EG4ApiClient
+from custom_components.eg4_integration.coordinator import EG4DataUpdateCoordinator
+from custom_components.eg4_integration.diagnostics import (
+    async_get_config_entry_diagnostics,
+)
+
+
+@pytest.mark.asyncio
+async def test_diagnostics(hass, simulator):
+    client = EG4ApiClient(host=simulator.host, port=simulator.port)
+    coordinator = EG4DataUpdateCoordinator(hass, client, 30)
+    coordinator.data = await coordinator._async_update_data()
+    entry = SimpleNamespace(
+        data={"host": simulator.host, "inverter_serial_number": "1234567890"},
+        options={},
+        runtime_data=SimpleNamespace(coordinator=coordinator, push=None),
+    )
+
+    diagnostics = await async_get_config_entry_diagnostics(hass, entry)
+
+    assert diagnostics["entry"]["data"] == {
+        "host": "**REDACTED**",
+        "inverter_serial_number": "**REDACTED**",
+    }
+    assert diagnostics["devices"][0]["link"]["requests"] == 3
+    metrics = diagnostics["poll_metrics"]
+    assert metrics["cycles"] == 1
+    assert len(metrics["traces"][0]["spans"]) == 3
+    await coordinator.async_close()
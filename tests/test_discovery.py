@@ -0,0 +1,96 @@
+import asyncio
+
+import pytest
+from custom_components.eg4_integration.api import EG4ApiClient
+from custom_components.eg4_integration.discovery import EG4Discovery
+
+
+class FakeResponder:
+    """Answers mDNS-style lookups for known dongles after a short delay."""
+
+    def __init__(self, hosts, delay=0.01):
+        self.hosts = hosts
+        self.delay = delay
+        self.queries = []
+
+    async def __call__(self, hostname):
+        self.queries.append(hostname)
+        await asyncio.sleep(self.delay)
+        return self.hosts.get(hostname)
+
+
+@pytest.mark.asyncio
+async def test_discovery_is_cached():
+    responder = FakeResponder({"EG4-1234.local.": "192.168.1.89"})
+    discovery = EG4Discovery(responder)
+
+    assert await discovery.async_discover("1234") == "192.168.1.89"
+    assert await discovery.async_discover("1234") == "192.168.1.89"
+    assert responder.queries == ["EG4-1234.local."]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_lookups_share_one_query():
+    responder = FakeResponder({"EG4-1234.local.": "192.168.1.89"})
+    discovery = EG4Discovery(responder)
+
+    results = await asyncio.gather(
+        *(discovery.async_discover("1234") for _ in range(5))
+    )
+    assert set(results) == {"192.168.1.89"}
+    assert len(responder.queries) == 1
+
+
+@pytest.mark.asyncio
+async def test_cache_expires():
+    responder = FakeResponder({"EG4-1234.local.": "192.168.1.89"})
+    discovery = EG4Discovery(responder, ttl=0)
+
+    await discovery.async_discover("1234")
+    responder.hosts["EG4-1234.local."] = "192.168.1.90"
+    assert await discovery.async_discover("1234") == "192.168.1.90"
+
+
+@pytest.mark.asyncio
+async def test_missing_dongle_is_not_requeried():
+    responder = FakeResponder({})
+    discovery = EG4Discovery(responder)
+
+    for _ in range(3):
+        with pytest.raises(ConnectionError):
+            await discovery.async_discover("1234")
+    assert len(responder.queries) == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_lookup_keeps_last_known_address():
+    responder = FakeResponder({})
+    discovery = EG4Discovery(responder)
+    discovery.seed("1234", "192.168.1.89")
+
+    assert await discovery.async_discover("1234") == "192.168.1.89"
+    assert len(responder.queries) == 1
+
+
+@pytest.mark.asyncio
+async def test_client_uses_seeded_address_without_lookup(monkeypatch):
+    responder = FakeResponder({})
+    discovery = EG4Discovery(responder)
+    discovery.seed("1234", "192.168.1.89")
+    saved = []
+    client = EG4ApiClient(
+        serial_number="1234", discovery=discovery, on_discovered=saved.append
+    )
+
+    class FakeModbusClient:
+        connected = True
+
+        async def connect(self):
+            return True
+
+    monkeypatch.setattr(client, "_build_client", FakeModbusClient)
+    await client.connect()
+
+    assert client.host == "192.168.1.89"
+    assert saved == ["192.168.1.89"]
+    assert responder.queries == []
@@ -0,0 +1,109 @@
+import pytest
+from custom_components.eg4_integration.energy import (
+    EnergyAccumulator,
+    EnergyChannel,
+    HourlySums,
+)
+
+
+def test_trapezoid():
+    energy = EnergyAccumulator(max_gap=3600)
+    assert energy.add({"inverter_performance": 1000}, 0) == {}
+    # 1 kW to 2 kW over an hour averages 1.5 kW.
+    assert energy.add({"inverter_performance": 2000}, 3600) == {"pv_energy": 1.5}
+
+
+def test_signed_power_split_at_zero():
+    energy = EnergyAccumulator(max_gap=7200)
+    energy.add({"grid_power": 1000}, 0)
+    # Importing 1 kW down to exporting 1 kW: crosses zero half way.
+    totals = energy.add({"grid_power": -1000}, 3600)
+    assert totals == {"grid_import_energy": 0.25, "grid_export_energy": 0.25}
+    totals = energy.add({"grid_power": -1000}, 7200)
+    assert totals == {"grid_import_energy": 0.25, "grid_export_energy": 1.25}
+
+
+def test_only_fresh_samples():
+    energy = EnergyAccumulator()
+    energy.add({"battery_power": 500, "inverter_performance": 100}, 0)
+    # Only values read in a cycle are integrated.
+    assert energy.add({"battery_power": 500}, 36) == {
+        "battery_charge_energy": 0.005,
+        "battery_discharge_energy": 0.0,
+    }
+    assert energy.totals["pv_energy"] == 0
+
+
+def test_gap_not_integrated():
+    energy = EnergyAccumulator(max_gap=60)
+    energy.add({"inverter_performance": 1000}, 0)
+    assert energy.add({"inverter_performance": 1000}, 600) == {}
+    assert energy.add({"inverter_performance": 1000}, 636) == {"pv_energy": 0.01}
+
+
+def test_restore():
+    energy = EnergyAccumulator((EnergyChannel("pv_energy", "pv"),))
+    energy.restore({"pv_energy": 12.5, "removed": 3})
+    energy.add({"pv": 3600}, 0)
+    assert energy.add({"pv": 3600}, 1) == {"pv_energy": 12.501}
+    assert energy.totals.keys() == {"pv_energy"}
+
+
+@pytest.mark.parametrize("value", [None, True, "n/a"])
+def test_non_numeric_ignored(value):
+    energy = EnergyAccumulator()
+    energy.add({"inverter_performance": 100}, 0)
+    assert energy.add({"inverter_performance": value}, 1) == {}
+
+
+def test_gap_backfilled_from_day_counter():
+    energy = EnergyAccumulator()
+    energy.add({"inverter_performance": 3600, "pv_energy_today": 2.0}, 0)
+    energy.reconcile({"pv_energy_today": 2.0}, "2026-06-01")
+    energy.add({"inverter_performance": 3600}, 100)
+    # Down for an hour while the device counted another 3.6 kWh.
+    energy.add({"inverter_performance": 3600}, 3700)
+    assert energy.reconcile({"pv_energy_today": 5.7}, "2026-06-01") == {
+        "pv_energy": 3.7
+    }
+    assert energy.backfilled == pytest.approx(3.6)
+
+    # Without another gap the counter only moves the mark.
+    energy.add({"inverter_performance": 3600}, 3800)
+    assert energy.reconcile({"pv_energy_today": 9.9}, "2026-06-01") == {}
+
+
+def test_gap_over_midnight_not_backfilled():
+    energy = EnergyAccumulator()
+    energy.reconcile({"pv_energy_today": 20.0}, "2026-06-01")
+    energy.add({"inverter_performance": 1000}, 0)
+    energy.add({"inverter_performance": 1000}, 3600)
+    assert energy.reconcile({"pv_energy_today": 1.0}, "2026-06-02") == {}
+
+
+def test_restart_backfilled():
+    before = EnergyAccumulator()
+    before.reconcile({"grid_import_energy_today": 1.0}, "2026-06-01")
+    before.add({"grid_power": 1800}, 0)
+    before.add({"grid_power": 1800}, 1000)
+    saved = before.as_dict()
+
+    after = EnergyAccumulator()
+    after.restore(saved["totals"], saved["marks"])
+    assert after.reconcile({"grid_import_energy_today": 3.0}, "2026-06-01") == {
+        "grid_import_energy": 2.0
+    }
+
+
+def test_hourly_sums_spread_over_gap():
+    hours = HourlySums()
+    assert hours.update(1800, {"pv_energy": 1.0}) == {}
+    assert hours.update(3000, {"pv_energy": 2.0}) == {}
+    # Four hours later: the rise is spread evenly over the hours between.
+    rows = hours.update(3000 + 4 * 3600, {"pv_energy": 6.0})
+    assert rows["pv_energy"] == [
+        (0, pytest.approx(2 + 600 / 3600)),
+        (3600, pytest.approx(3 + 600 / 3600)),
+        (7200, pytest.approx(4 + 600 / 3600)),
+        (10800, pytest.approx(5 + 600 / 3600)),
+    ]
@@ -0,0 +1,42 @@
+from custom_components.eg4_integration.history import (
+    PeriodAggregator,
+    SampleHistory,
+    SampleRing,
+)
+
+
+def test_ring_wraps():
+    ring = SampleRing(3)
+    for second in range(5):
+        ring.append(second, second * 10)
+    assert len(ring) == 3
+    assert list(ring) == [(2, 20), (3, 30), (4, 40)]
+    assert ring.since(3) == [(3, 30), (4, 40)]
+
+
+def test_period_aggregates():
+    aggregator = PeriodAggregator(300, keep=2)
+    for second, value in ((0, 5), (100, 1), (299, 9)):
+        assert aggregator.add(second, value) is None
+    closed = aggregator.add(300, 4)
+    assert (closed.start, closed.mean, closed.min, closed.max) == (0, 5, 1, 9)
+    aggregator.add(600, 0)
+    aggregator.add(900, 0)
+    # Only the last two completed periods are kept.
+    assert [aggregate.start for aggregate in aggregator.completed] == [300, 600]
+
+
+def test_history_keeps_numeric_values():
+    history = SampleHistory(size=10)
+    history.add({"power": 100, "alert": True, "mode": "on"}, 3590)
+    history.add({"power": 300}, 3595)
+    assert history.rings.keys() == {"power"}
+    assert history.window("power", 3595) == [(3595, 300)]
+    assert history.window("unknown", 0) == []
+    assert history.pop_hourly() == {}
+
+    history.add({"power": 200}, 3600)
+    hours = history.pop_hourly()
+    assert [(hour.start, hour.mean) for hour in hours["power"]] == [(0, 200)]
+    assert history.pop_hourly() == {}
+    assert [aggregate.start for aggregate in history.aggregates("power")] == [3300]
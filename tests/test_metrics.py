@@ -0,0 +1,56 @@
+from custom_components.eg4_integration.metrics import (
+    CycleTrace,
+    LinkStats,
+    PollMetrics,
+    RollingHistogram,
+)
+
+
+def test_histogram_percentiles():
+    histogram = RollingHistogram(size=100)
+    assert histogram.percentile(50) is None
+    assert histogram.summary() == {"count": 0}
+    for value in range(1, 101):
+        histogram.add(value / 1000)
+    assert histogram.percentile(50) == 0.05
+    assert histogram.percentile(99) == 0.099
+    assert histogram.summary() == {
+        "count": 100,
+        "p50_ms": 50.0,
+        "p95_ms": 95.0,
+        "p99_ms": 99.0,
+        "max_ms": 100.0,
+    }
+
+
+def test_histogram_rolls_over():
+    histogram = RollingHistogram(size=3)
+    for value in (10, 1, 2, 3):
+        histogram.add(value)
+    assert len(histogram) == 3
+    assert histogram.percentile(100) == 3
+
+
+def test_link_stats_arithmetic():
+    before = LinkStats(requests=2, bytes_sent=24)
+    after = LinkStats(requests=5, bytes_sent=60, timeouts=1)
+    assert after - before == LinkStats(requests=3, bytes_sent=36, timeouts=1)
+    assert before + before == LinkStats(requests=4, bytes_sent=48)
+
+
+def test_poll_metrics_record():
+    metrics = PollMetrics(traces=2)
+    for duration in (0.1, 0.2, 0.3):
+        trace = CycleTrace(
+            duration=duration, link=LinkStats(connects=1, connect_time=0.5, retries=1)
+        )
+        metrics.record(trace)
+    metrics.record(CycleTrace(duration=0.4), failed=True)
+
+    assert metrics.cycles == 4
+    assert metrics.failed_cycles == 1
+    assert len(metrics.traces) == 2
+    assert metrics.last.duration == 0.4
+    assert metrics.totals.retries == 3
+    assert metrics.connect_time.percentile(50) == 0.5
+    assert metrics.as_dict()["traces"][-1]["duration_ms"] == 400.0
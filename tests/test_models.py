@@ -0,0 +1,48 @@
+import json
+
+from custom_components.eg4_integration import models
+from custom_components.eg4_integration.models import (
+    DEFAULT_MAP,
+    GRIDBOSS_MAP,
+    MAPS_DIR,
+    load_register_map,
+    parse_register_map,
+)
+from custom_components.eg4_integration.registers import DataType
+
+
+def test_models_share_one_map():
+    flexboss = load_register_map("flexboss21")
+    assert load_register_map("6000xp") is flexboss
+    assert load_register_map(DEFAULT_MAP) is flexboss
+    # Plans and decoders built for one entry serve the others.
+    names = frozenset(("power",))
+    assert flexboss.plan(names) is load_register_map("18kpv").plan(names)
+
+
+def test_unknown_model_gets_default_map():
+    assert load_register_map("not-a-model") is load_register_map(DEFAULT_MAP)
+    assert load_register_map(None) is load_register_map(DEFAULT_MAP)
+
+
+def test_map_file_round_trip():
+    data = json.loads((MAPS_DIR / "inverter.json").read_text())
+    register_map = parse_register_map(data)
+    assert list(register_map.groups) == [
+        "power",
+        "battery",
+        "energy_today",
+        "settings",
+    ]
+    grid_power = register_map.registers["grid_power"]
+    assert (grid_power.address, grid_power.data_type) == (103, DataType.INT16)
+    assert register_map.registers["pv_energy_today"].scale == 0.1
+    assert register_map.registers["alert_status"].bit == 0
+
+
+def test_unconfigured_map_not_parsed(monkeypatch):
+    monkeypatch.setattr(models, "_MAPS", {})
+    load_register_map("flexboss18")
+    assert list(models._MAPS) == [DEFAULT_MAP]
+    load_register_map("gridboss")
+    assert GRIDBOSS_MAP in models._MAPS
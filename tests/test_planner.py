@@ -0,0 +1,97 @@
+import pytest
+from custom_components.eg4_integration.models import (
+    DEFAULT_MAP,
+    GRIDBOSS_MAP,
+    load_register_map,
+)
+from custom_components.eg4_integration.planner import async_read_spans, plan_reads
+from custom_components.eg4_integration.registers import (
+    DataType,
+    Register,
+    RegisterType,
+)
+
+INVERTER_REGISTERS = load_register_map(DEFAULT_MAP)
+GRIDBOSS_REGISTERS = load_register_map(GRIDBOSS_MAP)
+
+
+class CountingClient:
+    def __init__(self):
+        self.requests = []
+
+    async def read_data(
+        self, address, count, register_type=RegisterType.HOLDING, unit_id=1
+    ):
+        self.requests.append((register_type, address, count))
+        return [address + offset for offset in range(count)]
+
+
+def registers(**addresses):
+    return [Register(key, address) for key, address in addresses.items()]
+
+
+def test_contiguous_addresses_share_one_span():
+    spans = plan_reads(registers(a=10, b=11, c=12))
+    assert len(spans) == 1
+    assert (spans[0].address, spans[0].count) == (10, 3)
+
+
+def test_gap_tolerance():
+    assert len(plan_reads(registers(a=10, b=15), max_gap=4)) == 1
+    assert len(plan_reads(registers(a=10, b=15), max_gap=3)) == 2
+
+
+def test_max_registers_limits_span_length():
+    spans = plan_reads(
+        [Register(f"r{address}", address) for address in range(100)],
+        max_registers=40,
+    )
+    assert [span.count for span in spans] == [40, 40, 20]
+
+
+def test_wide_values_extend_span():
+    spans = plan_reads([Register("energy", 10, DataType.UINT32), Register("power", 12)])
+    assert [(span.address, span.count) for span in spans] == [(10, 3)]
+
+    spans = plan_reads([Register("energy", 39, DataType.UINT32)], max_registers=1)
+    assert [(span.address, span.count) for span in spans] == [(39, 2)]
+
+
+def test_register_types_read_separately():
+    spans = plan_reads(
+        [
+            Register("a", 5, register_type=RegisterType.INPUT),
+            Register("b", 6),
+        ]
+    )
+    assert [span.register_type for span in spans] == [
+        RegisterType.HOLDING,
+        RegisterType.INPUT,
+    ]
+
+
+def test_decode_restores_keys():
+    (span,) = plan_reads(registers(a=5, b=7, c=5))
+    assert span.decode([50, 60, 70]) == {"a": 50, "c": 50, "b": 70}
+
+
+def test_invalid_limits():
+    with pytest.raises(ValueError):
+        plan_reads(registers(a=1), max_registers=126)
+    with pytest.raises(ValueError):
+        plan_reads(registers(a=1), max_gap=-1)
+
+
+@pytest.mark.asyncio
+async def test_round_trips_per_cycle():
+    client = CountingClient()
+    all_registers = [
+        *INVERTER_REGISTERS.registers.values(),
+        *GRIDBOSS_REGISTERS.registers.values(),
+    ]
+    data = await async_read_spans(client, plan_reads(all_registers))
+
+    assert data.keys() == {register.key for register in all_registers}
+    # 100-114, 200, 210-211 and 300-301 are too far apart to merge.
+    assert len(client.requests) == 4
+    assert len(client.requests) < len(all_registers)
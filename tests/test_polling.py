@@ -0,0 +1,181 @@
+import asyncio
+import time
+
+import pytest
+from custom_components.eg4_integration.api import EG4ApiClientCommunicationError
+from custom_components.eg4_integration.breaker import (
+    BreakerState,
+    EG4CircuitOpenError,
+)
+from custom_components.eg4_integration.metrics import CycleTrace
+from custom_components.eg4_integration.polling import (
+    LinkLimiter,
+    PolledDevice,
+    async_poll_devices,
+)
+from custom_components.eg4_integration.registers import Register, RegisterType
+from custom_components.eg4_integration.scheduler import (
+    PollScheduler,
+    PollTier,
+    RegisterGroup,
+    RegisterMap,
+)
+
+LATENCY = 0.05
+GROUPS = RegisterMap(
+    (
+        RegisterGroup(
+            "power",
+            PollTier.FAST,
+            (Register("pv_power", 10), Register("grid_power", 11)),
+        ),
+        RegisterGroup("battery", PollTier.MEDIUM, (Register("soc", 40),)),
+    )
+)
+
+
+class SimulatedDevice:
+    """A Modbus unit answering every request after a fixed latency."""
+
+    def __init__(self, link, connection_type="TCP", latency=LATENCY):
+        self.link_key = (connection_type, link)
+        self.connection_type = connection_type
+        self.latency = latency
+        self.max_read_registers = 40
+        self.silent_interval = 0.0
+        self.requests = 0
+        self.units = []
+
+    async def ensure_connected(self):
+        pass
+
+    async def read_data(
+        self, address, count, register_type=RegisterType.HOLDING, unit_id=1
+    ):
+        self.requests += 1
+        self.units.append(unit_id)
+        await asyncio.sleep(self.latency)
+        return [unit_id] * count
+
+
+def site(clients):
+    return [
+        PolledDevice(f"unit{index}", client, PollScheduler(GROUPS, 10), index + 1)
+        for index, client in enumerate(clients)
+    ]
+
+
+async def timed_cycle(devices, budget=5, trace=None):
+    start = time.perf_counter()
+    results = await async_poll_devices(devices, LinkLimiter(), 0, budget, trace)
+    return results, time.perf_counter() - start
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("count", [1, 4, 10])
+async def test_benchmark_tcp_site(count):
+    devices = site(SimulatedDevice(f"dongle{index}") for index in range(count))
+    results, elapsed = await timed_cycle(devices)
+
+    assert all(isinstance(result, dict) for result in results.values())
+    # Two spans per device; dongles are polled side by side.
+    assert elapsed < 2 * LATENCY * 2
+
+
+@pytest.mark.asyncio
+async def test_benchmark_shared_rs485_bus_is_serialized():
+    bus = SimulatedDevice("/dev/ttyUSB0", connection_type="RTU")
+    devices = site([bus] * 4)
+    results, elapsed = await timed_cycle(devices)
+
+    assert [result["soc"] for result in results.values()] == [1, 2, 3, 4]
+    assert bus.requests == 8
+    assert elapsed >= 8 * LATENCY
+
+
+@pytest.mark.asyncio
+async def test_slow_device_does_not_hold_back_others():
+    devices = site([SimulatedDevice("dongle0"), SimulatedDevice("dongle1", latency=10)])
+    results, elapsed = await timed_cycle(devices, budget=0.5)
+
+    assert results["unit0"]["pv_power"] == 1
+    assert isinstance(results["unit1"], TimeoutError)
+    assert elapsed < 1
+
+
+@pytest.mark.asyncio
+async def test_shared_bus_round_robin():
+    bus = SimulatedDevice("/dev/ttyUSB0", connection_type="RTU", latency=0.001)
+    devices = site([bus] * 3)
+    await timed_cycle(devices)
+
+    # Units take turns span by span instead of one unit draining its plan.
+    assert bus.units == [1, 2, 3, 1, 2, 3]
+
+
+class DeadDevice(SimulatedDevice):
+    """A Modbus unit that stopped answering."""
+
+    def __init__(self, link):
+        super().__init__(link)
+        self.alive = False
+
+    async def read_data(
+        self, address, count, register_type=RegisterType.HOLDING, unit_id=1
+    ):
+        self.requests += 1
+        if not self.alive:
+            msg = "no answer"
+            raise EG4ApiClientCommunicationError(msg)
+        return [unit_id] * count
+
+
+@pytest.mark.asyncio
+async def test_unreachable_device_left_alone():
+    dead = DeadDevice("dongle0")
+    (device,) = site([dead])
+    limiter = LinkLimiter()
+    for now in (0, 10):
+        await async_poll_devices([device], limiter, now, 5)
+    assert device.breaker.state_at(20) is BreakerState.OPEN
+    requests = dead.requests
+
+    results = await async_poll_devices([device], limiter, 20, 5)
+    assert isinstance(results["unit0"], EG4CircuitOpenError)
+    assert dead.requests == requests
+
+    # Half open: one probe read, then the usual poll once it answers.
+    dead.alive = True
+    results = await async_poll_devices([device], limiter, 40, 5)
+    assert results["unit0"]["soc"] == 1
+    assert dead.requests == requests + 3
+    assert device.breaker.state_at(40) is BreakerState.CLOSED
+
+
+class SlowBlockDevice(SimulatedDevice):
+    """A Modbus unit that never answers for one block."""
+
+    def __init__(self, link, slow_address):
+        super().__init__(link)
+        self.slow_address = slow_address
+
+    async def read_data(
+        self, address, count, register_type=RegisterType.HOLDING, unit_id=1
+    ):
+        if address == self.slow_address:
+            await asyncio.sleep(10)
+        return await super().read_data(address, count, register_type, unit_id)
+
+
+@pytest.mark.asyncio
+async def test_slow_block_only_costs_its_values():
+    (device,) = site([SlowBlockDevice("dongle0", 40)])
+    trace = CycleTrace()
+    results, elapsed = await timed_cycle([device], budget=0.5, trace=trace)
+
+    assert results["unit0"] == {"pv_power": 1, "grid_power": 1}
+    assert trace.span_timeouts == 1
+    assert elapsed < 1
+    # The block that timed out is read again on the next cycle.
+    assert device.scheduler.due(1) == {"battery"}
+    assert device.breaker.failures == 0
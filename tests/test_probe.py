@@ -0,0 +1,95 @@
+import asyncio
+import struct
+
+import pytest
+from custom_components.eg4_integration.probe import (
+    IDENTITY_REGISTERS,
+    DongleIdentity,
+    async_probe_host,
+    async_scan,
+    subnet_hosts,
+)
+from custom_components.eg4_integration.registers import RegisterType
+
+from .dongle import FakeDongle
+from .simulator import EG4Simulator, SimulatedUnit
+
+SERIAL = "4512345678"
+
+
+def identity_values(serial=SERIAL, device_type=5):
+    words = struct.unpack("<5H", serial.encode().ljust(10, b"\x00"))
+    return {
+        "device_type": device_type,
+        **{f"serial_{index}": word for index, word in enumerate(words)},
+    }
+
+
+@pytest.mark.asyncio
+async def test_probe_modbus():
+    unit = SimulatedUnit.from_values(
+        IDENTITY_REGISTERS.registers.values(), identity_values()
+    )
+    async with EG4Simulator({1: unit}) as simulator:
+        identity = await async_probe_host(simulator.host, simulator.port)
+    assert identity == DongleIdentity(
+        simulator.host, SERIAL, "12000xp", frozenset((simulator.port,))
+    )
+    # Identified with a single read.
+    assert unit.requests == 1
+
+
+@pytest.mark.asyncio
+async def test_probe_dongle_protocol():
+    async with FakeDongle() as dongle:
+        for offset, word in enumerate(identity_values(device_type=8).values()):
+            address = 0 if offset == 0 else offset + 1
+            dongle.registers[RegisterType.HOLDING, address] = word
+        identity = await async_probe_host(
+            dongle.host, dongle.port, dongle_protocol=True
+        )
+    assert identity.serial_number == SERIAL
+    assert identity.model == "gridboss"
+
+
+@pytest.mark.asyncio
+async def test_probe_rejects_other_devices(simulator):
+    # A Modbus device without an EG4 identity.
+    assert await async_probe_host(simulator.host, simulator.port) is None
+    # Nothing listening.
+    assert await async_probe_host("127.0.0.1", 1) is None
+
+
+@pytest.mark.asyncio
+async def test_scan_merges_ports_and_keeps_deadline():
+    unit = SimulatedUnit.from_values(
+        IDENTITY_REGISTERS.registers.values(), identity_values()
+    )
+
+    async def _silent(reader, writer):
+        await reader.read()
+
+    silent = await asyncio.start_server(_silent, "127.0.0.1", 0)
+    silent_port = silent.sockets[0].getsockname()[1]
+    async with EG4Simulator({1: unit}) as simulator:
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        found = await async_scan(
+            ["127.0.0.1"],
+            ports=(simulator.port, silent_port, 1),
+            deadline=0.3,
+            read_timeout=5,
+        )
+        # The silent port is abandoned at the deadline.
+        assert loop.time() - start < 1
+    silent.close()
+    assert found == [
+        DongleIdentity("127.0.0.1", SERIAL, "12000xp", frozenset((simulator.port,)))
+    ]
+
+
+def test_subnet_hosts():
+    hosts = subnet_hosts("192.168.1.23")
+    assert len(hosts) == 253
+    assert hosts[0] == "192.168.1.1"
+    assert "192.168.1.23" not in hosts
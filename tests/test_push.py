@@ -0,0 +1,92 @@
+import asyncio
+
+import pytest
+from custom_components.eg4_integration import push
+from custom_components.eg4_integration.push import FrameParser, PushListener
+from custom_components.eg4_integration.registers import Register, RegisterType
+from custom_components.eg4_integration.scheduler import (
+    PollTier,
+    RegisterGroup,
+    RegisterMap,
+)
+
+from .dongle import FakeDongle, build_data_frame, build_heartbeat
+
+REGISTERS = RegisterMap(
+    (
+        RegisterGroup(
+            "power",
+            PollTier.FAST,
+            (
+                Register("pv_power", 7, register_type=RegisterType.INPUT),
+                Register(
+                    "grid_voltage", 12, scale=0.1, register_type=RegisterType.INPUT
+                ),
+                Register("fault", 60, bit=3, register_type=RegisterType.INPUT),
+            ),
+        ),
+    )
+)
+WORDS = [0] * 40
+WORDS[7] = 4200
+WORDS[12] = 2405
+
+
+def test_parse_frame_split_anywhere():
+    frame = build_data_frame(RegisterType.INPUT, 0, WORDS)
+    parser = FrameParser(REGISTERS)
+    frames = []
+    for index in range(len(frame)):
+        frames += parser.feed(frame[index : index + 1])
+
+    assert len(frames) == 1
+    assert frames[0].address == 0
+    assert frames[0].count == 40
+    assert frames[0].values == {"pv_power": 4200, "grid_voltage": 240.5}
+
+
+def test_parse_stream():
+    parser = FrameParser(REGISTERS)
+    corrupt = bytearray(build_data_frame(RegisterType.INPUT, 0, WORDS))
+    corrupt[-3] ^= 0xFF
+    stream = (
+        b"\x00garbage\xa1"
+        + build_heartbeat()
+        + bytes(corrupt)
+        + build_data_frame(RegisterType.HOLDING, 0, WORDS)
+        + build_data_frame(RegisterType.INPUT, 40, [8] * 40)
+    )
+
+    frames = parser.feed(stream)
+
+    # Holding registers 0-39 hold nothing of the map and are skipped.
+    assert [frame.values for frame in frames] == [{"fault": True}]
+    assert parser.heartbeats == [build_heartbeat()]
+    assert parser.errors == 1
+
+
+@pytest.mark.asyncio
+async def test_listener_receives_pushed_values(monkeypatch):
+    monkeypatch.setattr(push, "PUSH_RECONNECT_DELAY", 0.01)
+    received = []
+    async with FakeDongle() as dongle:
+        listener = PushListener(
+            lambda: dongle.host, REGISTERS, received.append, port=dongle.port
+        )
+        listener.start()
+        await asyncio.wait_for(dongle.connected.wait(), 1)
+
+        await dongle.push(RegisterType.INPUT, 0, WORDS)
+        await dongle.send(build_heartbeat())
+        async with asyncio.timeout(1):
+            while not received or not dongle.received:
+                await asyncio.sleep(0.01)
+        assert received == [{"pv_power": 4200, "grid_voltage": 240.5}]
+        # Heartbeats are echoed back.
+        assert bytes(dongle.received) == build_heartbeat()
+
+        # The listener comes back after the dongle drops it.
+        await dongle.disconnect()
+        await asyncio.wait_for(dongle.connected.wait(), 1)
+        assert dongle.connections == 2
+        await listener.stop()
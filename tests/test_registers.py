@@ -0,0 +1,69 @@
+import pytest
+from custom_components.eg4_integration.registers import (
+    DataType,
+    Register,
+    compile_decoder,
+    encode_value,
+)
+
+
+def test_decode_scaled_and_signed_values():
+    decode = compile_decoder(
+        0,
+        4,
+        [
+            Register("voltage", 0, scale=0.1),
+            Register("frequency", 1, scale=0.01),
+            Register("battery_current", 2, DataType.INT16, scale=0.1),
+            Register("temperature", 3, DataType.INT16),
+        ],
+    )
+    assert decode([2305, 6001, 0xFF9C, 0xFFFB]) == {
+        "voltage": 230.5,
+        "frequency": 60.01,
+        "battery_current": -10.0,
+        "temperature": -5,
+    }
+
+
+def test_decode_32_bit_values_low_word_first():
+    decode = compile_decoder(
+        10,
+        4,
+        [
+            Register("pv_energy", 10, DataType.UINT32, scale=0.1),
+            Register("grid_power", 12, DataType.INT32),
+        ],
+    )
+    assert decode([0x86A0, 0x0001, 0xFFFF, 0xFFFF]) == {
+        "pv_energy": 10000.0,
+        "grid_power": -1,
+    }
+
+
+def test_decode_bitfields_and_gaps():
+    decode = compile_decoder(
+        0,
+        5,
+        [
+            Register("grid_on", 0, bit=0),
+            Register("fault", 0, bit=3),
+            Register("soc", 4),
+        ],
+    )
+    assert decode([0b1000, 1, 2, 3, 87]) == {
+        "grid_on": False,
+        "fault": True,
+        "soc": 87,
+    }
+
+
+def test_encode_flag_keeps_other_bits():
+    fault = Register("fault", 0, bit=3)
+    assert encode_value(fault, True, 0b0001) == [0b1001]
+    assert encode_value(fault, False, 0b1001) == [0b0001]
+
+
+def test_overlapping_values_rejected():
+    with pytest.raises(ValueError):
+        compile_decoder(0, 2, [Register("a", 0, DataType.UINT32), Register("b", 1)])
@@ -0,0 +1,83 @@
+from custom_components.eg4_integration.registers import Register, RegisterType
+from custom_components.eg4_integration.scheduler import (
+    PollScheduler,
+    PollTier,
+    RegisterGroup,
+    RegisterMap,
+)
+
+GROUPS = RegisterMap(
+    (
+        RegisterGroup(
+            "power",
+            PollTier.FAST,
+            (Register("pv_power", 10), Register("grid_power", 11)),
+        ),
+        RegisterGroup(
+            "battery",
+            PollTier.MEDIUM,
+            (Register("soc", 12), Register("temperature", 13)),
+        ),
+        RegisterGroup("settings", PollTier.SLOW, (Register("serial", 50),)),
+    )
+)
+
+
+def test_everything_due_on_first_cycle():
+    scheduler = PollScheduler(GROUPS, 10)
+    assert scheduler.due(0) == {"power", "battery", "settings"}
+
+
+def test_groups_follow_their_tier():
+    scheduler = PollScheduler(GROUPS, 10)
+    polled = {name: 0 for name in scheduler.groups}
+    for now in range(0, 600, 10):
+        due = scheduler.due(now)
+        for name in due:
+            polled[name] += 1
+        scheduler.mark_polled(due, now)
+
+    assert polled == {"power": 60, "battery": 10, "settings": 1}
+
+
+def test_fast_interval_bounds_slower_tiers():
+    scheduler = PollScheduler(GROUPS, 120)
+    scheduler.mark_polled(scheduler.due(0), 0)
+    assert scheduler.due(120) == {"power", "battery"}
+
+
+def test_due_groups_are_coalesced():
+    scheduler = PollScheduler(GROUPS, 10)
+    spans = scheduler.plan(frozenset({"power", "battery"}))
+    assert [(span.address, span.count) for span in spans] == [(10, 4)]
+
+
+def test_plans_shared_between_schedulers():
+    names = frozenset({"power", "battery"})
+    first = PollScheduler(GROUPS, 10).plan(names)
+    assert PollScheduler(GROUPS, 30).plan(names) is first
+
+
+def test_register_types_planned_separately():
+    groups = RegisterMap(
+        (
+            RegisterGroup(
+                "runtime",
+                PollTier.FAST,
+                (Register("pv_power", 10, register_type=RegisterType.INPUT),),
+            ),
+            RegisterGroup("settings", PollTier.SLOW, (Register("limit", 11),)),
+        )
+    )
+    scheduler = PollScheduler(groups, 10)
+    spans = scheduler.plan(scheduler.due(0))
+    assert {span.register_type for span in spans} == set(RegisterType)
+
+
+def test_unselected_groups_skipped():
+    scheduler = PollScheduler(GROUPS, 10)
+    scheduler.select({"soc"})
+    assert scheduler.due(0) == {"battery"}
+    scheduler.mark_polled({"battery"}, 0)
+    scheduler.select({"soc", "pv_power"})
+    assert scheduler.due(10) == {"power"}
@@ -1,17 +1,39 @@
 import pytest
 from homeassistant.components.sensor import SensorEntity
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.eg4_integration.const import DOMAIN
+from custom_components.eg4_integration.coordinator import EG4DataUpdateCoordinator
 from custom_components.eg4_integration.sensor import ENTITY_DESCRIPTIONS, EG4Sensor
 
+
+class IdleClient:
+    connection_type = "TCP"
+    max_read_registers = 40
+
+
+def idle_coordinator(hass, values):
+    config_entry = MockConfigEntry(domain=DOMAIN, data={})
+    coordinator = EG4DataUpdateCoordinator(
+        hass, IdleClient(), 30, config_entry=config_entry
+    )
+    coordinator.data = values
+    return coordinator
+
+
 @pytest.mark.asyncio
 async def test_sensor_entities(hass):
     coordinator = hass.data["eg4_integration"]
-    sensors = [EG4Sensor(coordinator, description) for description in ENTITY_DESCRIPTIONS]
+    sensors = [
+        EG4Sensor(coordinator, description) for description in ENTITY_DESCRIPTIONS
+    ]
 
     for sensor in sensors:
         assert isinstance(sensor, SensorEntity)
         assert sensor.native_value is not None
         assert sensor.entity_description.key in coordinator.data
 
+
 @pytest.mark.asyncio
 async def test_sensor_data(hass):
     coordinator = hass.data["eg4_integration"]
@@ -21,7 +43,69 @@ async def test_sensor_data(hass):
         "inverter_performance": 95,
     }
 
-    sensors = [EG4Sensor(coordinator, description) for description in ENTITY_DESCRIPTIONS]
+    sensors = [
+        EG4Sensor(coordinator, description) for description in ENTITY_DESCRIPTIONS
+    ]
 
     for sensor in sensors:
         assert sensor.native_value == coordinator.data[sensor.entity_description.key]
+
+
+@pytest.mark.asyncio
+async def test_sensor_deadband(hass, monkeypatch):
+    coordinator = idle_coordinator(hass, {"inverter_performance": 1000})
+    description = next(
+        d for d in ENTITY_DESCRIPTIONS if d.key == "inverter_performance"
+    )
+    sensor = EG4Sensor(coordinator, description)
+    writes = []
+    monkeypatch.setattr(
+        sensor, "async_write_ha_state", lambda: writes.append(sensor.native_value)
+    )
+
+    # Within max(5 W, 2 %) of the published value: suppressed.
+    coordinator.data = {"inverter_performance": 1015}
+    sensor._handle_coordinator_update()
+    assert writes == []
+    assert sensor.native_value == 1000
+    assert sensor.raw_value == 1015
+
+    # Compared with the published value, not the last one read.
+    coordinator.data = {"inverter_performance": 1020}
+    sensor._handle_coordinator_update()
+    assert writes == [1020]
+
+    coordinator.data = {"inverter_performance": 1016}
+    sensor._handle_coordinator_update()
+    assert writes == [1020]
+
+    # Nothing published for longer than max_silence: the heartbeat is due.
+    sensor._published_at -= description.max_silence.total_seconds() + 1
+    sensor._handle_coordinator_update()
+    assert writes == [1020, 1016]
+
+
+@pytest.mark.asyncio
+async def test_sensor_heartbeat(hass, monkeypatch):
+    coordinator = idle_coordinator(hass, {"charge_level": 50})
+    description = next(d for d in ENTITY_DESCRIPTIONS if d.key == "charge_level")
+    sensor = EG4Sensor(coordinator, description)
+    writes = []
+    monkeypatch.setattr(
+        sensor, "async_write_ha_state", lambda: writes.append(sensor.native_value)
+    )
+
+    coordinator.data = {"charge_level": 50.5}
+    sensor._handle_coordinator_update()
+    assert sensor.native_value == 50
+    assert writes == []
+
+    sensor._published_at -= description.max_silence.total_seconds() + 1
+    sensor._handle_coordinator_update()
+    assert sensor.native_value == 50.5
+    assert writes == [50.5]
+
+    # A change past the deadband is written at once.
+    coordinator.data = {"charge_level": 52}
+    sensor._handle_coordinator_update()
+    assert writes == [50.5, 52]
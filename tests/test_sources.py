@@ -0,0 +1,67 @@
+from custom_components.eg4_integration.sources import (
+    SOURCE_CLOUD,
+    SOURCE_LOCAL,
+    SourceArbiter,
+)
+
+
+def test_local_preferred():
+    arbiter = SourceArbiter((SOURCE_CLOUD, SOURCE_LOCAL))
+    assert arbiter.candidates(0) == [SOURCE_LOCAL, SOURCE_CLOUD]
+    # Even a slow local link beats data the cloud has had for minutes.
+    arbiter.record_success(SOURCE_LOCAL, 5.0)
+    arbiter.record_success(SOURCE_CLOUD, 0.2)
+    assert arbiter.candidates(0) == [SOURCE_LOCAL, SOURCE_CLOUD]
+
+
+def test_failover_and_recovery():
+    arbiter = SourceArbiter((SOURCE_LOCAL, SOURCE_CLOUD), probe_interval=30)
+    arbiter.record_success(SOURCE_LOCAL, 0.1)
+    assert arbiter.active == SOURCE_LOCAL
+
+    # A single failure is retried first on the next cycle.
+    arbiter.record_failure(SOURCE_LOCAL, 100)
+    arbiter.record_success(SOURCE_CLOUD, 0.5)
+    assert arbiter.active == SOURCE_CLOUD
+    assert arbiter.candidates(110) == [SOURCE_LOCAL, SOURCE_CLOUD]
+
+    # Repeated failures back off, leaving the cloud alone in between.
+    arbiter.record_failure(SOURCE_LOCAL, 110)
+    assert arbiter.candidates(120) == [SOURCE_CLOUD]
+    arbiter.record_failure(SOURCE_LOCAL, 140)
+    assert arbiter.candidates(190) == [SOURCE_CLOUD]
+    assert arbiter.candidates(200) == [SOURCE_LOCAL, SOURCE_CLOUD]
+
+    # The probe succeeds and the local link takes over again.
+    arbiter.record_success(SOURCE_LOCAL, 0.1)
+    assert arbiter.active == SOURCE_LOCAL
+    assert arbiter.candidates(200) == [SOURCE_LOCAL, SOURCE_CLOUD]
+    assert arbiter.switches == 2
+
+
+def test_backoff_capped():
+    arbiter = SourceArbiter((SOURCE_LOCAL,), probe_interval=30, max_probe_interval=60)
+    for _ in range(10):
+        arbiter.record_failure(SOURCE_LOCAL, 0)
+    assert arbiter.sources[SOURCE_LOCAL].retry_at == 60
+
+
+def test_always_one_candidate():
+    arbiter = SourceArbiter((SOURCE_LOCAL, SOURCE_CLOUD))
+    for source, now in (
+        (SOURCE_LOCAL, 0),
+        (SOURCE_LOCAL, 0),
+        (SOURCE_CLOUD, 5),
+        (SOURCE_CLOUD, 5),
+    ):
+        arbiter.record_failure(source, now)
+    # Both are backing off; the one due first is tried anyway.
+    assert arbiter.candidates(10) == [SOURCE_LOCAL]
+
+
+def test_latency_smoothed():
+    arbiter = SourceArbiter((SOURCE_LOCAL,))
+    arbiter.record_success(SOURCE_LOCAL, 1.0)
+    arbiter.record_success(SOURCE_LOCAL, 2.0)
+    assert arbiter.sources[SOURCE_LOCAL].latency == 1.2
+    assert arbiter.as_dict()["sources"][0]["latency_ms"] == 1200.0
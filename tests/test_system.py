@@ -0,0 +1,131 @@
+from types import SimpleNamespace
+
+import pytest
+from pytest_homeassistant_custom_component.common import async_fire_time_changed
+
+from custom_components.eg4_integration.const import DOMAIN
+from custom_components.eg4_integration.system import (
+    LOAD_POWER,
+    SYSTEM_SAVE_DELAY,
+    SYSTEM_STORE_VERSION,
+    SystemAggregator,
+    async_get_system,
+)
+
+
+class MemberStandIn:
+    """Just enough of a coordinator to be summed."""
+
+    available_keys = frozenset(
+        ("inverter_performance", "grid_power", "battery_power", "pv_energy")
+    )
+
+    def __init__(self, **data):
+        self.data = data
+        self.expired_keys = frozenset()
+        self.energy = SimpleNamespace(totals={"pv_energy": 0.0})
+        self.listeners = {}
+
+    def async_add_listener(self, update_callback, context=None):
+        self.listeners[context] = update_callback
+        return lambda: self.listeners.pop(context)
+
+    def update(self, **values):
+        self.data.update(values)
+        for key in values:
+            self.listeners[key]()
+
+
+def test_running_sums():
+    system = SystemAggregator()
+    first = MemberStandIn(inverter_performance=3000, grid_power=500, battery_power=1000)
+    second = MemberStandIn(inverter_performance=2000, grid_power=0, battery_power=-500)
+    system.async_add_member("first", first)
+    system.async_add_member("second", second)
+    assert system.value("pv_power") == 5000
+    assert system.value(LOAD_POWER) == 2500 + 2500
+
+    notified = []
+    system.async_add_listener("grid_power", lambda: notified.append("grid_power"))
+    second.update(grid_power=250)
+    assert system.value("grid_power") == 750
+    assert system.value(LOAD_POWER) == 5250
+    assert notified == ["grid_power"]
+
+
+def test_stale_member_power_dropped():
+    system = SystemAggregator()
+    first = MemberStandIn(inverter_performance=3000, grid_power=0, battery_power=0)
+    second = MemberStandIn(inverter_performance=2000, grid_power=0, battery_power=0)
+    system.async_add_member("first", first)
+    system.async_add_member("second", second)
+
+    second.expired_keys = frozenset(("inverter_performance",))
+    second.update(inverter_performance=2000)
+    assert system.value("pv_power") == 3000
+    assert system.contributors("pv_power") == 1
+    assert system.contributors(LOAD_POWER) == 1
+
+    system.async_remove_member("first")
+    assert system.value("pv_power") is None
+
+
+def test_energy_never_drops():
+    system = SystemAggregator()
+    first = MemberStandIn()
+    first.energy.totals["pv_energy"] = 12.5
+    second = MemberStandIn()
+    second.energy.totals["pv_energy"] = 7.5
+    system.async_add_member("first", first)
+    system.async_add_member("second", second)
+    assert system.value("pv_energy") == 20
+
+    system.async_remove_member("second")
+    assert system.value("pv_energy") == 20
+    first.energy.totals["pv_energy"] = 13.0
+    first.update(pv_energy=13.0)
+    assert system.value("pv_energy") == 20.5
+
+
+def test_entities_added_with_second_member():
+    system = SystemAggregator()
+    added = []
+    system.async_add_member("first", MemberStandIn())
+    system.async_register_platform("first", added.extend, lambda: ["first"])
+    assert added == []
+    system.async_add_member("second", MemberStandIn())
+    system.async_register_platform("second", added.extend, lambda: ["second"])
+    assert added == ["first"]
+
+    # The entities went with the first entry's platform, as on a reload.
+    system.async_remove_member("first")
+    system.async_add_member("first", MemberStandIn())
+    assert added == ["first", "second"]
+
+
+@pytest.mark.asyncio
+async def test_systems_kept_apart(hass):
+    first = await async_get_system(hass, "garage")
+    second = await async_get_system(hass, "barn")
+    assert first is not second
+    assert await async_get_system(hass, "garage") is first
+
+
+@pytest.mark.asyncio
+async def test_energy_shares_saved(hass, hass_storage, freezer):
+    hass_storage[f"{DOMAIN}.system.garage"] = {
+        "version": SYSTEM_STORE_VERSION,
+        "key": f"{DOMAIN}.system.garage",
+        "data": {"energy": {"pv_energy": {"removed": 4.0}}},
+    }
+    system = await async_get_system(hass, "garage")
+    member = MemberStandIn()
+    member.energy.totals["pv_energy"] = 6.0
+    system.async_add_member("first", member)
+    assert system.value("pv_energy") == 10
+
+    freezer.tick(SYSTEM_SAVE_DELAY)
+    async_fire_time_changed(hass)
+    await hass.async_block_till_done()
+    saved = hass_storage[f"{DOMAIN}.system.garage"]["data"]
+    assert saved == {"energy": {"pv_energy": {"removed": 4.0, "first": 6.0}}}